@@ -0,0 +1,319 @@
+from __future__ import annotations
+import asyncio
+import json
+import math
+import os
+import random
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda, RunnableMap
+from pydantic import BaseModel, Field, PrivateAttr
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+_WORDS = ("the", "team", "shipped", "a", "new", "model", "that", "makes", "growth", "easier", "for", "every",
+          "founder", "building", "with", "data", "and", "AI", "this", "week", "#AI", "#Leadership")
+
+
+class FakeLLMError(RuntimeError):
+    """Injected failure (see FakeChatModel.failure_rate)."""
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline stand-in for ChatGroq, for load-testing the full request path without a network.
+
+    Every call waits a sampled time-to-first-token (`latency_ms` +/- `latency_jitter_ms`,
+    drawn from `latency_dist`), then produces `output_tokens` tokens at `tokens_per_sec`.
+    `failure_rate` of calls raise FakeLLMError and `stall_rate` of calls hang for
+    `stall_seconds` first (to exercise caller timeouts).
+
+    Plain calls return filler text; astream() yields it word by word. with_structured_output()
+    returns a valid instance of the schema: ActionInstruction and ExecutionPlan walk the
+    profile -> research -> content -> scheduler sequence from the context in the prompt, any
+    other schema (AnalysisSchema, ContentDraft, ...) is filled from its JSON schema.
+    `responders` maps a schema name to a function(prompt_text) -> dict to override that.
+    """
+
+    model: str = "fake"
+    latency_ms: float = 300.0
+    latency_jitter_ms: float = 100.0
+    latency_dist: str = "normal"
+    tokens_per_sec: float = 80.0
+    output_tokens: int = 60
+    failure_rate: float = 0.0
+    stall_rate: float = 0.0
+    stall_seconds: float = 60.0
+    seed: Optional[int] = None
+    responders: Dict[str, Callable[[str], Any]] = Field(default_factory=dict)
+
+    _rng: random.Random = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        if self.latency_dist not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency_dist must be one of: {'|'.join(LATENCY_DISTRIBUTIONS)}")
+        self._rng = random.Random(self.seed)
+
+    @classmethod
+    def from_env(cls, **params: Any) -> "FakeChatModel":
+        '''Build from FAKE_LLM_* environment variables; explicit params win.'''
+        env = {
+            "latency_ms": float(os.getenv("FAKE_LLM_LATENCY_MS", "300")),
+            "latency_jitter_ms": float(os.getenv("FAKE_LLM_LATENCY_JITTER_MS", "100")),
+            "latency_dist": os.getenv("FAKE_LLM_LATENCY_DIST", "normal"),
+            "tokens_per_sec": float(os.getenv("FAKE_LLM_TOKENS_PER_SEC", "80")),
+            "output_tokens": int(os.getenv("FAKE_LLM_OUTPUT_TOKENS", "60")),
+            "failure_rate": float(os.getenv("FAKE_LLM_FAILURE_RATE", "0")),
+            "stall_rate": float(os.getenv("FAKE_LLM_STALL_RATE", "0")),
+            "stall_seconds": float(os.getenv("FAKE_LLM_STALL_SECONDS", "60")),
+        }
+        if os.getenv("FAKE_LLM_SEED"):
+            env["seed"] = int(os.environ["FAKE_LLM_SEED"])
+        return cls(**{**env, **params})
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model}
+
+    # -------------------------
+    # Timing and failure injection
+    # -------------------------
+    def _first_token_delay(self) -> float:
+        mean, jitter = self.latency_ms, self.latency_jitter_ms
+        if self.latency_dist == "uniform":
+            ms = self._rng.uniform(mean - jitter, mean + jitter)
+        elif self.latency_dist == "normal":
+            ms = self._rng.gauss(mean, jitter)
+        elif self.latency_dist == "lognormal":
+            # Long right tail with the given mean and standard deviation
+            sigma2 = math.log1p((jitter / mean) ** 2) if mean > 0 else 0.0
+            ms = self._rng.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2)) if mean > 0 else 0.0
+        else:
+            ms = mean
+        return max(ms, 0.0) / 1000
+
+    def _token_delay(self) -> float:
+        return 1 / self.tokens_per_sec if self.tokens_per_sec > 0 else 0.0
+
+    def _fault(self) -> Optional[str]:
+        roll = self._rng.random()
+        if roll < self.failure_rate:
+            return "error"
+        if roll < self.failure_rate + self.stall_rate:
+            return "stall"
+        return None
+
+    # -------------------------
+    # Responses
+    # -------------------------
+    def _reply(self, messages: List[BaseMessage], schema: Optional[type]) -> str:
+        if schema is None:
+            return " ".join(self._rng.choice(_WORDS) for _ in range(self.output_tokens))
+        prompt = "\n".join(str(message.content) for message in messages)
+        responder = self.responders.get(schema.__name__) or _RESPONDERS.get(schema.__name__)
+        data = responder(prompt) if responder else _sample(schema.model_json_schema(), self._rng)
+        return json.dumps(data)
+
+    @staticmethod
+    def _usage(messages: List[BaseMessage], text: str) -> Dict[str, int]:
+        # ~4 chars/token, the same heuristic as ContextManager
+        input_tokens = sum(len(str(message.content)) for message in messages) // 4 + 1
+        output_tokens = len(text) // 4 + 1
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens}
+
+    def _chunks(self, text: str) -> List[str]:
+        words = text.split(" ")
+        return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+    # -------------------------
+    # BaseChatModel hooks
+    # -------------------------
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        fault = self._fault()
+        if fault == "stall":
+            time.sleep(self.stall_seconds)
+        time.sleep(self._first_token_delay())
+        if fault == "error":
+            raise FakeLLMError("injected fake LLM failure")
+        text = self._reply(messages, kwargs.get("response_schema"))
+        time.sleep(len(self._chunks(text)) * self._token_delay())
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        fault = self._fault()
+        if fault == "stall":
+            await asyncio.sleep(self.stall_seconds)
+        await asyncio.sleep(self._first_token_delay())
+        if fault == "error":
+            raise FakeLLMError("injected fake LLM failure")
+        text = self._reply(messages, kwargs.get("response_schema"))
+        await asyncio.sleep(len(self._chunks(text)) * self._token_delay())
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        fault = self._fault()
+        if fault == "stall":
+            time.sleep(self.stall_seconds)
+        time.sleep(self._first_token_delay())
+        if fault == "error":
+            raise FakeLLMError("injected fake LLM failure")
+        text = self._reply(messages, kwargs.get("response_schema"))
+        for i, piece in enumerate(self._chunks(text)):
+            if i:
+                time.sleep(self._token_delay())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, text)))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        fault = self._fault()
+        if fault == "stall":
+            await asyncio.sleep(self.stall_seconds)
+        await asyncio.sleep(self._first_token_delay())
+        if fault == "error":
+            raise FakeLLMError("injected fake LLM failure")
+        text = self._reply(messages, kwargs.get("response_schema"))
+        for i, piece in enumerate(self._chunks(text)):
+            if i:
+                await asyncio.sleep(self._token_delay())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, text)))
+
+    def with_structured_output(self, schema: Any, *, include_raw: bool = False, **kwargs: Any) -> Runnable:
+        if not (isinstance(schema, type) and issubclass(schema, BaseModel)):
+            raise TypeError("FakeChatModel only supports pydantic schemas")
+
+        def parse(message: AIMessage) -> BaseModel:
+            return schema.model_validate_json(message.content)
+
+        model = self.bind(response_schema=schema)
+        if not include_raw:
+            return model | RunnableLambda(parse)
+
+        def parse_raw(out: Dict[str, Any]) -> Dict[str, Any]:
+            try:
+                return {"raw": out["raw"], "parsed": parse(out["raw"]), "parsing_error": None}
+            except ValueError as e:
+                return {"raw": out["raw"], "parsed": None, "parsing_error": e}
+
+        return RunnableMap(raw=model) | RunnableLambda(parse_raw)
+
+
+# -------------------------
+# Structured responses
+# -------------------------
+def _sample(schema: Dict[str, Any], rng: random.Random, defs: Optional[Dict[str, Any]] = None) -> Any:
+    '''A value that satisfies a (pydantic-generated) JSON schema.'''
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return _sample(defs[schema["$ref"].rsplit("/", 1)[-1]], rng, defs)
+    if "default" in schema:
+        return schema["default"]
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "const" in schema:
+        return schema["const"]
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            options = [option for option in schema[key] if option.get("type") != "null"] or schema[key]
+            return _sample(options[0], rng, defs)
+    kind = schema.get("type")
+    if kind == "object":
+        required = schema.get("required", [])
+        return {name: _sample(prop, rng, defs) for name, prop in schema.get("properties", {}).items()
+                if name in required}
+    if kind == "array":
+        return [_sample(schema.get("items", {}), rng, defs) for _ in range(schema.get("minItems", 1))]
+    if kind in ("integer", "number"):
+        low = schema.get("minimum", schema.get("exclusiveMinimum", 0))
+        high = schema.get("maximum", schema.get("exclusiveMaximum", low + 10))
+        return rng.randint(int(low), int(high)) if kind == "integer" else rng.uniform(low, high)
+    if kind == "boolean":
+        return False
+    if kind == "string":
+        if schema.get("format") in ("uri", "url"):
+            return "https://example.com/fake"
+        if schema.get("format") == "date-time":
+            return "2030-01-01T09:00:00Z"
+        return " ".join(rng.choice(_WORDS) for _ in range(12))
+    return None
+
+
+def _prompt_context(prompt: str) -> Dict[str, Any]:
+    # The mediator prompts start with "Given the context: {serialized context} and available tools: ..."
+    start = prompt.find("context: ")
+    if start < 0:
+        return {}
+    try:
+        context, _ = json.JSONDecoder().raw_decode(prompt, start + len("context: "))
+    except ValueError:
+        return {}
+    return context if isinstance(context, dict) else {}
+
+
+def _pipeline_calls(context: Dict[str, Any]) -> List[Dict[str, Any]]:
+    '''The next profile -> research -> content -> scheduler calls not yet made, with $ref args.'''
+    refs: Dict[str, str] = {}
+    for entry in context.get("tool_outputs", []):
+        for tool, summary in entry.items():
+            refs.setdefault(tool, summary.get("ref") if isinstance(summary, dict) else None)
+    for name in context.get("completed_nodes", []) or []:
+        refs.setdefault(name, name)
+    user_id = context.get("user_id")
+    profile, research, content = refs.get("profile", "profile"), refs.get("research", "research"), refs.get("content", "content")
+    calls = [
+        {"id": "profile", "tool": "profile", "args": {"user_id": user_id}},
+        {"id": "research", "tool": "research", "args": {"field": "AI"}},
+        {"id": "content", "tool": "content",
+         "args": {"profile": {"$ref": f"{profile}.profile"}, "analysis": {"$ref": research}}},
+        {"id": "scheduler", "tool": "scheduler",
+         "args": {"content_id": f"fake-{user_id}-{content}", "optimize": True, "user_id": user_id,
+                  "content": {"$ref": f"{content}.content"}}},
+    ]
+    return [call for call in calls if call["tool"] not in refs]
+
+
+def _action_instruction(prompt: str) -> Dict[str, Any]:
+    remaining = _pipeline_calls(_prompt_context(prompt))
+    if not remaining:
+        return {"action": "done", "reason": "post scheduled"}
+    call = remaining[0]
+    return {"action": "call_tool", "tool": call["tool"], "args": call["args"]}
+
+
+def _execution_plan(prompt: str) -> Dict[str, Any]:
+    nodes = _pipeline_calls(_prompt_context(prompt))
+    ids = {node["id"] for node in nodes}
+    # Profile and research are independent; content needs both, the scheduler needs content
+    for node in nodes:
+        if node["id"] == "content":
+            node["depends_on"] = [dep for dep in ("profile", "research") if dep in ids]
+    return {"nodes": nodes, "reason": "fake plan"}
+
+
+_RESPONDERS: Dict[str, Callable[[str], Any]] = {
+    "ActionInstruction": _action_instruction,
+    "ExecutionPlan": _execution_plan,
+}
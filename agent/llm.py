@@ -1,15 +1,100 @@
 import os
-from langchain_groq import ChatGroq
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
 from dotenv import load_dotenv
 
+from .llm_cache import get_llm_cache
+
 load_dotenv()
 
-def llm():
-    apikey = os.getenv("GROQ_API_KEY")
-    if not apikey:
-        raise ValueError("GROQ_API_KEY environment variable is not set.")  
-    
-    groq = ChatGroq(api_key=apikey,
-                    model='llama-3.3-70b-versatile')
-    return groq
+DEFAULT_MODEL = 'llama-3.3-70b-versatile'
+
+# "groq" (default) or "fake" (offline FakeChatModel, tuned with FAKE_LLM_* variables; no API key needed)
+LLM_BACKENDS = ("groq", "fake")
+
+
+class LLMProvider:
+    """
+    Process-wide pool of chat model clients.
+
+    Every ChatGroq owns its own HTTP connection pool, so building one per call throws
+    away keep-alive connections and repeats the TLS handshake. The provider builds one
+    client per (model, params) key and hands that same instance to every caller.
+    Clients hold no per-request state, so concurrent asyncio tasks can share them.
+
+    A `family` ("mediator", "research", "profile", "content") attaches that prompt
+    family's response cache to the client, or disables caching when the family opts out.
+    Every client reports call latency and tokens to the llm_* Prometheus metrics.
+    With LLM_BACKEND=fake every client is a FakeChatModel instead, for offline load tests.
+    """
+
+    def __init__(self):
+        self._clients: Dict[Tuple, BaseChatModel] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(model: str, params: Dict[str, Any]) -> Tuple:
+        return (model, tuple(sorted((name, repr(value)) for name, value in params.items())))
+
+    @staticmethod
+    def backend() -> str:
+        backend = os.getenv("LLM_BACKEND", "groq").lower()
+        if backend not in LLM_BACKENDS:
+            raise ValueError(f"LLM_BACKEND must be one of: {'|'.join(LLM_BACKENDS)}")
+        return backend
+
+    def _build(self, model: str, family: Optional[str], **params) -> BaseChatModel:
+        if family is not None:
+            params.setdefault("cache", get_llm_cache(family) or False)
+        # Client libraries (and the metrics callback) are imported on first build, so importing this module stays cheap
+        from .llm_metrics import LLMMetricsCallback
+        params.setdefault("callbacks", [LLMMetricsCallback(model, family)])
+        if self.backend() == "fake":
+            from .fake_llm import FakeChatModel
+            return FakeChatModel.from_env(model=model, **params)
+        from langchain_groq import ChatGroq
+        apikey = os.getenv("GROQ_API_KEY")
+        if not apikey:
+            raise ValueError("GROQ_API_KEY environment variable is not set.")
+        return ChatGroq(api_key=apikey, model=model, **params)
+
+    def get(self, model: str = DEFAULT_MODEL, family: Optional[str] = None, **params) -> BaseChatModel:
+        key = self._key(model, {**params, "family": family})
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self.hits += 1
+                return client
+            client = self._build(model, family, **params)
+            self._clients[key] = client
+            self.misses += 1
+            return client
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"backend": self.backend(), "clients": len(self._clients), "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clients.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_provider = LLMProvider()
+
+
+def get_llm_provider() -> LLMProvider:
+    return _provider
+
 
+def llm(model: str = DEFAULT_MODEL, family: Optional[str] = None, **params) -> BaseChatModel:
+    '''
+    Return the shared chat model client for `model`, `family` and `params`.
+    The first call for a key builds the client; later calls reuse it.
+    '''
+    return _provider.get(model, family=family, **params)
@@ -0,0 +1,266 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+load_dotenv()
+
+# Seconds a cached response stays valid, per prompt family. 0 disables caching for
+# that family (creative generation should produce a fresh post every time).
+DEFAULT_FAMILY_TTLS: Dict[str, int] = {
+    "mediator": 300,
+    "research": 6 * 3600,
+    "profile": 24 * 3600,
+    "content": 0,
+}
+
+
+def family_ttl(family: str) -> int:
+    '''TTL for a prompt family; override with LLM_CACHE_TTL_<FAMILY> (seconds).'''
+    override = os.getenv(f"LLM_CACHE_TTL_{family.upper()}")
+    if override is not None:
+        return int(override)
+    return DEFAULT_FAMILY_TTLS.get(family, 0)
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    '''Hash of the whitespace-normalized prompt and the model configuration.'''
+    normalized = " ".join(prompt.split())
+    model_hash = hashlib.sha256(llm_string.encode()).hexdigest()
+    return hashlib.sha256(f"{model_hash}\x00{normalized}".encode()).hexdigest()
+
+
+class LLMCacheStore:
+    """
+    Two-tier response store shared by every prompt family: an in-memory LRU in front
+    of a local SQLite table. SQLite access is serialized with a lock so the store can
+    be used from the executor threads LangChain's async cache calls run in.
+
+    The SQLite tier is swept on open and every `sweep_every` writes: expired rows are
+    deleted, then the rows closest to expiry beyond `max_disk_entries`.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1024, max_disk_entries: int = 50_000,
+                 sweep_every: int = 256):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.sweep_every = sweep_every
+        self.evicted = 0
+        self._memory: "OrderedDict[str, Tuple[float, Sequence[Generation], float]]" = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        # Guards the per-family counters, which are updated from the event loop and executor threads
+        self.stats_lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, family TEXT NOT NULL, value TEXT NOT NULL,"
+            " latency_ms REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_expires_at ON llm_cache (expires_at)")
+        with self._db_lock:
+            self._sweep()
+
+    def get_memory(self, key: str) -> Optional[Tuple[Sequence[Generation], float]]:
+        with self._memory_lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires_at, value, latency_ms = entry
+            if expires_at < time.time():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return value, latency_ms
+
+    def put_memory(self, key: str, value: Sequence[Generation], latency_ms: float, expires_at: float) -> None:
+        with self._memory_lock:
+            self._memory[key] = (expires_at, value, latency_ms)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get_disk(self, key: str) -> Optional[Tuple[Sequence[Generation], float, float]]:
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT value, latency_ms, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[2] < time.time():
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+        return loads(row[0]), row[1], row[2]
+
+    def put_disk(self, key: str, family: str, value: Sequence[Generation], latency_ms: float, expires_at: float) -> None:
+        payload = dumps(list(value))
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, family, value, latency_ms, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, family, payload, latency_ms, expires_at),
+            )
+            self._writes += 1
+            if self._writes % self.sweep_every == 0:
+                self._sweep()
+            else:
+                self._conn.commit()
+
+    def _sweep(self) -> None:
+        # Caller holds _db_lock
+        deleted = self._conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),)).rowcount
+        excess = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_disk_entries
+        if excess > 0:
+            deleted += self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY expires_at LIMIT ?)",
+                (excess,),
+            ).rowcount
+        self._conn.commit()
+        self.evicted += deleted
+
+    def disk_entries(self) -> int:
+        with self._db_lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def clear(self, family: Optional[str] = None) -> None:
+        with self._memory_lock:
+            self._memory.clear()
+        with self._db_lock:
+            if family is None:
+                self._conn.execute("DELETE FROM llm_cache")
+            else:
+                self._conn.execute("DELETE FROM llm_cache WHERE family = ?", (family,))
+            self._conn.commit()
+
+
+class PromptFamilyCache(BaseCache):
+    """
+    LangChain cache for one prompt family (mediator, research, profile, ...).
+    Set as `cache=` on a chat model, so every chain built on that model goes
+    through it. Tracks hits per tier, misses and the LLM time saved by hits.
+    """
+
+    def __init__(self, store: LLMCacheStore, family: str, ttl: int):
+        self.store = store
+        self.family = family
+        self.ttl = ttl
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.latency_saved_ms = 0.0
+        self._miss_started: Dict[str, float] = {}
+
+    def _hit(self, key: str) -> Optional[Sequence[Generation]]:
+        cached = self.store.get_memory(key)
+        if cached is not None:
+            with self.store.stats_lock:
+                self.memory_hits += 1
+                self.latency_saved_ms += cached[1]
+            return cached[0]
+        return None
+
+    def _disk_hit(self, key: str) -> Optional[Sequence[Generation]]:
+        cached = self.store.get_disk(key)
+        if cached is None:
+            with self.store.stats_lock:
+                self.misses += 1
+                if len(self._miss_started) > self.store.max_entries:
+                    # Misses whose LLM call failed never reach update(); don't let them pile up
+                    self._miss_started.clear()
+                self._miss_started[key] = time.perf_counter()
+            return None
+        value, latency_ms, expires_at = cached
+        self.store.put_memory(key, value, latency_ms, expires_at)
+        with self.store.stats_lock:
+            self.disk_hits += 1
+            self.latency_saved_ms += latency_ms
+        return value
+
+    def _entry(self, key: str) -> Tuple[float, float]:
+        with self.store.stats_lock:
+            started = self._miss_started.pop(key, None)
+        latency_ms = (time.perf_counter() - started) * 1000 if started is not None else 0.0
+        return latency_ms, time.time() + self.ttl
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        key = cache_key(prompt, llm_string)
+        value = self._hit(key)
+        if value is not None:
+            return value
+        return self._disk_hit(key)
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        key = cache_key(prompt, llm_string)
+        latency_ms, expires_at = self._entry(key)
+        self.store.put_memory(key, return_val, latency_ms, expires_at)
+        self.store.put_disk(key, self.family, return_val, latency_ms, expires_at)
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        # Memory hits are served inline; only the SQLite tier goes to a thread
+        key = cache_key(prompt, llm_string)
+        value = self._hit(key)
+        if value is not None:
+            return value
+        return await asyncio.get_running_loop().run_in_executor(None, self._disk_hit, key)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        key = cache_key(prompt, llm_string)
+        latency_ms, expires_at = self._entry(key)
+        self.store.put_memory(key, return_val, latency_ms, expires_at)
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.store.put_disk, key, self.family, return_val, latency_ms, expires_at
+        )
+
+    def clear(self, **kwargs: Any) -> None:
+        self.store.clear(family=self.family)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.store.stats_lock:
+            return {
+                "ttl": self.ttl,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "latency_saved_ms": round(self.latency_saved_ms, 1),
+            }
+
+
+_store: Optional[LLMCacheStore] = None
+_families: Dict[str, PromptFamilyCache] = {}
+_lock = threading.Lock()
+
+
+def get_llm_cache(family: str) -> Optional[PromptFamilyCache]:
+    '''
+    Cache for a prompt family, or None when caching is disabled for it
+    (TTL of 0, or LLM_CACHE_ENABLED=false).
+    '''
+    global _store
+    ttl = family_ttl(family)
+    if ttl <= 0 or os.getenv("LLM_CACHE_ENABLED", "true").lower() in {"0", "false", "no"}:
+        return None
+    with _lock:
+        if _store is None:
+            _store = LLMCacheStore(
+                path=os.getenv("LLM_CACHE_PATH", "llm_cache.db"),
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")),
+                max_disk_entries=int(os.getenv("LLM_CACHE_MAX_DISK_ENTRIES", "50000")),
+            )
+        if family not in _families:
+            _families[family] = PromptFamilyCache(_store, family, ttl)
+        return _families[family]
+
+
+def llm_cache_stats() -> Dict[str, Any]:
+    return {family: cache.stats() for family, cache in _families.items()}
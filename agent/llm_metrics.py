@@ -0,0 +1,66 @@
+'''
+LangChain callback feeding the llm_* Prometheus metrics (agent/metrics.py).
+Imported by LLMProvider when it builds a client, so importing the metrics alone
+does not load langchain_core.
+'''
+import time
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from .metrics import LLM_ERRORS, LLM_IN_FLIGHT, LLM_SECONDS, LLM_TOKENS
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    '''
+    Times every call of the chat model it is attached to. One instance per pooled
+    client, so the model and prompt family labels are fixed up front.
+    '''
+    # Plain counter updates; no need to hop to a thread for async calls
+    run_inline = True
+
+    def __init__(self, model: str, family: Optional[str] = None):
+        self.labels = {"model": model, "family": family or "default"}
+        self._started: Dict[UUID, float] = {}
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id)
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        if self._finish(run_id):
+            input_tokens, output_tokens = self._usage(response)
+            if input_tokens:
+                LLM_TOKENS.labels(kind="input", **self.labels).inc(input_tokens)
+            if output_tokens:
+                LLM_TOKENS.labels(kind="output", **self.labels).inc(output_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        if self._finish(run_id):
+            LLM_ERRORS.labels(**self.labels).inc()
+
+    def _start(self, run_id: UUID) -> None:
+        self._started[run_id] = time.perf_counter()
+        LLM_IN_FLIGHT.labels(**self.labels).inc()
+
+    def _finish(self, run_id: UUID) -> bool:
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return False
+        LLM_IN_FLIGHT.labels(**self.labels).dec()
+        LLM_SECONDS.labels(**self.labels).observe(time.perf_counter() - started)
+        return True
+
+    @staticmethod
+    def _usage(response: LLMResult) -> Tuple[int, int]:
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
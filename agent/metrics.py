@@ -0,0 +1,32 @@
+'''
+Prometheus metrics of the agent: mediator, tool, run and LLM call families
+(see backend/utils/metrics.py for the full list exported at GET /metrics).
+
+Only prometheus_client is imported here, so the orchestrator can record metrics
+without pulling in the backend or LangChain.
+'''
+from prometheus_client import Counter, Gauge, Histogram
+
+
+# LLM and tool calls take seconds, not milliseconds
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+# ---------- Agent ----------
+MEDIATOR_SECONDS = Histogram("agent_mediator_seconds", "Mediator decide/plan latency", ["kind"], buckets=SLOW_BUCKETS)
+MEDIATOR_ERRORS = Counter("agent_mediator_errors_total", "Failed mediator calls", ["kind", "reason"])
+
+TOOL_SECONDS = Histogram("agent_tool_seconds", "Tool call latency (run/arun/astream)", ["tool"], buckets=SLOW_BUCKETS)
+TOOL_ERRORS = Counter("agent_tool_errors_total", "Tool calls that raised", ["tool"])
+TOOL_TIMEOUTS = Counter("agent_tool_timeouts_total", "Tool calls that hit the tool timeout", ["tool"])
+TOOL_INVALID_ARGS = Counter("agent_tool_invalid_args_total", "Tool calls rejected before dispatch (bad args)", ["tool"])
+TOOLS_IN_FLIGHT = Gauge("agent_tools_in_flight", "Tool calls currently running", ["tool"])
+
+RUNS_IN_FLIGHT = Gauge("agent_runs_in_flight", "Agent runs currently running", ["mode"])
+RUNS = Counter("agent_runs_total", "Finished agent runs", ["mode", "outcome"])
+
+# ---------- LLM ----------
+LLM_SECONDS = Histogram("llm_call_seconds", "Chat model call latency (cache hits included)",
+                        ["model", "family"], buckets=SLOW_BUCKETS)
+LLM_ERRORS = Counter("llm_errors_total", "Failed chat model calls", ["model", "family"])
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens reported by the model", ["model", "family", "kind"])
+LLM_IN_FLIGHT = Gauge("llm_calls_in_flight", "Chat model calls currently running", ["model", "family"])
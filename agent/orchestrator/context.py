@@ -0,0 +1,158 @@
+from __future__ import annotations
+import json
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+logger = logging.getLogger("linkedin_dynamic_agent")
+
+REF_KEY = "$ref"
+
+
+class ContextManager:
+    """
+    Keeps the mediator's view of an agent run within a token budget.
+
+    Full tool outputs are stored out-of-band under reference ids ("out-1", "out-2", ...).
+    The context only carries a compact summary plus the ref, and a mediator can hand a
+    full output (or part of it) to a tool by passing {"$ref": "out-2.analysis"} as an arg.
+    When the view is still over budget, the oldest summaries are reduced to bare refs,
+    the oldest `tools_called` entries are dropped, and finally the largest other context
+    values (the profile, caller-supplied keys) are summarized the same way.
+    """
+
+    # View keys trimmed entry by entry; every other context key is budgeted as one value
+    TOOL_KEYS = ("tools_called", "tools_called_omitted", "tool_outputs", "analyses")
+
+    def __init__(self, token_budget: int = 4000, summary_chars: int = 400, keep_recent_calls: int = 6):
+        self.token_budget = token_budget
+        self.summary_chars = summary_chars
+        self.keep_recent_calls = keep_recent_calls
+        self._outputs: Dict[str, Any] = {}
+        self._aliases: Dict[str, str] = {}
+
+    # -------------------------
+    # Sizing helpers
+    # -------------------------
+    @staticmethod
+    def serialize(obj: Any) -> str:
+        return json.dumps(obj, default=str, separators=(",", ":"))
+
+    @classmethod
+    def _item_chars(cls, key: str, value: Any) -> int:
+        # `"key":value` plus the comma separating it from its neighbours in a dict
+        return len(cls.serialize({key: value})) - 1
+
+    @classmethod
+    def estimate_tokens(cls, obj: Any) -> int:
+        # ~4 characters per token is close enough for budgeting English/JSON prompts
+        return len(cls.serialize(obj)) // 4 + 1
+
+    def summarize(self, value: Any) -> Any:
+        text = self.serialize(value)
+        if len(text) <= self.summary_chars:
+            return value
+        return text[: self.summary_chars] + "..."
+
+    # -------------------------
+    # Out-of-band output store
+    # -------------------------
+    def record(self, context: Dict[str, Any], tool_name: str, result: Any) -> str:
+        """Store a full tool result and append its compact entry to `context["tool_outputs"]`."""
+        ref = f"out-{len(self._outputs) + 1}"
+        self._outputs[ref] = result
+        context.setdefault("tool_outputs", []).append({tool_name: {"ref": ref, "summary": self.summarize(result)}})
+        return ref
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Stored outputs and aliases, for checkpointing a run."""
+        return {"outputs": dict(self._outputs), "aliases": dict(self._aliases)}
+
+    def restore(self, snapshot: Dict[str, Any]) -> None:
+        self._outputs = dict(snapshot.get("outputs", {}))
+        self._aliases = dict(snapshot.get("aliases", {}))
+
+    def alias(self, name: str, ref: str) -> None:
+        """Make a stored output reachable under another name too (e.g. a plan node id)."""
+        self._aliases[name] = ref
+
+    def names(self) -> Set[str]:
+        """Every name a {"$ref": ...} can start with: `out-N` keys and aliases."""
+        return set(self._outputs) | set(self._aliases)
+
+    def get(self, ref: str) -> Any:
+        """Look up `out-N` (or an alias) or a dotted path into it such as `out-N.analysis.trend`."""
+        key, _, path = ref.partition(".")
+        key = self._aliases.get(key, key)
+        if key not in self._outputs:
+            raise KeyError(f"unknown output reference: {ref}")
+        value = self._outputs[key]
+        for part in filter(None, path.split(".")):
+            value = value[int(part)] if isinstance(value, list) else value[part]
+        return value
+
+    def resolve(self, value: Any) -> Any:
+        """Replace every {"$ref": ...} inside tool args with the stored output."""
+        if isinstance(value, dict):
+            if set(value) == {REF_KEY}:
+                return self.get(value[REF_KEY])
+            return {k: self.resolve(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.resolve(v) for v in value]
+        return value
+
+    # -------------------------
+    # Mediator view
+    # -------------------------
+    def view(self, context: Dict[str, Any], reserved_tokens: int = 0) -> Dict[str, Any]:
+        """
+        Build the compact context shown to the mediator, trimmed to fit
+        `token_budget - reserved_tokens` (reserve room for the tool list etc.).
+        """
+        budget = self.token_budget - reserved_tokens
+        view = dict(context)
+
+        calls: List[Dict[str, Any]] = [
+            {**call, "args": self.summarize(call.get("args", {}))} for call in context.get("tools_called", [])
+        ]
+        if len(calls) > self.keep_recent_calls:
+            view["tools_called_omitted"] = len(calls) - self.keep_recent_calls
+            calls = calls[-self.keep_recent_calls:]
+        view["tools_called"] = calls
+        outputs = [dict(entry) for entry in context.get("tool_outputs", [])]
+        view["tool_outputs"] = outputs
+        if "analyses" in context:
+            view["analyses"] = {name: self.summarize(analysis) for name, analysis in context["analyses"].items()}
+
+        # Every trimming step changes one entry, so sizes are measured once and the
+        # running total is adjusted by each change instead of re-serializing the view
+        chars = len(self.serialize(view))
+        output_chars = [len(self.serialize(entry)) for entry in outputs]
+        call_chars = [len(self.serialize(call)) for call in calls]
+        extras = sorted(((len(self.serialize(value)), key) for key, value in view.items() if key not in self.TOOL_KEYS),
+                        reverse=True)
+
+        # Oldest first: reduce summaries to bare refs, then drop old call records,
+        # then summarize the largest other values (e.g. the profile)
+        stale = 0
+        while chars // 4 + 1 > budget:
+            if stale < len(outputs) - 1:
+                (name, entry), = outputs[stale].items()
+                outputs[stale] = {name: {"ref": entry["ref"]}}
+                chars += len(self.serialize(outputs[stale])) - output_chars[stale]
+                stale += 1
+            elif len(calls) > 1:
+                calls.pop(0)
+                chars -= call_chars.pop(0) + 1
+                omitted = view.get("tools_called_omitted")
+                view["tools_called_omitted"] = (omitted or 0) + 1
+                chars += self._item_chars("tools_called_omitted", view["tools_called_omitted"])
+                if omitted is not None:
+                    chars -= self._item_chars("tools_called_omitted", omitted)
+            elif extras and extras[0][0] > self.summary_chars:
+                size, key = extras.pop(0)
+                view[key] = self.summarize(view[key])
+                chars += len(self.serialize(view[key])) - size
+            else:
+                logger.warning("Context view still over budget (%d tokens)", chars // 4 + 1)
+                break
+        return view
@@ -1,23 +1,33 @@
 # agent/orchestrator_dynamic.py
 from __future__ import annotations
 import asyncio
+import json
 import logging
+import time
+import uuid
 from datetime import datetime, timezone
-from typing import Any, Callable, Dict, List, Optional, Protocol, Tuple
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Mapping, Optional, Protocol, Set, Tuple
 from pydantic import BaseModel, Field, ValidationError
 
+from .context import REF_KEY, ContextManager
+from .tool_registry import ToolRegistry
+from ..metrics import (
+    MEDIATOR_ERRORS, MEDIATOR_SECONDS, RUNS, RUNS_IN_FLIGHT,
+    TOOL_ERRORS, TOOL_INVALID_ARGS, TOOL_SECONDS, TOOL_TIMEOUTS, TOOLS_IN_FLIGHT,
+)
+
 logger = logging.getLogger("linkedin_dynamic_agent")
 
 
 # -------------------------
 # Domain Models (Pydantic)
 # -------------------------
-# class Profile(BaseModel):
-#     user_id: str
-#     name: str
-#     headline: Optional[str] = None
-#     skills: List[str] = Field(default_factory=list)
-#     raw: Dict[str, Any] = Field(default_factory=dict)
+class Profile(BaseModel):
+    user_id: str
+    name: str
+    headline: Optional[str] = None
+    skills: List[str] = Field(default_factory=list)
+    raw: Dict[str, Any] = Field(default_factory=dict)
 
 
 class Trend(BaseModel):
@@ -27,13 +37,13 @@ class Trend(BaseModel):
     url: Optional[str] = None
 
 
-# class Post(BaseModel):
-#     id: Optional[str] = None
-#     user_id: str
-#     text: str
-#     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-#     scheduled_for: Optional[datetime] = None
-#     metadata: Dict[str, Any] = Field(default_factory=dict)
+class Post(BaseModel):
+    id: Optional[str] = None
+    user_id: str
+    text: str
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    scheduled_for: Optional[datetime] = None
+    metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
 class Analytics(BaseModel):
@@ -63,6 +73,11 @@ class ToolProtocol(Protocol):
 # -------------------------
 # LLM Mediator Protocol
 # -------------------------
+class ToolCall(BaseModel):
+    tool: str
+    args: Dict[str, Any] = Field(default_factory=dict)
+
+
 class ActionInstruction(BaseModel):
     """
     This is the schema the LLM MUST output (as JSON). The orchestrator will parse and validate it.
@@ -72,17 +87,116 @@ class ActionInstruction(BaseModel):
       "tool": "research",
       "args": {"industry_keywords": ["ml", "nlp"], "limit": 3}
     }
+    or, for independent tools that can run at the same time,
+    {
+      "action": "call_tools",
+      "calls": [
+        {"tool": "profile", "args": {"user_id": 1}},
+        {"tool": "research", "args": {"field": "AI"}}
+      ]
+    }
     or
     {
       "action": "done",
       "reason": "post scheduled"
     }
     """
-    action: str  # "call_tool" or "done"
+    action: str  # "call_tool", "call_tools" or "done"
     tool: Optional[str] = None
     args: Dict[str, Any] = Field(default_factory=dict)
+    calls: List[ToolCall] = Field(default_factory=list)
+    reason: Optional[str] = None
+
+    def tool_calls(self) -> List[ToolCall]:
+        """Normalize single and batched instructions into a list of tool calls."""
+        if self.action == "call_tools":
+            return list(self.calls)
+        if self.action == "call_tool" and self.tool:
+            return [ToolCall(tool=self.tool, args=self.args)]
+        return []
+
+
+def _ref_heads(value: Any) -> Set[str]:
+    """Output ids referenced by {"$ref": "<id>[.<field>...]"} anywhere in `value`."""
+    if isinstance(value, dict):
+        if set(value) == {REF_KEY}:
+            return {str(value[REF_KEY]).partition(".")[0]}
+        return set().union(*(_ref_heads(v) for v in value.values()))
+    if isinstance(value, list):
+        return set().union(*(_ref_heads(v) for v in value))
+    return set()
+
+
+class PlanNode(BaseModel):
+    id: str
+    tool: str
+    args: Dict[str, Any] = Field(default_factory=dict)
+    depends_on: List[str] = Field(default_factory=list)
+
+
+class ExecutionPlan(BaseModel):
+    """
+    A whole run planned up front as a DAG of tool calls. Args can pass another
+    node's output with {"$ref": "<node id>"} or {"$ref": "<node id>.<field>"};
+    such references count as dependencies even when not listed in depends_on.
+    Example:
+    {
+      "nodes": [
+        {"id": "profile", "tool": "profile", "args": {"user_id": 1}},
+        {"id": "research", "tool": "research", "args": {"field": "AI"}},
+        {"id": "content", "tool": "content",
+         "args": {"profile": {"$ref": "profile"}, "analysis": {"$ref": "research.analysis"}}},
+        {"id": "schedule", "tool": "scheduler", "args": {"content_id": {"$ref": "content.content"}},
+         "depends_on": ["content"]}
+      ],
+      "reason": "profile and research are independent; content needs both"
+    }
+    """
+    nodes: List[PlanNode] = Field(default_factory=list)
     reason: Optional[str] = None
 
+    def dependencies(self) -> Dict[str, Set[str]]:
+        """Node id -> ids of the nodes in this plan it must wait for."""
+        ids = {node.id for node in self.nodes}
+        return {node.id: (set(node.depends_on) | _ref_heads(node.args)) & ids for node in self.nodes}
+
+    def order(self) -> List[str]:
+        """Node ids in dependency order. Raises ValueError on a cycle."""
+        remaining = self.dependencies()
+        ordered: List[str] = []
+        while remaining:
+            ready = [node_id for node_id, deps in remaining.items() if not deps - set(ordered)]
+            if not ready:
+                raise ValueError(f"dependency cycle between: {','.join(sorted(remaining))}")
+            for node_id in ready:
+                ordered.append(node_id)
+                del remaining[node_id]
+        return ordered
+
+    def problem(self, tool_registry: Dict[str, Any], known: Set[str], max_nodes: int) -> Optional[str]:
+        """Why this plan can't run, or None. `known` holds the names of outputs from earlier plans."""
+        ids = [node.id for node in self.nodes]
+        if not ids:
+            return "empty plan"
+        if len(ids) > max_nodes:
+            return f"plan has {len(ids)} nodes, max is {max_nodes}"
+        if len(set(ids)) != len(ids):
+            return "duplicate node ids"
+        unknown = [node.tool for node in self.nodes if node.tool not in tool_registry]
+        if unknown:
+            return f"unknown_tool:{','.join(unknown)}"
+        missing = {dep for node in self.nodes for dep in node.depends_on} - set(ids) - known
+        if missing:
+            return f"unknown dependency:{','.join(sorted(missing))}"
+        unresolved = set().union(*(_ref_heads(node.args) for node in self.nodes)) - set(ids) - known
+        if unresolved:
+            return f"unknown $ref:{','.join(sorted(unresolved))}"
+        try:
+            self.order()
+        except ValueError as e:
+            return str(e)
+        return None
+
 
 class LLMMediatorInterface(Protocol):
     async def decide(self, context: Dict[str, Any], available_tools: List[Dict[str, Any]]) -> ActionInstruction:
@@ -93,43 +207,229 @@ class LLMMediatorInterface(Protocol):
         ...
 
 
+class PlannerInterface(Protocol):
+    async def plan(self, context: Dict[str, Any], available_tools: List[Dict[str, Any]]) -> ExecutionPlan:
+        """
+        Return the whole run as an ExecutionPlan. When re-planning, the context carries the
+        outputs of nodes that already succeeded and `plan_failures` describing what went wrong.
+        """
+        ...
+
+
+class CheckpointerProtocol(Protocol):
+    async def save(self, run_id: str, seq: int, step: int, state: Dict[str, Any], trace: List[Dict[str, Any]],
+                   finished: bool = False, user_id: Optional[int] = None, mode: str = "step") -> None:
+        """Persist checkpoint `seq` of a run: its resumable state and the trace entries since the last one."""
+        ...
+
+    async def load(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Return {"seq", "step", "state", "trace" (whole run), "finished", ...} or None if unknown."""
+        ...
+
+
 # -------------------------
 # Orchestrator (dynamic)
 # -------------------------
+# Stream events that make up a run's trace (see DynamicAgentOrchestrator.run_stream)
+TRACE_EVENTS = ("plan", "tool_end", "tool_error", "error", "done")
+AGENT_MODES = ("step", "plan")
+
+
+class AgentRun:
+    """Mutable state of one agent run: everything a checkpoint needs to resume it."""
+
+    def __init__(self, run_id: str, user_id: Any, context: Dict[str, Any], context_manager: ContextManager):
+        self.run_id = run_id
+        self.user_id = user_id
+        self.context = context
+        # Full tool outputs live here; the mediator only sees compact summaries / refs
+        self.context_manager = context_manager
+        self.step = 0
+        # One entry per mediator call
+        self.prompt_tokens: List[int] = []
+        # Plan mode: current plan, its nodes that succeeded, node ids stored across re-plans, failures
+        self.plan: Optional[ExecutionPlan] = None
+        self.plan_done: Set[str] = set()
+        self.completed: Set[str] = set()
+        self.failures: List[Dict[str, Any]] = []
+        # Checkpointing: last checkpoint number and trace entries not yet saved
+        self.seq = 0
+        self.pending_trace: List[Dict[str, Any]] = []
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "context": self.context,
+            "outputs": self.context_manager.snapshot(),
+            "step": self.step,
+            "prompt_tokens": self.prompt_tokens,
+            "plan": self.plan.model_dump() if self.plan is not None else None,
+            "plan_done": sorted(self.plan_done),
+            "completed": sorted(self.completed),
+            "failures": self.failures,
+        }
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        self.context = state["context"]
+        self.context_manager.restore(state.get("outputs", {}))
+        self.step = state.get("step", 0)
+        self.prompt_tokens = list(state.get("prompt_tokens", []))
+        self.plan = ExecutionPlan.model_validate(state["plan"]) if state.get("plan") else None
+        self.plan_done = set(state.get("plan_done", []))
+        self.completed = set(state.get("completed", []))
+        self.failures = list(state.get("failures", []))
+
+
 class DynamicAgentOrchestrator:
-    def __init__(self, mediator: LLMMediatorInterface, tool_registry: Dict[str, ToolProtocol], max_steps: int = 8):
+    def __init__(self, mediator: LLMMediatorInterface, tool_registry: Mapping[str, ToolProtocol], max_steps: int = 8,
+                 tool_timeout: float = 30, context_token_budget: int = 4000, mode: str = "step",
+                 max_replans: int = 1, checkpointer: Optional[CheckpointerProtocol] = None):
+        """
+        mode="step" asks the mediator for one action per step (mediator.decide).
+        mode="plan" asks it once for a whole tool DAG (mediator.plan), runs the DAG with
+        dependency-aware concurrency and only asks again, up to `max_replans` times,
+        when a node fails.
+        With a `checkpointer`, every completed step (plan node) is saved and a run can be
+        resumed by its run_id without repeating tool or mediator work.
+        Pass a ToolRegistry to reuse its precomputed schemas across runs; a plain dict is wrapped in one.
+        """
+        if mode not in AGENT_MODES:
+            raise ValueError(f"mode must be one of: {'|'.join(AGENT_MODES)}")
         self.mediator = mediator
-        self.tool_registry = tool_registry
+        self.tool_registry = tool_registry if isinstance(tool_registry, ToolRegistry) else ToolRegistry(tool_registry)
         self.max_steps = max_steps
-
-    async def run(self, user_id: int, initial_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        self.tool_timeout = tool_timeout
+        self.context_token_budget = context_token_budget
+        self.mode = mode
+        self.max_replans = max_replans
+        self.checkpointer = checkpointer
+
+    async def run(self, user_id: int, initial_context: Optional[Dict[str, Any]] = None,
+                  run_id: Optional[str] = None) -> Dict[str, Any]:
         """
-        Run the agent loop. The mediator will decide which tool to call next based on context and tool metadata.
+        Run the agent loop. The mediator will decide which tool(s) to call next based on context and tool metadata.
         Returns a trace with the sequence of steps and any outputs.
+        Built on run_stream(): the trace is the stream's step entries collected in order
+        (including the entries of earlier attempts when resuming `run_id`).
         """
-        logger.info("Starting dynamic agent for user_id=%s", user_id)
         trace: List[Dict[str, Any]] = []
-        step = 0
+        result: Dict[str, Any] = {"user_id": user_id, "trace": trace}
+        async for event in self.run_stream(user_id, initial_context, run_id=run_id):
+            if event["type"] in TRACE_EVENTS:
+                trace.append({k: v for k, v in event.items() if k != "type"})
+            elif event["type"] == "resume":
+                trace.extend(event["trace"])
+            elif event["type"] == "run_end":
+                result.update(run_id=event["run_id"], prompt_tokens=event["prompt_tokens"],
+                              mediator_calls=event["mediator_calls"], finished_at=event["finished_at"])
+        return result
+
+    async def run_stream(self, user_id: int, initial_context: Optional[Dict[str, Any]] = None,
+                         run_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run the agent loop, yielding an event dict as each thing happens:
+
+            run_start   -> {"user_id", "mode", "run_id"}
+            resume      -> {"run_id", "step", "trace", "finished"}  (run_id had checkpoints; trace so far)
+            decision    -> {"step", "instruction", "prompt_tokens"}  (step mode: mediator chose the next action)
+            plan        -> {"step", "plan", "prompt_tokens"}  (plan mode: one per (re)plan)
+            tool_start  -> {"step", "tool", "args"}  (+ "node" in plan mode)
+            tool_delta  -> {"step", "tool", "phase", "text"}  (partial output of streaming tools)
+            tool_end    -> {"step", "tool", "args", "result"}
+            tool_error  -> {"step", "tool", "error"}
+            error       -> {"step", "error"}  (mediator failure, bad instruction/plan, max steps)
+            done        -> {"step", "action": "done", "reason"}
+            run_end     -> {"user_id", "run_id", "prompt_tokens", "mediator_calls", "finished_at"}
+
+        Concurrent tool calls emit tool_end as each one finishes. Closing the generator
+        early (e.g. the client disconnected) cancels any tool calls still running.
+        Passing the run_id of a checkpointed run resumes it after its last completed step.
+        """
+        saved = None
+        if run_id is not None and self.checkpointer is not None:
+            saved = await self.checkpointer.load(run_id)
 
         # Base context (the mediator and tools will use this)
         context: Dict[str, Any] = initial_context.copy() if initial_context else {}
         context.setdefault("user_id", user_id)
         context.setdefault("profile", None)
         context.setdefault("tools_called", [])
+        run = AgentRun(run_id or uuid.uuid4().hex, user_id, context,
+                       ContextManager(token_budget=self.context_token_budget))
+
+        logger.info("Starting dynamic agent for user_id=%s (%s mode, run %s)", user_id, self.mode, run.run_id)
+        yield {"type": "run_start", "user_id": user_id, "mode": self.mode, "run_id": run.run_id}
+        if saved is not None:
+            run.restore(saved["state"])
+            run.seq = saved["seq"]
+            logger.info("Resuming run %s after step %d", run.run_id, run.step)
+            yield {"type": "resume", "run_id": run.run_id, "step": run.step, "trace": saved["trace"],
+                   "finished": saved["finished"]}
+
+        # A finished run is only replayed: it was counted when it ran
+        if saved is None or not saved["finished"]:
+            outcome = "cancelled"
+            RUNS_IN_FLIGHT.labels(mode=self.mode).inc()
+            try:
+                loop = self._run_plan if self.mode == "plan" else self._run_steps
+                async for event in loop(run):
+                    if event["type"] in TRACE_EVENTS:
+                        run.pending_trace.append({k: v for k, v in event.items() if k != "type"})
+                        if event["type"] in ("done", "error"):
+                            outcome = event["type"]
+                    yield event
+            finally:
+                RUNS_IN_FLIGHT.labels(mode=self.mode).dec()
+                RUNS.labels(mode=self.mode, outcome=outcome).inc()
 
-        # Build tool metadata list for mediator (name + description + input schema hint)
-        available_tools_meta = [
-            {"name": tname, "description": getattr(tool, "description", "")} for tname, tool in self.tool_registry.items()
-        ]
-
-        while step < self.max_steps:
-            step += 1
+        logger.info("Agent run completed for user_id=%s", user_id)
+        yield {
+            "type": "run_end",
+            "user_id": user_id,
+            "run_id": run.run_id,
+            "prompt_tokens": run.prompt_tokens,
+            "mediator_calls": len(run.prompt_tokens),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    async def _checkpoint(self, run: AgentRun, finished: bool = False) -> None:
+        if self.checkpointer is None:
+            run.pending_trace.clear()
+            return
+        # Round-trip through JSON so the stored state is exactly what a resume will see
+        state = json.loads(ContextManager.serialize(run.state()))
+        trace = json.loads(ContextManager.serialize(run.pending_trace))
+        try:
+            await self.checkpointer.save(run_id=run.run_id, seq=run.seq + 1, step=run.step, state=state,
+                                         trace=trace, finished=finished, user_id=run.user_id, mode=self.mode)
+        except Exception as e:
+            # Keep running; the unsaved trace goes out with the next checkpoint
+            logger.error("Saving checkpoint %d of run %s failed: %s", run.seq + 1, run.run_id, e)
+            return
+        run.seq += 1
+        run.pending_trace.clear()
+
+    def _mediator_view(self, run: AgentRun) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        # Tool metadata for the mediator (name + description + args), precomputed by the registry
+        available_tools_meta = self.tool_registry.meta()
+        tools_tokens = self.tool_registry.meta_tokens
+        view = run.context_manager.view(run.context, reserved_tokens=tools_tokens)
+        run.prompt_tokens.append(ContextManager.estimate_tokens(view) + tools_tokens)
+        logger.info("Mediator prompt size: ~%d tokens (budget %d)", run.prompt_tokens[-1], self.context_token_budget)
+        return view, available_tools_meta
+
+    async def _run_steps(self, run: AgentRun) -> AsyncIterator[Dict[str, Any]]:
+        context, context_manager = run.context, run.context_manager
+        while run.step < self.max_steps:
+            run.step += 1
+            step = run.step
             logger.info("Agent step %d/%d", step, self.max_steps)
+            view, available_tools_meta = self._mediator_view(run)
             try:
-                instruction = await self.mediator.decide(context=context, available_tools=available_tools_meta)
+                instruction = await self._timed_mediator(
+                    "decide", self.mediator.decide(context=view, available_tools=available_tools_meta))
             except Exception as e:
                 logger.exception("Mediator failed to decide: %s", e)
-                trace.append({"step": step, "error": f"mediator_exception: {e}"})
+                yield {"type": "error", "step": step, "error": f"mediator_exception: {e}"}
                 break
 
             # Validate instruction (should already be validated by mediator, but double-check)
@@ -138,62 +438,272 @@ class DynamicAgentOrchestrator:
                     instruction = ActionInstruction.model_validate(instruction)
                 except ValidationError as ve: 
                     logger.error("Invalid instruction returned by mediator: %s", ve)
-                    trace.append({"step": step, "error": f"invalid_instruction: {ve}"})
+                    yield {"type": "error", "step": step, "error": f"invalid_instruction: {ve}"}
                     break
 
             logger.info("Mediator instruction: %s", instruction.model_dump_json())
+            yield {"type": "decision", "step": step, "instruction": instruction.model_dump(),
+                   "prompt_tokens": run.prompt_tokens[-1]}
             if instruction.action == "done":
-                trace.append({"step": step, "action": "done", "reason": instruction.reason})
+                yield {"type": "done", "step": step, "action": "done", "reason": instruction.reason}
                 logger.info("Agent finished: %s", instruction.reason)
+                await self._checkpoint(run, finished=True)
                 break
 
-            if instruction.action != "call_tool" or not instruction.tool:
-                trace.append({"step": step, "error": "unsupported_action_or_missing_tool"})
+            calls = instruction.tool_calls()
+            if not calls:
+                yield {"type": "error", "step": step, "error": "unsupported_action_or_missing_tool"}
                 logger.error("Unsupported action or missing tool in instruction.")
                 break
 
-            tool_name = instruction.tool
-            if tool_name not in self.tool_registry:
-                trace.append({"step": step, "error": f"unknown_tool:{tool_name}"})
-                logger.error("Unknown tool requested: %s", tool_name)
+            unknown = [call.tool for call in calls if call.tool not in self.tool_registry]
+            if unknown:
+                yield {"type": "error", "step": step, "error": f"unknown_tool:{','.join(unknown)}"}
+                logger.error("Unknown tool requested: %s", unknown)
                 break
 
-            tool = self.tool_registry[tool_name]
             # Record in context who was called
-            context["tools_called"].append({"tool": tool_name, "args": instruction.args, "timestamp": datetime.now(timezone.utc).isoformat()})
-
-            # Run the tool (support arun/run; with timeout & error handling)
+            for call in calls:
+                context["tools_called"].append({"tool": call.tool, "args": call.args, "timestamp": datetime.now(timezone.utc).isoformat()})
+
+            # Independent calls in one instruction run concurrently; results are merged in call order.
+            # Each call reports its streamed output ("delta") and its outcome ("end") on one queue.
+            updates: asyncio.Queue = asyncio.Queue()
+            tasks: List[asyncio.Task] = []
+            for index, call in enumerate(calls):
+                yield {"type": "tool_start", "step": step, "tool": call.tool, "args": call.args}
+                tasks.append(self._spawn_call(index, call.tool, call.args, context_manager, updates))
+            outcomes: List[Tuple[Any, Optional[str]]] = [(None, None)] * len(calls)
             try:
-                if hasattr(tool, "arun"):
-                    tool_result = await asyncio.wait_for(tool.arun(**instruction.args), timeout=30)
-                else:
-                    tool_result = await asyncio.wait_for(tool.run(**instruction.args), timeout=30)
-                trace_entry = {"step": step, "tool": tool_name, "args": instruction.args, "result": tool_result}
-                trace.append(trace_entry)
-                # Merge tool_result into context for next decision
-                context.setdefault("tool_outputs", []).append({tool_name: tool_result})
-                # Optionally: collapse some outputs into top-level fields for ease
-                if tool_name == "profile" and isinstance(tool_result, dict):
-                    context["profile"] = tool_result.get("profile") or tool_result
-                # Collect analyses if present
-                if isinstance(tool_result, dict) and "analysis" in tool_result:
-                    context.setdefault("analyses", {})[tool_name] = tool_result["analysis"]
-            except asyncio.TimeoutError:
-                logger.error("Tool %s timed out", tool_name)
-                trace.append({"step": step, "tool": tool_name, "error": "timeout"})
-            except Exception as e:
-                logger.exception("Tool %s raised exception: %s", tool_name, e)
-                trace.append({"step": step, "tool": tool_name, "error": str(e)})
+                running = len(calls)
+                while running:
+                    kind, index, payload = await updates.get()
+                    call = calls[index]
+                    if kind == "delta":
+                        yield {**payload, "type": "tool_delta", "step": step, "tool": call.tool}
+                        continue
+                    running -= 1
+                    tool_result, error = outcomes[index] = payload
+                    if error is not None:
+                        yield {"type": "tool_error", "step": step, "tool": call.tool, "error": error}
+                    else:
+                        yield {"type": "tool_end", "step": step, "tool": call.tool, "args": call.args,
+                               "result": tool_result}
+            finally:
+                for task in tasks:
+                    task.cancel()
+            for call, (tool_result, error) in zip(calls, outcomes):
+                if error is None:
+                    self._merge_result(context, call.tool, tool_result, context_manager)
+            await self._checkpoint(run)
 
         else:
             # If loop completes without break
             logger.warning("Max steps reached without 'done' action.")
-            trace.append({"step": step, "error": "max_steps_reached"})
+            yield {"type": "error", "step": run.step, "error": "max_steps_reached"}
+
+    async def _run_plan(self, run: AgentRun) -> AsyncIterator[Dict[str, Any]]:
+        while True:
+            if run.plan is None:
+                if run.step > self.max_replans:
+                    yield {"type": "error", "step": run.step, "error": "plan_failed"}
+                    return
+                run.step += 1
+                step = run.step
+                view, available_tools_meta = self._mediator_view(run)
+                if run.failures:
+                    view["plan_failures"] = run.failures
+                    view["completed_nodes"] = sorted(run.completed)
+                try:
+                    plan = await self._timed_mediator(
+                        "plan", self.mediator.plan(context=view, available_tools=available_tools_meta))
+                    if not isinstance(plan, ExecutionPlan):
+                        plan = ExecutionPlan.model_validate(plan)
+                except Exception as e:
+                    logger.exception("Mediator failed to plan: %s", e)
+                    yield {"type": "error", "step": step, "error": f"mediator_exception: {e}"}
+                    return
+
+                logger.info("Mediator plan: %s", plan.model_dump_json())
+                yield {"type": "plan", "step": step, "plan": plan.model_dump(), "prompt_tokens": run.prompt_tokens[-1]}
+                problem = plan.problem(self.tool_registry, run.context_manager.names(), max_nodes=self.max_steps)
+                if problem is not None:
+                    logger.error("Invalid plan: %s", problem)
+                    run.failures = [{"error": f"invalid_plan: {problem}"}]
+                    yield {"type": "error", "step": step, "error": f"invalid_plan: {problem}"}
+                    continue
+                run.plan, run.plan_done, run.failures = plan, set(), []
+                await self._checkpoint(run)
+
+            async for event in self._execute_plan(run):
+                yield event
+            if not run.failures:
+                yield {"type": "done", "step": run.step, "action": "done", "reason": run.plan.reason or "plan completed"}
+                logger.info("Agent finished plan: %s", run.plan.reason)
+                await self._checkpoint(run, finished=True)
+                return
+            logger.warning("Plan %d had %d failed node(s)", run.step, len(run.failures))
+            # A resume from here re-plans instead of retrying this plan
+            run.plan = None
+            await self._checkpoint(run)
+
+    async def _execute_plan(self, run: AgentRun) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run the current plan: every node starts as soon as the nodes it depends on have
+        succeeded. Nodes downstream of a failure are skipped. Failures go to `run.failures`.
+        Nodes that already succeeded (resumed run) are not run again.
+        """
+        step, plan, context, context_manager = run.step, run.plan, run.context, run.context_manager
+        nodes = {node.id: node for node in plan.nodes}
+        dependencies = plan.dependencies()
+        waiting = [node_id for node_id in plan.order() if node_id not in run.plan_done]
+        run.failures = []
+        failed: Set[str] = set()
+        updates: asyncio.Queue = asyncio.Queue()
+        tasks: List[asyncio.Task] = []
+        running = 0
+        try:
+            while True:
+                # Dependency order, so a skip cascades to its dependents within one pass
+                for node_id in list(waiting):
+                    node, deps = nodes[node_id], dependencies[node_id]
+                    if deps & failed:
+                        waiting.remove(node_id)
+                        failed.add(node_id)
+                        error = f"skipped: dependency {','.join(sorted(deps & failed))} failed"
+                        run.failures.append({"node": node_id, "tool": node.tool, "error": error})
+                        yield {"type": "tool_error", "step": step, "node": node_id, "tool": node.tool, "error": error}
+                    elif deps <= run.plan_done:
+                        waiting.remove(node_id)
+                        context["tools_called"].append({"tool": node.tool, "args": node.args, "timestamp": datetime.now(timezone.utc).isoformat()})
+                        yield {"type": "tool_start", "step": step, "node": node_id, "tool": node.tool, "args": node.args}
+                        tasks.append(self._spawn_call(node_id, node.tool, node.args, context_manager, updates))
+                        running += 1
+                if not running:
+                    break
 
-        result = {"user_id": user_id, "trace": trace, "finished_at": datetime.now(timezone.utc).isoformat()}
-        logger.info("Agent run completed for user_id=%s", user_id)
+                kind, node_id, payload = await updates.get()
+                node = nodes[node_id]
+                if kind == "delta":
+                    yield {**payload, "type": "tool_delta", "step": step, "node": node_id, "tool": node.tool}
+                    continue
+                running -= 1
+                tool_result, error = payload
+                if error is not None:
+                    failed.add(node_id)
+                    run.failures.append({"node": node_id, "tool": node.tool, "error": error})
+                    yield {"type": "tool_error", "step": step, "node": node_id, "tool": node.tool, "error": error}
+                    continue
+                ref = self._merge_result(context, node.tool, tool_result, context_manager)
+                # Later nodes (and re-plans) refer to this output by node id
+                context_manager.alias(node_id, ref)
+                run.completed.add(node_id)
+                run.plan_done.add(node_id)
+                yield {"type": "tool_end", "step": step, "node": node_id, "tool": node.tool, "args": node.args,
+                       "result": tool_result}
+                await self._checkpoint(run)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    async def _timed_mediator(kind: str, call: Awaitable[Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            return await call
+        except asyncio.TimeoutError:
+            MEDIATOR_ERRORS.labels(kind=kind, reason="timeout").inc()
+            raise
+        except Exception:
+            MEDIATOR_ERRORS.labels(kind=kind, reason="error").inc()
+            raise
+        finally:
+            MEDIATOR_SECONDS.labels(kind=kind).observe(time.perf_counter() - started)
+
+    def _spawn_call(self, key: Any, tool_name: str, args: Dict[str, Any], context_manager: ContextManager,
+                    updates: asyncio.Queue) -> asyncio.Task:
+        """Start a tool call that reports ("delta", key, event) updates and one ("end", key, outcome)."""
+        async def run_call() -> None:
+            # The loop waits for one "end" per call, so it is posted even if the call itself blows up
+            outcome: Tuple[Any, Optional[str]] = (None, "cancelled")
+            try:
+                outcome = await self._call_tool(
+                    tool_name, args, context_manager,
+                    on_delta=lambda delta: updates.put_nowait(("delta", key, delta)),
+                )
+            except Exception as e:
+                logger.exception("Tool call %s failed: %s", tool_name, e)
+                outcome = None, str(e)
+            finally:
+                updates.put_nowait(("end", key, outcome))
+
+        return asyncio.create_task(run_call())
+
+    async def _call_tool(self, tool_name: str, args: Dict[str, Any], context_manager: ContextManager,
+                         on_delta: Optional[Callable[[Dict[str, Any]], None]] = None) -> Tuple[Any, Optional[str]]:
+        """
+        Run one tool (support astream/arun/run; with timeout & error handling).
+        Output references in args are resolved to the stored outputs first, then the args are
+        validated against the tool's input model; invalid args fail without calling the tool.
+        Tools with `astream` (e.g. content) stream partial output to `on_delta` when given;
+        LangChain tools (Runnables, which have `invoke`) are skipped there, their astream(input) means something else.
+        Returns (result, None) on success or (None, error) on failure.
+        """
+        tool = self.tool_registry[tool_name]
+        try:
+            args = self.tool_registry.validate(tool_name, context_manager.resolve(args))
+        except Exception as e:
+            # InvalidToolArgs, or a $ref that does not resolve (unknown output, bad path/index, non-string ref)
+            logger.error("Rejected args for tool %s: %s", tool_name, e)
+            TOOL_INVALID_ARGS.labels(tool=tool_name).inc()
+            return None, f"invalid_args: {e}"
+        started = time.perf_counter()
+        TOOLS_IN_FLIGHT.labels(tool=tool_name).inc()
+        try:
+            if on_delta is not None and hasattr(tool, "astream") and not hasattr(tool, "invoke"):
+                call = self._consume_stream(tool.astream(**args), on_delta)
+            elif hasattr(tool, "arun"):
+                call = tool.arun(**args)
+            else:
+                call = tool.run(**args)
+            return await asyncio.wait_for(call, timeout=self.tool_timeout), None
+        except asyncio.TimeoutError:
+            logger.error("Tool %s timed out", tool_name)
+            TOOL_TIMEOUTS.labels(tool=tool_name).inc()
+            return None, "timeout"
+        except Exception as e:
+            logger.exception("Tool %s raised exception: %s", tool_name, e)
+            TOOL_ERRORS.labels(tool=tool_name).inc()
+            return None, str(e)
+        finally:
+            TOOLS_IN_FLIGHT.labels(tool=tool_name).dec()
+            TOOL_SECONDS.labels(tool=tool_name).observe(time.perf_counter() - started)
+
+    @staticmethod
+    async def _consume_stream(stream: AsyncIterator[Dict[str, Any]],
+                              on_delta: Callable[[Dict[str, Any]], None]) -> Any:
+        # Forward partial events; the stream's final {"type": "result"} event is the tool result
+        result = None
+        async for event in stream:
+            if event.get("type") == "result":
+                result = event["result"]
+            else:
+                on_delta({k: v for k, v in event.items() if k != "type"})
         return result
 
+    @staticmethod
+    def _merge_result(context: Dict[str, Any], tool_name: str, tool_result: Any,
+                      context_manager: ContextManager) -> str:
+        # Store tool_result out-of-band; the context keeps a compact entry for the next decision
+        ref = context_manager.record(context, tool_name, tool_result)
+        # Optionally: collapse some outputs into top-level fields for ease
+        if tool_name == "profile" and isinstance(tool_result, dict):
+            context["profile"] = tool_result.get("profile") or tool_result
+        # Collect analyses if present
+        if isinstance(tool_result, dict) and "analysis" in tool_result:
+            context.setdefault("analyses", {})[tool_name] = tool_result["analysis"]
+        return ref
+
 
 # -------------------------
 # Example: Rule-based mediator (fallback for dev/testing)
@@ -206,6 +716,7 @@ class RuleBasedMediator:
       3) call content
       4) call scheduler (or done)
     This exists so you can test the dynamic orchestrator without wiring an LLM.
+    plan() returns the same sequence as an ExecutionPlan for plan mode.
     """
     def __init__(self, auto_publish: bool = False):
         self.auto_publish = auto_publish
@@ -232,18 +743,37 @@ class RuleBasedMediator:
         # Done
         return ActionInstruction(action="done", reason="All core tasks completed.")
 
+    async def plan(self, context: Dict[str, Any], available_tools: List[Dict[str, Any]]) -> ExecutionPlan:
+        # The same sequence as one DAG: research and content both only need the profile
+        schedule_args = {"publish_now": True} if self.auto_publish else {"publish_now": False, "schedule_time": None}
+        return ExecutionPlan(
+            nodes=[
+                PlanNode(id="profile", tool="profile", args={"user_id": context["user_id"]}),
+                PlanNode(id="research", tool="research",
+                         args={"industry_keywords": {REF_KEY: "profile.skills"}, "limit": 3}),
+                PlanNode(id="content", tool="content",
+                         args={"instruction": "Create a 3-5 sentence LinkedIn post.", "profile": {REF_KEY: "profile"}}),
+                PlanNode(id="scheduler", tool="scheduler", args=schedule_args, depends_on=["content"]),
+            ],
+            reason="All core tasks completed.",
+        )
+
 
 # -------------------------
 # Dummy Tool Implementations (for local testing)
 # -------------------------
+# `latency` is the simulated API/LLM time per call in seconds (0 to measure pure orchestrator overhead)
 class DummyProfileTool:
     name = "profile"
     description = "Fetch and analyze LinkedIn profile for a user."
 
-    async def run(self, user_id: str) -> Dict[str, Any]:
+    def __init__(self, latency: float = 0.1):
+        self.latency = latency
+
+    async def run(self, user_id: Any) -> Dict[str, Any]:
         # Simulate an API call
-        await asyncio.sleep(0.1)
-        profile = Profile(user_id=user_id, name="Aditya Rawat", headline="ML Engineer", skills=["ML", "NLP", "Python"], raw={"mocked": True})
+        await asyncio.sleep(self.latency)
+        profile = Profile(user_id=str(user_id), name="Aditya Rawat", headline="ML Engineer", skills=["ML", "NLP", "Python"], raw={"mocked": True})
         return profile.model_dump()  # Pydantic -> dict
 
 
@@ -251,8 +781,11 @@ class DummyResearchTool:
     name = "research"
     description = "Fetch the top trending topics given keywords."
 
+    def __init__(self, latency: float = 0.1):
+        self.latency = latency
+
     async def run(self, industry_keywords: List[str], limit: int = 3) -> Dict[str, Any]:
-        await asyncio.sleep(0.1)
+        await asyncio.sleep(self.latency)
         trends = [Trend(title=f"Trend: {kw}", summary="Short summary", source="NewsAPI").model_dump() for kw in industry_keywords[:limit] or ["ai", "ml", "nlp"]]
         return {"trends": trends}
 
@@ -261,8 +794,11 @@ class DummyContentTool:
     name = "content"
     description = "Generate a LinkedIn post text using LLM."
 
+    def __init__(self, latency: float = 0.1):
+        self.latency = latency
+
     async def run(self, profile: Dict[str, Any], instruction: str = "") -> Dict[str, Any]:
-        await asyncio.sleep(0.1)
+        await asyncio.sleep(self.latency)
         pname = profile.get("name", "User")
         trends = profile.get("skills", [])[:2]
         text = f"{pname}: Sharing thoughts on {', '.join(trends)}. {instruction}"
@@ -274,8 +810,11 @@ class DummySchedulerTool:
     name = "scheduler"
     description = "Schedule or publish a post to LinkedIn."
 
+    def __init__(self, latency: float = 0.1):
+        self.latency = latency
+
     async def run(self, publish_now: bool = False, schedule_time: Optional[str] = None) -> Dict[str, Any]:
-        await asyncio.sleep(0.1)
+        await asyncio.sleep(self.latency)
         if publish_now:
             # simulate publish
             return {"published": True, "post_id": "linkedin-post-123"}
@@ -283,17 +822,22 @@ class DummySchedulerTool:
         return {"scheduled": True, "scheduled_for": schedule_time or "tomorrow 9AM"}
 
 
+def dummy_tools(latency: float = 0.1) -> Dict[str, ToolProtocol]:
+    """Registry of the dummy tools, each simulating `latency` seconds per call."""
+    return {
+        "profile": DummyProfileTool(latency),
+        "research": DummyResearchTool(latency),
+        "content": DummyContentTool(latency),
+        "scheduler": DummySchedulerTool(latency),
+    }
+
+
 # -------------------------
 # Quick demo usage
 # -------------------------
 async def _demo():
     # Register tools
-    tools = {
-        "profile": DummyProfileTool(),
-        "research": DummyResearchTool(),
-        "content": DummyContentTool(),
-        "scheduler": DummySchedulerTool(),
-    }
+    tools = dummy_tools()
 
     mediator = RuleBasedMediator(auto_publish=False)
     orchestrator = DynamicAgentOrchestrator(mediator=mediator, tool_registry=tools, max_steps=8)
@@ -307,10 +851,10 @@ if __name__ == "__main__":
     asyncio.run(_demo())
 
 # Example: Running the agent with real tools (commented out)
-# from .tool_registry import load_real_tools
+# from .tool_registry import load_tools
 #
 # async def run_real_agent():
-#     tools = load_real_tools()
+#     tools = load_tools(linkedin_api=linkedin_api, research_api=research_api, llm=llm)
 #     agent = OrchestratorAgent(tools=tools)
 #     # Example input, replace with real data
 #     input_data = {
@@ -1,33 +1,191 @@
-from typing import Dict
-
-from ..tools.profile_tool import ProfileScrapTool
-from ..tools.content_tool import ContentTool
-from ..tools.research_tool import ResearchTool
-from ..tools.scheduler_tool import SchedulerTool
-from ..tools.timer_tool import TimerTool
-from ..tools.publisher_tool import PublisherTool
-# from ..tools.analytics_tool import AnalysisTool
-
-
-# Example: Dependency injection for real tools (commented out)
-# from ..llm import llm
-# from ..integrations.linkedin_api import linkedin_api
-# from ..integrations.research_api import research_api
-
-# def load_real_tools() -> Dict[str, object]:
-#     tools = {}
-#     tools["profile"] = ProfileScrapTool(linkedin_api=linkedin_api, llm=llm)
-#     tools["content"] = ContentTool(llm=llm)
-#     tools["research"] = ResearchTool(research_api=research_api, llm=llm)
-#     tools["scheduler"] = SchedulerTool()
-#     tools["timer"] = TimerTool()
-#     tools["publisher"] = PublisherTool(linkedin_api=linkedin_api)
-#     # tools["analytics"] = AnalyticsTool(...)  # When implemented
-#     return tools
-
-def load_tools() -> Dict[str, object]:
-    tools = {}
-    for tool_cls in [ProfileScrapTool, ContentTool, ResearchTool, SchedulerTool, TimerTool, PublisherTool]:
-        instance = tool_cls()
-        tools[instance.name] = instance
-    return tools
+'''
+Tool registry for the dynamic orchestrator.
+
+Each registered tool gets, once at registration:
+    - its input model: the tool's `args_schema` (pydantic model) or one derived from its run()/arun() signature
+    - the JSON schema of that model
+    - prompt-ready metadata for the mediator ({"name", "description", "args", "required"})
+Mediator-supplied args are validated against the (compiled, cached) input model before
+a tool is dispatched, so bad args fail immediately instead of inside the tool call.
+
+Tool modules are imported inside load_tools(), so importing the registry stays cheap.
+'''
+from __future__ import annotations
+import inspect
+import typing
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel, ConfigDict, ValidationError, create_model
+
+from .context import ContextManager
+
+
+class InvalidToolArgs(ValueError):
+    """Mediator-supplied args do not match the tool's input model."""
+
+
+# Input model, JSON schema and prompt args depend only on the tool class, so they are built once per class
+_class_specs: Dict[type, Tuple[Type[BaseModel], Dict[str, Any], Dict[str, str]]] = {}
+
+
+def _entrypoint(tool: Any) -> Any:
+    # The method the orchestrator dispatches to when not streaming (arun before run)
+    return getattr(tool, "arun", None) or getattr(tool, "run")
+
+
+def _class_spec(tool: Any) -> Tuple[Type[BaseModel], Dict[str, Any], Dict[str, str]]:
+    cls = type(tool)
+    cached = _class_specs.get(cls)
+    if cached is None:
+        model = getattr(tool, "args_schema", None)
+        if not (isinstance(model, type) and issubclass(model, BaseModel)):
+            model = _signature_model(cls.__name__, _entrypoint(tool))
+        schema = model.model_json_schema()
+        args = {arg: _type_hint(prop) for arg, prop in schema.get("properties", {}).items()}
+        cached = _class_specs[cls] = (model, schema, args)
+    return cached
+
+
+def input_model(tool: Any) -> Type[BaseModel]:
+    '''The pydantic model mediator args for `tool` are validated against.'''
+    return _class_spec(tool)[0]
+
+
+def _signature_model(name: str, func: Any) -> Type[BaseModel]:
+    try:
+        hints = typing.get_type_hints(func)
+    except Exception:
+        hints = {}
+    fields: Dict[str, Any] = {}
+    extra = "forbid"
+    for param in inspect.signature(func).parameters.values():
+        if param.kind is param.VAR_KEYWORD:
+            extra = "allow"
+            continue
+        if param.kind is param.VAR_POSITIONAL:
+            continue
+        default = ... if param.default is param.empty else param.default
+        fields[param.name] = (hints.get(param.name, Any), default)
+    return create_model(f"{name}Args", __config__=ConfigDict(extra=extra), **fields)
+
+
+def _type_hint(schema: Dict[str, Any]) -> str:
+    # Compact type name for prompts: "string", "integer|null", "array[string]", ...
+    if "anyOf" in schema:
+        return "|".join(_type_hint(option) for option in schema["anyOf"])
+    if "$ref" in schema:
+        return schema["$ref"].rsplit("/", 1)[-1]
+    if "enum" in schema:
+        return "|".join(map(str, schema["enum"]))
+    kind = schema.get("type", "any")
+    if kind == "array" and schema.get("items"):
+        return f"array[{_type_hint(schema['items'])}]"
+    return kind
+
+
+class ToolSpec:
+    def __init__(self, name: str, tool: Any):
+        self.name = name
+        self.tool = tool
+        self.description = getattr(tool, "description", "")
+        self.model, self.schema, args = _class_spec(tool)
+        self.meta = {
+            "name": name,
+            "description": self.description,
+            "args": args,
+            "required": self.schema.get("required", []),
+        }
+
+    def validate(self, args: Dict[str, Any]) -> BaseModel:
+        try:
+            return self.model.model_validate(args)
+        except ValidationError as e:
+            problems = "; ".join(f"{'.'.join(map(str, err['loc'])) or 'args'}: {err['msg']}" for err in e.errors())
+            raise InvalidToolArgs(f"{self.name}: {problems}") from None
+
+
+class ToolRegistry(Mapping):
+    """
+    Name -> tool mapping (usable wherever the orchestrator took a plain dict) that also
+    holds each tool's ToolSpec. `meta()` is the precomputed tool list for mediator prompts.
+    """
+
+    def __init__(self, tools: Union[Mapping, Iterable[Any]] = ()):
+        self._specs: Dict[str, ToolSpec] = {}
+        self._meta: List[Dict[str, Any]] = []
+        self.meta_tokens = 0
+        self.validated = 0
+        self.rejected = 0
+        items = tools.items() if isinstance(tools, Mapping) else ((tool.name, tool) for tool in tools)
+        for name, tool in items:
+            self.register(tool, name=name)
+
+    def register(self, tool: Any, name: Optional[str] = None) -> ToolSpec:
+        spec = ToolSpec(name or tool.name, tool)
+        self._specs[spec.name] = spec
+        self._meta = [s.meta for s in self._specs.values()]
+        self.meta_tokens = ContextManager.estimate_tokens(self._meta)
+        return spec
+
+    def __getitem__(self, name: str) -> Any:
+        return self._specs[name].tool
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._specs)
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def spec(self, name: str) -> ToolSpec:
+        return self._specs[name]
+
+    def meta(self) -> List[Dict[str, Any]]:
+        return self._meta
+
+    def validate(self, name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        '''
+        Validate `args` against the tool's input model and return the validated values
+        (coerced, e.g. "3" -> 3) of the args that were given, so the tool gets exactly
+        what passed validation. Raises InvalidToolArgs.
+        '''
+        try:
+            validated = self._specs[name].validate(args)
+        except InvalidToolArgs:
+            self.rejected += 1
+            raise
+        self.validated += 1
+        # Shallow: nested models stay models; defaults are left to the tool
+        return {field: getattr(validated, field) for field in validated.model_fields_set}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"tools": len(self._specs), "meta_tokens": self.meta_tokens,
+                "validated": self.validated, "rejected": self.rejected}
+
+
+def load_tools(linkedin_api: Any, research_api: Any, llm: Any, scheduler_engine: Any = None,
+               publisher: Any = None, research_cache_ttl: float = 900, content_mode: str = "two_step",
+               content_top_k: int = 3) -> ToolRegistry:
+    '''
+    Build the real tools with their dependencies injected.
+
+    `llm` is the pooled client factory (agent.llm.llm): profile and research call it per
+    prompt family, content gets the shared "content" client. Pass `publisher` to share
+    one PublisherTool (and its rate limit) with bulk publishing and the scheduler.
+    '''
+    from ..tools.content_tool import ContentTool
+    from ..tools.profile_tool import ProfileScrapTool
+    from ..tools.publisher_tool import PublisherTool
+    from ..tools.research_tool import ResearchTool
+    from ..tools.scheduler_tool import SchedulerTool
+    from ..tools.timer_tool import TimerTool
+    # from ..tools.analytics_tool import AnalyticsTool  # When implemented
+
+    return ToolRegistry([
+        ProfileScrapTool(linkedin_api=linkedin_api, llm=llm),
+        ResearchTool(research_api=research_api, llm=llm, cache_ttl=research_cache_ttl),
+        ContentTool(llm=llm(family="content"), mode=content_mode, top_k=content_top_k),
+        SchedulerTool(engine=scheduler_engine),
+        TimerTool(),
+        publisher or PublisherTool(linkedin_api=linkedin_api),
+    ])
@@ -33,3 +33,47 @@ def content_creation_prompt():
 
         Return only the textual content for the LinkedIn post.
     ''')
+
+def content_single_pass_prompt():
+    return PromptTemplate.from_template('''
+        You are a social media manager.
+        Based on the user's profile and trend analysis, select the best trend for the user
+        and create a LinkedIn post about it, in one go.
+
+        Here is the profile information:
+        {profile}
+
+        Here is the trend analysis:
+        {analysis}
+
+        Use analysis of the selected trend to inform your content creation.
+
+        - Make sure the content is engaging and relevant to the audience.
+        - Use a conversational tone and include relevant hashtags.
+        - Make it concise and impactful.
+
+        Return the selected trend, the textual content for the LinkedIn post, and a score
+        from 1 to 10 for how well the post fits the profile.
+    ''')
+
+def content_draft_prompt():
+    return PromptTemplate.from_template('''
+        You are a social media manager.
+        Create a LinkedIn post for the user about the given trend.
+
+        Here is the profile information:
+        {profile}
+
+        Here is the trend:
+        {trend}
+
+        Here is the trend analysis:
+        {analysis}
+
+        - Make sure the content is engaging and relevant to the audience.
+        - Use a conversational tone and include relevant hashtags.
+        - Make it concise and impactful.
+
+        Return the trend, the textual content for the LinkedIn post, and a score
+        from 1 to 10 for how well the post fits the profile.
+    ''')
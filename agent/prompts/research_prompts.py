@@ -13,15 +13,15 @@ def research_trends_prompt():
             - potential challenges and risks
 
         Return in Json format
-        {
+        {{
             "analysis":
-                { 
+                {{ 
                 "trend": 
-                    {
+                    {{
                     "future_growth_potential": "...",
                     "high_engagement_accounts": "...",
                     "potential_challenges_and_risks": "..."
-                    }
-                }
-        }
+                    }}
+                }}
+        }}
     ''')
\ No newline at end of file
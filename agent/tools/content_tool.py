@@ -3,26 +3,74 @@
 from .research_tool import ResearchToolOutput
 
 from pydantic import BaseModel, Field, AnyUrl
-from typing import Optional, List, Annotated, Any, Dict
+from typing import Optional, List, Annotated, Any, AsyncIterator, Dict, Literal, Tuple
+from collections import defaultdict, deque
 from langchain_core.output_parsers import StrOutputParser
+import asyncio
+import time
 
 from ..prompts.content_prompts import *
 from backend.db.models import UserProfile, Post  # assuming you have a UserProfile and Post model defined   
 # from ..llm import llm  # assuming you have an llm object somewhere
 
+CONTENT_MODES = ("two_step", "single", "speculative")
+
+
+class ContentDraft(BaseModel):
+    """Structured output of the single-call modes."""
+    selected_trend: str = Field(..., description="The trend the post is about")
+    content: str = Field(..., description="The textual content for the LinkedIn post")
+    score: int = Field(default=5, ge=1, le=10, description="How well the post fits the profile, 1 to 10")
+
+
+class ContentToolInput(BaseModel):
+    profile: Dict[str, Any] = Field(..., description="Profile dict (the profile tool's `profile` output)")
+    analysis: Any = Field(..., description="Research output or its analysis")
+    mode: Optional[Literal["two_step", "single", "speculative"]] = Field(default=None, description="Override of the tool's mode")
+    trends: Optional[List[Any]] = Field(default=None, description="Ranked trends for speculative mode")
+
+
+def _estimate_tokens(text: str) -> int:
+    # Same ~4 chars/token heuristic as ContextManager, for models that don't report usage
+    return len(text) // 4 + 1
+
+
+def _used_tokens(message: Any, prompt_text: str) -> int:
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        return usage.get("total_tokens", 0)
+    return _estimate_tokens(prompt_text) + _estimate_tokens(str(getattr(message, "content", "") or ""))
+
+
 # tools
 class ContentTool:
     name = "content"
     description = "Generate LinkedIn content from profile and research analysis."
+    args_schema = ContentToolInput
 
     '''
     Content creation tool for LinkedIn posts.
 
     This tool uses the user's profile and research data to generate relevant content.
+
+    Modes:
+        two_step    - pick the trend, then write the post (two LLM calls, post text streams token by token)
+        single      - pick the trend and write the post in one structured-output call
+        speculative - draft a post for each of the top-k researched trends concurrently and keep
+                      the best-scored one (falls back to single when fewer than two trends are known)
     '''
 
-    def __init__(self, llm):
+    def __init__(self, llm, mode: str = "two_step", top_k: int = 3):
+        if mode not in CONTENT_MODES:
+            raise ValueError(f"mode must be one of: {'|'.join(CONTENT_MODES)}")
         self.llm = llm
+        self.mode = mode
+        self.top_k = top_k
+        self.streams = 0
+        # Recent time-to-first-token samples (ms) for the post text
+        self._ttft_ms = deque(maxlen=256)
+        # Recent (latency_ms, tokens, llm_calls) per mode, for comparing modes
+        self._runs: Dict[str, deque] = defaultdict(lambda: deque(maxlen=256))
 
     async def run(self, **kwargs) -> Dict[str, Any]:
         '''
@@ -31,25 +79,158 @@ class ContentTool:
         Args in kwargs:
             profile: Profile dict
             analysis: Research analysis dict
+            mode: Optional override of the tool's mode
+            trends: Optional ranked trends for speculative mode (default: analysis["trends"])
 
         Returns :
             dict: {
                 "selected_trend": ...,
-                "content": ...
+                "content": ...,
+                "mode": ...,
+                "ttft_ms": ..., "latency_ms": ..., "tokens": ..., "llm_calls": ...
             }
         '''
+        result = None
+        async for event in self.astream(**kwargs):
+            if event["type"] == "result":
+                result = event["result"]
+        return result
+
+    async def astream(self, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        '''
+        Streaming version of run(); takes the same kwargs.
+
+        Yields {"type": "token", "phase": "trend" | "content", "text": ...} as the
+        LLM produces text, then one {"type": "result", "result": ...} with what run() returns.
+        The single-call modes yield the whole post as one content token.
+        '''
         profile = kwargs["profile"]
         analysis = kwargs["analysis"]
+        mode = kwargs.get("mode") or self.mode
+        if mode not in CONTENT_MODES:
+            raise ValueError(f"mode must be one of: {'|'.join(CONTENT_MODES)}")
+        self.streams += 1
+        started = time.perf_counter()
+
+        if mode == "two_step":
+            usage = {"tokens": 0}
+            # Step 1: Finalize the trend based on profile and analysis
+            parts: List[str] = []
+            async for chunk in self._astream_text(trend_finalize_prompt(),
+                                                  {'profile': profile, 'analysis': analysis}, usage):
+                parts.append(chunk)
+                yield {"type": "token", "phase": "trend", "text": chunk}
+            best_trend = "".join(parts)
+
+            # Step 2: Use the finalized trend for content creation
+            parts = []
+            content_started = time.perf_counter()
+            ttft_ms = None
+            async for chunk in self._astream_text(content_creation_prompt(),
+                                                  {'trend': best_trend, 'analysis': analysis}, usage):
+                if ttft_ms is None:
+                    ttft_ms = round((time.perf_counter() - content_started) * 1000, 1)
+                parts.append(chunk)
+                yield {"type": "token", "phase": "content", "text": chunk}
+            result = {'selected_trend': best_trend, 'content': "".join(parts), 'ttft_ms': ttft_ms,
+                      'tokens': usage["tokens"], 'llm_calls': 2}
+        else:
+            trends = self._candidate_trends(kwargs.get("trends") or analysis, self.top_k)
+            if mode == "speculative" and len(trends) > 1:
+                result = await self._speculative(profile, analysis, trends)
+            else:
+                mode = "single"
+                draft, tokens = await self._draft(content_single_pass_prompt(),
+                                                  {'profile': profile, 'analysis': analysis})
+                result = {'selected_trend': draft.selected_trend, 'content': draft.content,
+                          'tokens': tokens, 'llm_calls': 1}
+            result['ttft_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            yield {"type": "token", "phase": "content", "text": result['content']}
+
+        result['mode'] = mode
+        result['latency_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        if result['ttft_ms'] is not None:
+            self._ttft_ms.append(result['ttft_ms'])
+        self._runs[mode].append((result['latency_ms'], result['tokens'], result['llm_calls']))
+        yield {"type": "result", "result": result}
 
-        # Step 1: Finalize the trend based on profile and analysis
-        trend_chain = trend_finalize_prompt() | self.llm | StrOutputParser()
-        best_trend = await trend_chain.ainvoke({'profile': profile, 'analysis': analysis})
+    async def _astream_text(self, prompt, inputs: Dict[str, Any], usage: Dict[str, int]) -> AsyncIterator[str]:
+        # Stream message chunks (not parsed strings) so the final usage metadata is available
+        message = None
+        async for chunk in (prompt | self.llm).astream(inputs):
+            message = chunk if message is None else message + chunk
+            if chunk.content:
+                yield chunk.content
+        usage["tokens"] += _used_tokens(message, prompt.format(**inputs))
 
-        # Step 2: Use the finalized trend for content creation
-        content_chain = content_creation_prompt() | self.llm | StrOutputParser()
-        content = await content_chain.ainvoke({'trend': best_trend, 'analysis': analysis})
+    async def _draft(self, prompt, inputs: Dict[str, Any]) -> Tuple[ContentDraft, int]:
+        chain = prompt | self.llm.with_structured_output(ContentDraft, include_raw=True)
+        out = await chain.ainvoke(inputs)
+        if out.get("parsed") is None:
+            raise ValueError(f"content draft could not be parsed: {out.get('parsing_error')}")
+        return out["parsed"], _used_tokens(out.get("raw"), prompt.format(**inputs))
 
+    async def _speculative(self, profile: Any, analysis: Any, trends: List[str]) -> Dict[str, Any]:
+        outcomes = await asyncio.gather(
+            *(self._draft(content_draft_prompt(), {'profile': profile, 'trend': trend, 'analysis': analysis})
+              for trend in trends),
+            return_exceptions=True,
+        )
+        drafts = [outcome for outcome in outcomes if not isinstance(outcome, BaseException)]
+        if not drafts:
+            raise outcomes[0]
+        # Highest score wins; ties keep the higher-ranked trend
+        best, _ = max(drafts, key=lambda draft: draft[0].score)
+        return {
+            'selected_trend': best.selected_trend,
+            'content': best.content,
+            'tokens': sum(tokens for _, tokens in drafts),
+            'llm_calls': len(trends),
+            'candidates': [{'trend': draft.selected_trend, 'score': draft.score} for draft, _ in drafts],
+        }
+
+    @staticmethod
+    def _candidate_trends(source: Any, top_k: int) -> List[str]:
+        # Ranked trend titles, from a research output ({"trends": [...]}) or a plain list
+        trends = source.get("trends") if isinstance(source, dict) else source
+        if not isinstance(trends, list):
+            return []
+        titles = []
+        for trend in trends:
+            if isinstance(trend, dict):
+                trend = trend.get("title")
+            elif isinstance(trend, BaseModel):
+                trend = getattr(trend, "title", None)
+            if trend:
+                titles.append(str(trend))
+        return titles[:top_k]
+
+    def stats(self) -> Dict[str, Any]:
+        samples = sorted(self._ttft_ms)
+        modes = {}
+        for mode, runs in self._runs.items():
+            if runs:
+                modes[mode] = {
+                    "runs": len(runs),
+                    "latency_ms_avg": round(sum(r[0] for r in runs) / len(runs), 1),
+                    "tokens_avg": round(sum(r[1] for r in runs) / len(runs), 1),
+                    "llm_calls_avg": round(sum(r[2] for r in runs) / len(runs), 2),
+                }
+        # Each mode relative to the two-step path (< 1.0 means cheaper / faster)
+        baseline = modes.get("two_step")
+        vs_two_step = {
+            mode: {
+                "latency_ratio": round(m["latency_ms_avg"] / baseline["latency_ms_avg"], 3) if baseline["latency_ms_avg"] else None,
+                "tokens_ratio": round(m["tokens_avg"] / baseline["tokens_avg"], 3) if baseline["tokens_avg"] else None,
+            }
+            for mode, m in modes.items() if baseline and mode != "two_step"
+        }
         return {
-            'selected_trend': best_trend,
-            'content': content
+            "mode": self.mode,
+            "streams": self.streams,
+            "ttft_ms_last": self._ttft_ms[-1] if samples else None,
+            "ttft_ms_avg": round(sum(samples) / len(samples), 1) if samples else None,
+            "ttft_ms_p95": samples[int(0.95 * (len(samples) - 1))] if samples else None,
+            "modes": modes,
+            "vs_two_step": vs_two_step,
         }
@@ -1,7 +1,7 @@
 # profile_tool.py
 from __future__ import annotations
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 from datetime import datetime
 import os
 from dotenv import load_dotenv
@@ -21,6 +21,10 @@ from backend.db.models import UserProfile  # assuming you have a UserProfile mod
 load_dotenv()
 
 
+class ProfileToolInput(BaseModel):
+    user_id: Union[int, str] = Field(..., description="LinkedIn user ID")
+
+
 class ProfileScrapTool:
     """
     Dynamic-agent compatible LinkedIn profile fetch + analysis tool.
@@ -31,6 +35,7 @@ class ProfileScrapTool:
         "Fetches a LinkedIn profile for the given user_id and analyzes it "
         "to extract top keywords and activity level."
     )
+    args_schema = ProfileToolInput
 
     def __init__(self, linkedin_api, llm):
         self.linkedin_api = linkedin_api
@@ -64,7 +69,6 @@ class ProfileScrapTool:
             experience=data.get("experience"),
             skills=data.get("skills"),
             raw=data,
-            posts=data.get('posts')
         )
 
         # Step 2: Analyze profile
@@ -76,7 +80,8 @@ class ProfileScrapTool:
 
         # Step 3: Return combined result
         return {
-            "profile": profile.model_dump(),
+            # `posts` is an ORM relationship; keep the fetched posts as plain dicts
+            "profile": {**profile.model_dump(), "posts": data.get("posts") or []},
             "analysis": analysis,
         }
 
@@ -85,7 +90,7 @@ class ProfileScrapTool:
         Runs keyword extraction and activity level scoring using LLM prompts.
         """
         # Keyword extraction
-        keyword_chain = profile_keyword_analysis_prompt() | self.llm() | StrOutputParser()
+        keyword_chain = profile_keyword_analysis_prompt() | self.llm(family="profile") | StrOutputParser()
 
         keywords = await keyword_chain.ainvoke(
             {
@@ -109,7 +114,7 @@ class ProfileScrapTool:
             except ValueError:
                 recent_post_time = None
 
-        activity_chain = profile_activity_level_prompt() | self.llm() | StrOutputParser()
+        activity_chain = profile_activity_level_prompt() | self.llm(family="profile") | StrOutputParser()
 
         activity_level = await activity_chain.ainvoke(
             {
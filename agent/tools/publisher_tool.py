@@ -1,9 +1,19 @@
 from __future__ import annotations
+import asyncio
+import logging
+import time
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field, HttpUrl
 
+from .rate_limit import TokenBucket, backoff_delay
+
+logger = logging.getLogger("linkedin_dynamic_agent")
+
+# Upstream statuses worth retrying; anything else is a permanent failure for that item
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+
 
 class PublishRequest(BaseModel):
     user_id: str = Field(..., description="Owner of the content to publish")
@@ -20,11 +30,31 @@ class PublishResponse(BaseModel):
     published_at: str
 
 
+class PublishOutcome(BaseModel):
+    index: int
+    status: str = Field(..., description="published|failed")
+    attempts: int
+    response: Optional[PublishResponse] = None
+    error: Optional[str] = None
+
+
+class BulkPublishResult(BaseModel):
+    results: List[PublishOutcome]
+    published: int
+    failed: int
+    retries: int
+    rate_limited: int
+    elapsed_s: float
+    throughput_per_s: float
+
+
 class PublisherTool:
     name = "publisher"
     description = "Publish content to LinkedIn. Accepts text, optional media, visibility, and tags."
+    args_schema = PublishRequest
 
-    def __init__(self, linkedin_api):
+    def __init__(self, linkedin_api, rate_per_sec: float = 5, burst: int = 10,
+                 max_concurrency: int = 8, max_retries: int = 4):
         """
         linkedin_api: an injected client providing an async `publish_post(...)` API.
         Expected signature:
@@ -37,10 +67,21 @@ class PublisherTool:
             ) -> Dict[str, Any]  # returns {'post_id': '...', 'url': '...'}
         """
         self.linkedin_api = linkedin_api
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        # Shared by single and bulk publishes so every caller stays inside the upstream quota
+        self._bucket = TokenBucket(rate=rate_per_sec, capacity=burst)
+        self.counters = {"published": 0, "failed": 0, "retries": 0, "rate_limited": 0}
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "rate_per_sec": self._bucket.rate, "burst": self._bucket.capacity}
 
     async def run(self, **kwargs) -> Dict[str, Any]:
         req = PublishRequest(**kwargs)
+        await self._bucket.acquire()
+        return await self._publish(req)
 
+    async def _publish(self, req: PublishRequest) -> Dict[str, Any]:
         # Basic validation / normalization
         visibility = req.visibility.lower()
         if visibility not in {"public", "connections", "private"}:
@@ -55,7 +96,7 @@ class PublisherTool:
             tags=req.tags or [],
         )
 
-        post_id = api_res.get("post_id") or None
+        post_id = str(api_res["post_id"]) if api_res.get("post_id") is not None else None
         url = api_res.get("url") or None
 
         resp = PublishResponse(
@@ -64,4 +105,57 @@ class PublisherTool:
             status="published" if post_id else "unknown",
             published_at=datetime.now(timezone.utc).isoformat(),
         )
-        return resp.model_dump()
\ No newline at end of file
+        # JSON-safe (url as str): callers store it as is, e.g. in ScheduledJob.result
+        return resp.model_dump(mode="json")
+
+    async def run_bulk(self, requests: List[PublishRequest], max_concurrency: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Publish many posts with bounded concurrency under the token-bucket rate limit.
+        Transient failures (429/5xx, timeouts, connection errors) are retried with
+        jittered exponential backoff; every item gets its own outcome, in input order.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        batch = {"retries": 0, "rate_limited": 0}
+        started = time.perf_counter()
+
+        async def publish_one(index: int, req: PublishRequest) -> PublishOutcome:
+            async with semaphore:
+                attempt = 0
+                while True:
+                    attempt += 1
+                    await self._bucket.acquire()
+                    try:
+                        response = await self._publish(req)
+                        self.counters["published"] += 1
+                        return PublishOutcome(index=index, status="published", attempts=attempt,
+                                              response=PublishResponse(**response))
+                    except Exception as e:
+                        status_code = getattr(e, "status_code", None)
+                        if status_code == 429:
+                            batch["rate_limited"] += 1
+                            self.counters["rate_limited"] += 1
+                            retry_after = getattr(e, "retry_after", None)
+                            if retry_after:
+                                self._bucket.drain(float(retry_after))
+                        transient = status_code in TRANSIENT_STATUS_CODES or isinstance(
+                            e, (asyncio.TimeoutError, ConnectionError))
+                        if not transient or attempt > self.max_retries:
+                            self.counters["failed"] += 1
+                            logger.warning("Publishing item %d failed after %d attempt(s): %s", index, attempt, e)
+                            return PublishOutcome(index=index, status="failed", attempts=attempt, error=str(e))
+                        batch["retries"] += 1
+                        self.counters["retries"] += 1
+                        await asyncio.sleep(backoff_delay(attempt))
+
+        results = await asyncio.gather(*(publish_one(i, req) for i, req in enumerate(requests)))
+        elapsed = time.perf_counter() - started
+        published = sum(1 for r in results if r.status == "published")
+        return BulkPublishResult(
+            results=results,
+            published=published,
+            failed=len(results) - published,
+            retries=batch["retries"],
+            rate_limited=batch["rate_limited"],
+            elapsed_s=round(elapsed, 3),
+            throughput_per_s=round(published / elapsed, 2) if elapsed > 0 else 0.0,
+        ).model_dump(mode="json")
@@ -0,0 +1,42 @@
+from __future__ import annotations
+import asyncio
+import random
+import time
+
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter: `rate` tokens per second refill up to `capacity`
+    (the allowed burst). `acquire()` waits until a token is available. Waiters are
+    served one at a time, so a burst of callers is spread out at `rate` per second.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+    def drain(self, seconds: float) -> None:
+        """Stop handing out tokens for `seconds` (e.g. after an upstream 429 with Retry-After)."""
+        self._refill()
+        self._tokens = min(self._tokens, 0) - seconds * self.rate
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    '''Exponential backoff with full jitter for retry number `attempt` (1-based).'''
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
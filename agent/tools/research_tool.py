@@ -9,6 +9,7 @@ from typing import Optional, Dict, Any, List
 # ....
 
 from ..prompts.research_prompts import research_trends_prompt
+from .cache import SingleFlightCache
 
 class Trend(BaseModel):
     title: str = Field(..., description='Title of the trend')
@@ -55,11 +56,14 @@ class ResearchTool(BaseTool):
 
     _research_api: Any = PrivateAttr()
     _llm: Any = PrivateAttr()
+    _cache: SingleFlightCache = PrivateAttr()
 
-    def __init__(self, research_api, llm):
+    def __init__(self, research_api, llm, cache_ttl: float = 900):
         super().__init__()
         self._research_api = research_api
         self._llm = llm
+        # Keyed by field: concurrent runs for the same field share one fetch + one analysis
+        self._cache = SingleFlightCache(ttl=cache_ttl)
 
     async def arun(self, field: str) -> Dict[str, Any]:
         '''
@@ -72,12 +76,19 @@ class ResearchTool(BaseTool):
                 "analysis": {...analysis details...}
         }
         '''
+        key = " ".join(field.lower().split())
+        return await self._cache.get_or_load(key, lambda: self._research(field))
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+    async def _research(self, field: str) -> Dict[str, Any]:
         # Step 1: Fetch trends using the research API (list of dicts)
         trends = await self._research_api.fetch_trends(field)
 
         # Step 2: Analyze the fetched trends using the LLM
         prompt = research_trends_prompt()
-        trend_analysis_chain = prompt | self._llm().with_structured_output(AnalysisSchema)
+        trend_analysis_chain = prompt | self._llm(family="research").with_structured_output(AnalysisSchema)
         analysis = await trend_analysis_chain.ainvoke({"trends": trends})
 
         '''
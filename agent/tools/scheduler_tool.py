@@ -1,68 +1,111 @@
-from pydantic import BaseModel, Field
-from datetime import datetime, timedelta
+from pydantic import BaseModel, Field, field_validator
+from datetime import datetime, timedelta, timezone
 import random
 from typing import List, Dict, Any, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 
 class ScheduleRequest(BaseModel):
     content_id: str
     preferred_time: Optional[datetime] = None
     optimize: Optional[bool] = False
+    timezone: Optional[str] = Field(
+        default=None,
+        description="User's IANA time zone (e.g. Europe/Berlin): the zone of optimized peak hours "
+                    "and of a preferred_time without an offset. Defaults to UTC."
+    )
+    user_id: Optional[int] = Field(default=None, description="Owner; defaults to the post's user_id")
+    content: Optional[str] = Field(default=None, description="Text to publish; defaults to the post's content")
+
+    @field_validator("timezone")
+    def _validate_timezone(cls, v):
+        if v is not None:
+            try:
+                ZoneInfo(v)
+            except (ZoneInfoNotFoundError, ValueError):
+                raise ValueError(f"unknown time zone: {v}")
+        return v
+
+    def zone(self) -> ZoneInfo:
+        return ZoneInfo(self.timezone or "UTC")
 
 
 class ScheduleResponse(BaseModel):
     content_id: str
     scheduled_time: datetime
     status: str = Field(default="scheduled")
+    job_id: Optional[int] = None
 
 
 class SchedulerTool:
     name = "scheduler"
     description = "Schedule content posting at a specific or optimized time."
+    args_schema = ScheduleRequest
 
-    def __init__(self):
+    def __init__(self, engine=None):
+        """
+        engine: an optional SchedulerEngine (backend/services/scheduler_service.py).
+        With an engine, schedules are persisted and published when due; without one
+        they are only kept in memory (dev/testing).
+        """
+        self.engine = engine
         self.SCHEDULE_STORE: List[Dict] = []
 
     async def run(self, **kwargs) -> Dict[str, Any]:
         req = ScheduleRequest(**kwargs)
 
-        # Decide time
+        # Decide time (always stored as aware UTC; the engine would take a naive time as UTC)
         if req.optimize:
-            scheduled_time = await self._get_best_post_time()
+            scheduled_time = await self._get_best_post_time(req.zone())
         elif req.preferred_time:
-            scheduled_time = req.preferred_time
+            preferred = req.preferred_time
+            if preferred.tzinfo is None:
+                preferred = preferred.replace(tzinfo=req.zone())
+            scheduled_time = preferred.astimezone(timezone.utc)
         else:
             raise ValueError("Must provide preferred_time or set optimize=True")
 
         # Save to storage
-        await self._save_schedule(req.content_id, scheduled_time)
+        job_id = await self._save_schedule(req.content_id, scheduled_time, user_id=req.user_id, content=req.content)
 
         # Return response
         res = ScheduleResponse(
             content_id=req.content_id,
-            scheduled_time=scheduled_time
+            scheduled_time=scheduled_time,
+            job_id=job_id
         )
         return res.model_dump()
 
-    async def _get_best_post_time(self) -> datetime:
+    async def _get_best_post_time(self, zone: ZoneInfo = ZoneInfo("UTC")) -> datetime:
         """
         Simulate best post time selection based on past engagement data.
         Replace with real ML/statistical analysis later.
+        Peak hours are in the user's `zone`; the result is in UTC.
         """
         # Example: peak times: 10 AM, 6 PM
-        now = datetime.now()
+        now = datetime.now(zone)
         peak_hours = [10, 18]
         best_hour = random.choice(peak_hours)
         best_time = now.replace(hour=best_hour, minute=0, second=0, microsecond=0)
         if best_time < now:
             best_time += timedelta(days=1)
-        return best_time
+        return best_time.astimezone(timezone.utc)
 
-    async def _save_schedule(self, content_id: str, scheduled_time: datetime):
+    async def _save_schedule(self, content_id: str, scheduled_time: datetime,
+                             user_id: Optional[int] = None, content: Optional[str] = None) -> Optional[int]:
+        if self.engine is not None:
+            job = await self.engine.schedule(content_id, scheduled_time, user_id=user_id, content=content)
+            return job.job_id
         self.SCHEDULE_STORE.append({
             "content_id": content_id,
             "scheduled_time": scheduled_time
         })
+        return None
 
     async def _get_schedules(self) -> List[Dict]:
+        if self.engine is not None:
+            return [
+                {"content_id": job.content_id, "scheduled_time": job.due_at, "job_id": job.job_id}
+                for job in await self.engine.pending()
+            ]
         return self.SCHEDULE_STORE
@@ -27,6 +27,7 @@ class TimerResponse(BaseModel):
 class TimerTool:
     name = "timer"
     description = "Compute time remaining until a scheduled time; returns seconds and a human-readable string."
+    args_schema = TimerRequest
 
     async def run(self, **kwargs) -> Dict[str, Any]:
         req = TimerRequest(**kwargs)
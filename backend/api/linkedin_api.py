@@ -1,6 +1,14 @@
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timezone
 
+class LinkedInAPIError(Exception):
+    '''Upstream error; status_code 429 / 5xx are treated as transient by the publisher.'''
+    def __init__(self, message: str, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
 class linkedinapi:
     def __init__(self, api):
         self.api = api
@@ -1,8 +1,10 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from backend.db.models import UserProfile, Post, engine
+from backend.db.models import UserProfile, Post
+from backend.db.session import get_session
 from backend.api.routes.profile_utils_routes.util_functions import ProfileUtils
 
 router = APIRouter()
@@ -20,10 +22,10 @@ class UpdateProfileRequest(BaseModel):
         user_id (int): The ID of the user profile to delete.
 '''
 @router.delete('/delete/{user_id}')
-async def delete_user_profile(user_id: int):
+async def delete_user_profile(user_id: int, session: AsyncSession = Depends(get_session)):
     # Create an instance of ProfileUtils
     profile_utils = ProfileUtils()
-    return await profile_utils.delete_profile(user_id=user_id)
+    return await profile_utils.delete_profile(session, user_id=user_id)
 
 
 '''
@@ -39,9 +41,10 @@ async def delete_user_profile(user_id: int):
         User can update any of the fields in their profile.
 '''
 @router.put('/update/{user_id}')
-async def update_user_profile(user_id: int, req: UpdateProfileRequest):
+async def update_user_profile(user_id: int, req: UpdateProfileRequest, session: AsyncSession = Depends(get_session)):
     profile_utils = ProfileUtils()
     return await profile_utils.update_profile(
+        session,
         user_id=user_id,
         name=req.name,
         linkedin_url=req.linkedin_url,
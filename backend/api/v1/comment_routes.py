@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from typing import List, Optional
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.db.session import get_session
+from backend.services.comment_service import CommentNode, load_comment_tree
+
+router = APIRouter()
+
+
+class CommentThreadResponse(BaseModel):
+    post_id: int
+    comments: List[CommentNode]
+    next_offset: Optional[int] = None
+
+
+@router.get('/thread/{post_id}')
+async def get_comment_thread(
+    post_id: int,
+    max_depth: Optional[int] = Query(default=None, ge=0),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    session: AsyncSession = Depends(get_session),
+) -> CommentThreadResponse:
+    try:
+        comments = await load_comment_tree(session, post_id, max_depth=max_depth, limit=limit, offset=offset)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return CommentThreadResponse(
+        post_id=post_id,
+        comments=comments,
+        next_offset=offset + limit if len(comments) == limit else None,
+    )
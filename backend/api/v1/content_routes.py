@@ -1,12 +1,18 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from typing import Any, List, Dict, Optional
 from pydantic import BaseModel
 from datetime import datetime, timezone
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 
-from backend.db.models import Post, engine
-from backend.api.v1.profile_routes import show_profile, ProfileResponse
+from backend.db.models import Post
+from backend.db.session import get_session
+from backend.config import settings
+from backend.services.ingest import ndjson_rows
+from backend.services.pagination import InvalidCursor, keyset_page
+from backend.services.post_export_service import PostImporter, PostImportResult, export_posts
 
 router = APIRouter()
 
@@ -22,43 +28,79 @@ class ContentJSON(BaseModel):
     user_id: str
     message: str
     content: Optional[Dict[str, Post]]
+    next_cursor: Optional[str] = None
 
 @router.post('/delete_content/{content_id}')
-async def delete_content(content_id: int) -> Dict[str, Any]:
+async def delete_content(content_id: int, session: AsyncSession = Depends(get_session)) -> Dict[str, Any]:
     try:
-        # Simulate content deletion
-        with Session(engine) as session:
-            statement = select(Post).where(Post.post_id == content_id)
-            post = session.exec(statement).first()
-            if post:
-                session.delete(post)
-                session.commit()
-                session.close()
+        statement = select(Post).where(Post.post_id == content_id)
+        post = (await session.exec(statement)).first()
+        if post:
+            await session.delete(post)
+            await session.commit()
 
-                return {"status": "content deleted successfully",
-                        "message": f"Content with ID {content_id} deleted successfully"}                
-            else:
-                raise HTTPException(status_code=404, detail="Content not found")           
+            return {"status": "content deleted successfully",
+                    "message": f"Content with ID {content_id} deleted successfully"}                
+        else:
+            raise HTTPException(status_code=404, detail="Content not found")           
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))             
 
 
 @router.get('/fetch_content/{user_id}')
-async def fetch_content(user_id: str) -> ContentJSON:
+async def fetch_content(
+    user_id: int,
+    cursor: Optional[str] = Query(default=None, description="next_cursor of the previous page"),
+    limit: Optional[int] = Query(default=None, ge=1, le=settings.LISTING_MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_session),
+) -> ContentJSON:
+    '''A page of a user's posts, newest first; pass `next_cursor` back as `cursor` for the next page.'''
     try:
-        # Simulate fetching content
-        data = await show_profile(user_id)
-        if isinstance(data, ProfileResponse):
-            profile = data.profile if hasattr(data, 'profile') else None            
+        # Query the posts directly; relationship lazy loads are not available on async sessions
+        posts, next_cursor = await keyset_page(
+            session, select(Post).where(Post.user_id == user_id), Post.created_at, Post.post_id,
+            cursor=cursor, limit=limit or settings.LISTING_PAGE_SIZE, descending=True,
+        )
 
-            posts = profile.posts if profile else {}
+        data={
+            "user_id": str(user_id),
+            "message": "Content fetched successfully",
+            "content": {str(post.post_id): post for post in posts},
+            "next_cursor": next_cursor,
+        }
+        return ContentJSON(**data)
 
-            data={
-                "user_id": user_id,
-                "message": "Content fetched successfully",
-                "content": {str(i): Post(**post) for i, post in enumerate(posts)}
-            }
-            return ContentJSON(**data)
-        
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get('/export/{user_id}')
+async def export_content(
+    user_id: int,
+    include_comments: bool = Query(default=False),
+    chunk_size: int = Query(default=None, ge=1, le=10000),
+):
+    '''
+    Stream all of a user's posts (oldest first) as NDJSON, one post per line, optionally
+    with nested `comments` threads. Rows come from a server-side cursor in chunks, so
+    memory stays flat regardless of how many posts the user has.
+    '''
+    lines = export_posts(user_id, include_comments=include_comments,
+                         chunk_size=chunk_size or settings.POST_EXPORT_CHUNK_SIZE)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+@router.post('/import/{user_id}', response_model=PostImportResult)
+async def import_content(user_id: int, request: Request, session: AsyncSession = Depends(get_session)):
+    '''
+    Streaming import of NDJSON posts (the /export format; ids in it are ignored) for a
+    user. Lines are validated one by one and inserted in chunks; invalid lines are
+    reported by index and do not abort the import.
+    '''
+    importer = PostImporter(session, user_id, chunk_size=settings.POST_IMPORT_CHUNK_SIZE,
+                            max_errors=settings.INGEST_MAX_ERRORS)
+    return await importer.ingest(ndjson_rows(request.stream()))
@@ -1,18 +1,22 @@
-from fastapi import APIRouter
+import json
+from typing import List, Optional
 
-from agent.tools.profile_tool import ProfileScrapTool
-from agent.tools.content_tool import ContentTool
-from agent.tools.research_tool import ResearchTool
-from agent.tools.scheduler_tool import SchedulerTool
-from agent.tools.timer_tool import TimerTool
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from agent.orchestrator.tool_registry import ToolRegistry, load_tools
 from agent.tools.publisher_tool import PublisherTool
 from agent.tools.utils import humanize_timedelta, parse_datetime_like
 
-from backend.services.orchestrator_services import run_agent
+from backend.services.orchestrator_services import run_agent, run_agent_batch, run_until_disconnected, stream_agent
+from backend.services.scheduler_service import SchedulerEngine
+from backend.services.checkpoint_service import CheckpointStore
+from backend.db.session import async_session
 
 from backend.api.linkedin_api import linkedinapi
 from backend.api.research_api import researchapi
-from agent.llm import llm
+from backend.config import settings
 
 
 router = APIRouter()
@@ -21,31 +25,172 @@ router = APIRouter()
 _linkedin_client = linkedinapi(api='fake_api')
 _research_client = researchapi(api='fake_api')
 
-# Build tool registry with correct dependency types
-_tools = [
-    ProfileScrapTool(linkedin_api=_linkedin_client, llm=llm),  # llm as factory (not currently used)
-    ResearchTool(research_api=_research_client, llm=llm),      # expects llm factory
-    ContentTool(llm=llm()),                                    # expects llm instance
-    SchedulerTool(),
-    TimerTool(),
-    PublisherTool(linkedin_api=_linkedin_client),
-]
+# One publisher for agent runs, bulk publishes and the scheduler, so they share one rate limit
+publisher = PublisherTool(
+    linkedin_api=_linkedin_client,
+    rate_per_sec=settings.PUBLISH_RATE_PER_SEC,
+    burst=settings.PUBLISH_BURST,
+    max_concurrency=settings.PUBLISH_MAX_CONCURRENCY,
+    max_retries=settings.PUBLISH_MAX_RETRIES,
+)
 
-tools = {tool.name: tool for tool in _tools}
+# Durable scheduler: persisted jobs, published through the publisher tool when due
+scheduler_engine = SchedulerEngine(
+    session_factory=async_session,
+    publisher=publisher,
+    max_concurrency=settings.SCHEDULER_MAX_CONCURRENCY,
+    max_attempts=settings.SCHEDULER_MAX_ATTEMPTS,
+)
 
-available_tools = [{'name': name, 'description': getattr(tool, 'description', '')} for name, tool in tools.items()]
+# Durable agent-run checkpoints, so interrupted runs can be resumed by run_id
+checkpoint_store = CheckpointStore(
+    session_factory=async_session,
+    ttl=settings.CHECKPOINT_TTL,
+    gc_interval=settings.CHECKPOINT_GC_INTERVAL,
+)
 
-@router.post("/run")
-async def run(request_body: dict):
-    user_id = (request_body or {}).get('user_id') or None
-    payload = {
+# Tool registry, built on first use (or by the startup prewarm) rather than at import:
+# the LLM-backed tools pull in LangChain and build a chat client
+_tools: Optional[ToolRegistry] = None
+
+
+def get_tools() -> ToolRegistry:
+    global _tools
+    if _tools is None:
+        from agent.llm import llm
+
+        _tools = load_tools(
+            linkedin_api=_linkedin_client,
+            research_api=_research_client,
+            llm=llm,  # pooled client factory
+            scheduler_engine=scheduler_engine,
+            publisher=publisher,
+            research_cache_ttl=settings.RESEARCH_CACHE_TTL,
+            content_mode=settings.CONTENT_MODE,
+            content_top_k=settings.CONTENT_TOP_K,
+        )
+    return _tools
+
+
+class BatchRunRequest(BaseModel):
+    user_ids: List[int] = Field(..., min_length=1, max_length=settings.AGENT_BATCH_MAX_USERS)
+    concurrency: Optional[int] = Field(default=None, ge=1, le=256)
+
+
+def _payload(user_id, mode: Optional[str] = None, run_id: Optional[str] = None) -> dict:
+    from agent.llm import llm
+
+    tools = get_tools()
+    return {
         'context': {
             'user_id': user_id,
         },
         'tool_registry': tools,
         'llm': llm,
-        'available_tools': available_tools,
+        'available_tools': tools.meta(),
+        'mode': mode,
+        'checkpointer': checkpoint_store,
+        'run_id': run_id,
     }
-    response = await run_agent(payload)
+
+
+@router.post("/run")
+async def run(request_body: dict, request: Request):
+    request_body = request_body or {}
+    payload = _payload(request_body.get('user_id') or None, mode=request_body.get('mode'),
+                       run_id=request_body.get('run_id'))
+    response = await run_until_disconnected(request, run_agent(payload))
     return {"message": "Agent is running...", "response": response}
 
+
+@router.post("/resume/{run_id}")
+async def resume(run_id: str, request: Request):
+    '''
+        Resume a checkpointed run after its last completed step. Tool and mediator
+        work already checkpointed is not repeated; the response trace covers the whole run.
+        A run that already finished is not started again: its stored trace is returned.
+    '''
+    checkpoint = await checkpoint_store.load(run_id)
+    if checkpoint is None:
+        raise HTTPException(status_code=404, detail=f"No checkpoints for run {run_id}")
+    if checkpoint["finished"]:
+        prompt_tokens = checkpoint["state"].get("prompt_tokens", [])
+        response = {
+            "user_id": checkpoint["user_id"],
+            "trace": checkpoint["trace"],
+            "run_id": run_id,
+            "prompt_tokens": prompt_tokens,
+            "mediator_calls": len(prompt_tokens),
+            "finished_at": checkpoint["updated_at"],
+        }
+        return {"message": "Agent run already finished", "response": response}
+    payload = _payload(checkpoint["user_id"], mode=checkpoint["mode"], run_id=run_id)
+    response = await run_until_disconnected(request, run_agent(payload))
+    return {"message": "Agent resumed", "response": response}
+
+
+@router.get("/runs/{run_id}")
+async def get_run(run_id: str):
+    '''Latest checkpoint of a run: step reached, whether it finished, and its trace so far.'''
+    checkpoint = await checkpoint_store.load(run_id)
+    if checkpoint is None:
+        raise HTTPException(status_code=404, detail=f"No checkpoints for run {run_id}")
+    return {key: checkpoint[key] for key in ("run_id", "user_id", "mode", "step", "finished", "trace", "updated_at")}
+
+
+@router.post("/run/stream")
+async def run_stream(request_body: dict):
+    '''
+        Streaming variant of /run over Server-Sent Events: one `event: <type>`
+        frame per agent step event (decision, tool_start, tool_delta, tool_end,
+        tool_error, error, done) as it happens, ending with `run_end`. Generated
+        post text arrives token by token as `tool_delta` frames from the content
+        tool. Disconnecting stops the run.
+    '''
+    request_body = request_body or {}
+    events = stream_agent(_payload(request_body.get('user_id') or None, mode=request_body.get('mode'),
+                                   run_id=request_body.get('run_id')))
+
+    async def sse():
+        async for event in events:
+            yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+    return StreamingResponse(sse(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.post("/run_batch")
+async def run_batch(request_body: BatchRunRequest):
+    '''
+        Run the agent for a cohort of users on a bounded worker pool.
+        Streams NDJSON: one line per finished user (with progress), then a summary line.
+    '''
+    events = run_agent_batch(
+        request_body.user_ids,
+        build_payload=_payload,
+        concurrency=request_body.concurrency or settings.AGENT_BATCH_CONCURRENCY,
+    )
+
+    async def ndjson():
+        async for event in events:
+            yield json.dumps(event, default=str) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.get("/stats")
+async def stats():
+    from agent.llm import get_llm_provider
+    from agent.llm_cache import llm_cache_stats
+
+    tools = get_tools()
+    return {
+        "tools": tools.stats(),
+        "llm_pool": get_llm_provider().stats(),
+        "llm_cache": llm_cache_stats(),
+        "research_cache": tools["research"].cache_stats(),
+        "content": tools["content"].stats(),
+        "scheduler": scheduler_engine.stats(),
+        "publisher": tools["publisher"].stats(),
+        "checkpoints": checkpoint_store.stats(),
+    }
@@ -1,10 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel, Field, AnyUrl
-from sqlmodel import Session, select, Column, JSON
+from sqlmodel import select, Column, JSON
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 # from agent.tools.profile_tool import Profile
-from backend.db.models import UserProfile, Post, engine  # Assuming you have a UserProfile model defined
+from backend.db.models import UserProfile, Post  # Assuming you have a UserProfile model defined
+from backend.db.session import get_session
+from backend.config import settings
+from backend.services.ingest import json_array_rows, ndjson_rows
+from backend.services.profile_service import ProfileIngester, ProfileIngestResult
 
 router = APIRouter()
 
@@ -21,17 +26,13 @@ class ProfileCreateRequest(BaseModel):
     linkedin_url: str
 
 @router.get('/get_profile/{user_id}')
-async def show_profile(user_id: int) -> ProfileResponse:
+async def show_profile(user_id: int, session: AsyncSession = Depends(get_session)) -> ProfileResponse:
     try:
         # get data from db
-        
-        with Session(engine) as session:
-            profile_data = session.exec(select(UserProfile).filter(UserProfile.user_id == user_id)).first()
-            if not isinstance(profile_data, UserProfile):
-                profile_data = UserProfile(**profile_data)  
-            # Close the session
-            session.close()
-                
+        result = await session.exec(select(UserProfile).filter(UserProfile.user_id == user_id))
+        profile_data = result.first()
+        if profile_data is None:
+            raise HTTPException(status_code=404, detail="User profile not found")
 
         # return response
         return ProfileResponse(
@@ -42,12 +43,14 @@ async def show_profile(user_id: int) -> ProfileResponse:
             profile=profile_data.model_dump()
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    
+
 
 @router.post('/create_profile/', response_model = ProfileResponse)
-async def create_profile(request_body: ProfileCreateRequest):
+async def create_profile(request_body: ProfileCreateRequest, session: AsyncSession = Depends(get_session)):
     try:
         # Create a new user profile
         profile = UserProfile(
@@ -56,11 +59,9 @@ async def create_profile(request_body: ProfileCreateRequest):
         )
 
         # Store profile in the database
-        with Session(engine) as session:
-            session.add(profile)
-            session.commit()
-            session.refresh(profile)  # Refresh to get the updated profile with user_id
-            # session.close()
+        session.add(profile)
+        await session.commit()
+        await session.refresh(profile)  # Refresh to get the updated profile with user_id
 
         print('Profile created successfully')
 
@@ -75,3 +76,21 @@ async def create_profile(request_body: ProfileCreateRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post('/bulk', response_model=ProfileIngestResult)
+async def bulk_create_profiles(request: Request, session: AsyncSession = Depends(get_session)):
+    '''
+    Ingest many profiles at once. Body is either a JSON array of {name, linkedin_url, ...}
+    objects or, with `Content-Type: application/x-ndjson`, one object per line (streamed,
+    never buffered whole). Invalid rows are reported by index and do not abort the batch.
+    '''
+    ingester = ProfileIngester(session, chunk_size=settings.PROFILE_INGEST_CHUNK_SIZE,
+                               max_errors=settings.INGEST_MAX_ERRORS)
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        rows = ndjson_rows(request.stream())
+    else:
+        try:
+            rows = json_array_rows(await request.body())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON array: {e}")
+    return await ingester.ingest(rows)
@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from agent.tools.publisher_tool import PublishRequest, BulkPublishResult
+from backend.api.v1.orchestrator_routes import publisher
+from backend.config import settings
+
+router = APIRouter()
+
+
+class BulkPublishRequest(BaseModel):
+    requests: List[PublishRequest] = Field(..., min_length=1, max_length=settings.BULK_PUBLISH_MAX)
+    max_concurrency: Optional[int] = Field(default=None, ge=1, le=64)
+
+
+@router.post('/bulk')
+async def bulk_publish(request_body: BulkPublishRequest) -> BulkPublishResult:
+    result = await publisher.run_bulk(request_body.requests, max_concurrency=request_body.max_concurrency)
+    return BulkPublishResult(**result)
@@ -1,10 +1,14 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 
-from backend.db.models import Post, engine
+from backend.config import settings
+from backend.db.models import Post
+from backend.db.session import get_session
+from backend.services.pagination import InvalidCursor, keyset_page
 
 
 router = APIRouter()
@@ -12,43 +16,32 @@ router = APIRouter()
 class ScheduledPosts(BaseModel):
     user_id: str
     posts: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
 
 @router.get("/scheduled_posts/{user_id}")
-async def get_scheduled_posts(user_id: str) -> ScheduledPosts:
-    # simulate database call
-    
-    # extract all scheduled posts of user(user_id)
-    with Session(engine) as session:
-        statement = select(Post).where(Post.user_id == user_id, Post.scheduled_for != None)
-        results = session.exec(statement).all()
+async def get_scheduled_posts(
+    user_id: int,
+    cursor: Optional[str] = Query(default=None, description="next_cursor of the previous page"),
+    limit: Optional[int] = Query(default=None, ge=1, le=settings.LISTING_MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_session),
+) -> ScheduledPosts:
+    '''A page of a user's scheduled posts, soonest first; pass `next_cursor` back as `cursor` for the next page.'''
+    # scheduled posts of user(user_id), one keyset page at a time
+    statement = select(Post).where(Post.user_id == user_id, Post.scheduled_for != None)
+    try:
+        results, next_cursor = await keyset_page(
+            session, statement, Post.scheduled_for, Post.post_id,
+            cursor=cursor, limit=limit or settings.LISTING_PAGE_SIZE,
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        session.close()
-
-    '''
-    In real case, Map the results to this desired format
-    '''
-    # posts = []
-
-    # for result in results:
-    #     posts.append({
-    #         "content_id": str(result.post_id),
-    #         "scheduled_time": result.scheduled_for,
-    #         "status": "scheduled"
-    #     })
-
-    '''
-    Map the results to this format for testing
-    '''
     posts = [
         {
-            "content_id": "1",
-            "scheduled_time": "2023-10-01T10:00:00Z",
-            "status": "scheduled"
-        },
-        {
-            "content_id": "2",
-            "scheduled_time": "2023-10-02T11:00:00Z",
+            "content_id": str(result.post_id),
+            "scheduled_time": result.scheduled_for,
             "status": "scheduled"
-        },
+        }
+        for result in results
     ]
-    return ScheduledPosts(user_id=user_id, posts=posts)
+    return ScheduledPosts(user_id=str(user_id), posts=posts, next_cursor=next_cursor)
@@ -8,6 +8,67 @@ class Settings:
     VERSION: str = "1.0.0"
     DEBUG: bool = True
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+
+    # Async engine used by the API (sqlite+aiosqlite locally, e.g. postgresql+asyncpg in prod)
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "sqlite+aiosqlite:///linkedin_database.db")
+    DB_ECHO: bool = os.getenv("DB_ECHO", "false").lower() in {"1", "true", "yes"}
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
     API_KEY: str = os.getenv("API_KEY", "")
 
+    # Build the tool registry and LLM clients during startup instead of on the first agent request
+    STARTUP_PREWARM: bool = os.getenv("STARTUP_PREWARM", "false").lower() in {"1", "true", "yes"}
+
+    # Mediator (LLM decision) limits shared by every agent run in this process
+    MEDIATOR_MAX_CONCURRENCY: int = int(os.getenv("MEDIATOR_MAX_CONCURRENCY", "16"))
+    MEDIATOR_TIMEOUT: float = float(os.getenv("MEDIATOR_TIMEOUT", "60"))
+
+    # Per tool call timeout inside an agent step (batched calls each get their own)
+    AGENT_TOOL_TIMEOUT: float = float(os.getenv("AGENT_TOOL_TIMEOUT", "30"))
+    # Approximate token budget for the context the mediator sees on each step
+    AGENT_CONTEXT_TOKEN_BUDGET: int = int(os.getenv("AGENT_CONTEXT_TOKEN_BUDGET", "4000"))
+    # "step": one mediator call per step; "plan": one tool DAG per run, re-planned at most AGENT_MAX_REPLANS times
+    AGENT_MODE: str = os.getenv("AGENT_MODE", "step")
+    AGENT_MAX_REPLANS: int = int(os.getenv("AGENT_MAX_REPLANS", "1"))
+    # Agent run checkpoints: kept this many seconds after a run's last checkpoint, swept every interval
+    CHECKPOINT_TTL: float = float(os.getenv("CHECKPOINT_TTL", str(7 * 86400)))
+    CHECKPOINT_GC_INTERVAL: float = float(os.getenv("CHECKPOINT_GC_INTERVAL", "3600"))
+    # Batch runs: worker pool size and cohort size cap per request
+    AGENT_BATCH_CONCURRENCY: int = int(os.getenv("AGENT_BATCH_CONCURRENCY", "8"))
+    AGENT_BATCH_MAX_USERS: int = int(os.getenv("AGENT_BATCH_MAX_USERS", "10000"))
+
+    # Seconds fetched + analysed trends for a field are reused across agent runs
+    RESEARCH_CACHE_TTL: float = float(os.getenv("RESEARCH_CACHE_TTL", "900"))
+
+    # Content generation: two_step | single | speculative (see ContentTool), and trends drafted in speculative mode
+    CONTENT_MODE: str = os.getenv("CONTENT_MODE", "two_step")
+    CONTENT_TOP_K: int = int(os.getenv("CONTENT_TOP_K", "3"))
+
+    # Scheduled publishing
+    SCHEDULER_MAX_CONCURRENCY: int = int(os.getenv("SCHEDULER_MAX_CONCURRENCY", "8"))
+    SCHEDULER_MAX_ATTEMPTS: int = int(os.getenv("SCHEDULER_MAX_ATTEMPTS", "3"))
+
+    # Publishing limits (upstream LinkedIn quota)
+    PUBLISH_RATE_PER_SEC: float = float(os.getenv("PUBLISH_RATE_PER_SEC", "5"))
+    PUBLISH_BURST: int = int(os.getenv("PUBLISH_BURST", "10"))
+    PUBLISH_MAX_CONCURRENCY: int = int(os.getenv("PUBLISH_MAX_CONCURRENCY", "8"))
+    PUBLISH_MAX_RETRIES: int = int(os.getenv("PUBLISH_MAX_RETRIES", "4"))
+    # Publish requests accepted in one /publish/bulk call
+    BULK_PUBLISH_MAX: int = int(os.getenv("BULK_PUBLISH_MAX", "500"))
+
+    # Bulk profile ingestion: rows per INSERT/commit
+    PROFILE_INGEST_CHUNK_SIZE: int = int(os.getenv("PROFILE_INGEST_CHUNK_SIZE", "1000"))
+    # Per-row errors listed in bulk import responses (the rest are only counted)
+    INGEST_MAX_ERRORS: int = int(os.getenv("INGEST_MAX_ERRORS", "1000"))
+
+    # Listing endpoints (fetch_content, scheduled_posts): default and maximum page size
+    LISTING_PAGE_SIZE: int = int(os.getenv("LISTING_PAGE_SIZE", "20"))
+    LISTING_MAX_PAGE_SIZE: int = int(os.getenv("LISTING_MAX_PAGE_SIZE", "100"))
+
+    # Post NDJSON export/import: rows per cursor fetch (export) and per INSERT/commit (import)
+    POST_EXPORT_CHUNK_SIZE: int = int(os.getenv("POST_EXPORT_CHUNK_SIZE", "500"))
+    POST_IMPORT_CHUNK_SIZE: int = int(os.getenv("POST_IMPORT_CHUNK_SIZE", "1000"))
+
 settings = Settings()
@@ -0,0 +1,171 @@
+'''
+Ordered schema migrations.
+
+Each migration runs once and is recorded in the `schema_version` table, so startup
+only applies what a database is missing. To change the schema, append a new
+migration to MIGRATIONS; never edit one that has already shipped.
+'''
+from datetime import datetime, timezone
+from typing import Callable, List, Tuple
+
+from sqlalchemy import (JSON, Boolean, Column, DateTime, ForeignKey, Index, Integer, MetaData, String,
+                        Table, select)
+from sqlalchemy.engine import Connection
+
+from backend.utils.logger import logger
+
+
+_version_metadata = MetaData()
+
+schema_version = Table(
+    "schema_version",
+    _version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+# ---------- Migrations ----------
+# Each migration declares the tables/indexes it creates as they were when it shipped,
+# in its own MetaData, never via the live models: a fresh database must be built by the
+# same steps an upgraded one went through. Index-only migrations declare stub tables
+# with just the columns they index.
+def _0001_initial_schema(conn: Connection) -> None:
+    # Tables as they existed before migrations; no-op on databases created by create_all
+    metadata = MetaData()
+    Table(
+        "userprofile", metadata,
+        Column("user_id", Integer, primary_key=True),
+        Column("name", String, nullable=False),
+        Column("linkedin_url", String(2048)),
+        Column("experience", JSON),
+        Column("skills", JSON),
+        Column("raw", JSON),
+    )
+    Table(
+        "post", metadata,
+        Column("post_id", Integer, primary_key=True),
+        Column("user_id", Integer, ForeignKey("userprofile.user_id"), nullable=False),
+        Column("content", String, nullable=False),
+        Column("created_at", DateTime(timezone=True), nullable=False),
+        Column("scheduled_for", DateTime(timezone=True)),
+        Column("updated_at", JSON),
+    )
+    Table(
+        "comment", metadata,
+        Column("comment_id", Integer, primary_key=True),
+        Column("post_id", Integer, ForeignKey("post.post_id"), nullable=False),
+        Column("user_id", Integer, ForeignKey("userprofile.user_id"), nullable=False),
+        Column("parent_id", Integer, ForeignKey("comment.comment_id")),
+        Column("body", String, nullable=False),
+        Column("created_at", DateTime(timezone=True), nullable=False),
+    )
+    metadata.create_all(conn, checkfirst=True)
+
+
+def _0002_listing_and_thread_indexes(conn: Connection) -> None:
+    metadata = MetaData()
+    post = Table("post", metadata, Column("user_id", Integer), Column("scheduled_for", DateTime(timezone=True)),
+                 Column("created_at", DateTime(timezone=True)))
+    comment = Table("comment", metadata, Column("post_id", Integer), Column("parent_id", Integer))
+    for index in (
+        Index("ix_post_user_id_scheduled_for", post.c.user_id, post.c.scheduled_for),
+        Index("ix_post_user_id_created_at", post.c.user_id, post.c.created_at),
+        Index("ix_comment_post_id_parent_id", comment.c.post_id, comment.c.parent_id),
+    ):
+        index.create(conn, checkfirst=True)
+
+
+def _0003_scheduled_jobs(conn: Connection) -> None:
+    metadata = MetaData()
+    Table(
+        "scheduled_job", metadata,
+        Column("job_id", Integer, primary_key=True),
+        Column("content_id", String, nullable=False),
+        Column("user_id", Integer),
+        Column("content", String),
+        Column("due_at", DateTime(timezone=True), nullable=False),
+        Column("status", String, nullable=False),
+        Column("attempts", Integer, nullable=False),
+        Column("last_error", String),
+        Column("result", JSON),
+        Column("created_at", DateTime(timezone=True), nullable=False),
+        Index("ix_scheduled_job_status_due_at", "status", "due_at"),
+    )
+    metadata.create_all(conn, checkfirst=True)
+
+
+def _0004_agent_checkpoints(conn: Connection) -> None:
+    metadata = MetaData()
+    Table(
+        "agent_checkpoint", metadata,
+        Column("checkpoint_id", Integer, primary_key=True),
+        Column("run_id", String, nullable=False),
+        Column("seq", Integer, nullable=False),
+        Column("step", Integer, nullable=False),
+        Column("user_id", Integer),
+        Column("mode", String, nullable=False),
+        Column("state", JSON),
+        Column("trace", JSON),
+        Column("finished", Boolean, nullable=False),
+        Column("created_at", DateTime(timezone=True), nullable=False),
+        Index("ix_agent_checkpoint_run_id_seq", "run_id", "seq", unique=True),
+        Index("ix_agent_checkpoint_created_at", "created_at"),
+    )
+    metadata.create_all(conn, checkfirst=True)
+
+
+def _0005_post_keyset_indexes(conn: Connection) -> None:
+    # Listings page on (sort column, post_id): replace the 0002 indexes with ones ending in the tie-breaker
+    metadata = MetaData()
+    post = Table("post", metadata, Column("post_id", Integer), Column("user_id", Integer),
+                 Column("scheduled_for", DateTime(timezone=True)), Column("created_at", DateTime(timezone=True)))
+    Index("ix_post_user_id_scheduled_for", post.c.user_id, post.c.scheduled_for).drop(conn, checkfirst=True)
+    Index("ix_post_user_id_created_at", post.c.user_id, post.c.created_at).drop(conn, checkfirst=True)
+    Index("ix_post_user_id_scheduled_for_post_id", post.c.user_id, post.c.scheduled_for,
+          post.c.post_id).create(conn, checkfirst=True)
+    Index("ix_post_user_id_created_at_post_id", post.c.user_id, post.c.created_at,
+          post.c.post_id).create(conn, checkfirst=True)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "initial schema", _0001_initial_schema),
+    (2, "post (user_id, scheduled_for|created_at) and comment (post_id, parent_id) indexes",
+     _0002_listing_and_thread_indexes),
+    (3, "scheduled_job queue", _0003_scheduled_jobs),
+    (4, "agent_checkpoint store for resumable runs", _0004_agent_checkpoints),
+    (5, "post (user_id, scheduled_for|created_at, post_id) keyset indexes", _0005_post_keyset_indexes),
+]
+
+
+def current_version(conn: Connection) -> int:
+    schema_version.create(conn, checkfirst=True)
+    versions = conn.execute(select(schema_version.c.version)).scalars().all()
+    return max(versions, default=0)
+
+
+def run_migrations(conn: Connection) -> int:
+    '''
+    Apply every pending migration inside the caller's transaction.
+    Use with `await conn.run_sync(run_migrations)` on an async connection.
+    Returns the schema version after migrating.
+    '''
+    version = current_version(conn)
+    for number, description, upgrade in MIGRATIONS:
+        if number <= version:
+            continue
+        logger.info("Applying migration %04d: %s", number, description)
+        upgrade(conn)
+        conn.execute(schema_version.insert().values(
+            version=number, description=description, applied_at=datetime.now(timezone.utc)
+        ))
+        version = number
+    return version
+
+
+if __name__ == "__main__":
+    import asyncio
+    from backend.db.session import init_db
+
+    asyncio.run(init_db())
@@ -1,10 +1,14 @@
-from sqlmodel import SQLModel, Field, create_engine, Relationship, Column, JSON, String
+from sqlmodel import SQLModel, Field, Relationship, Column, JSON, String, Index
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone
 from pydantic import AnyUrl, field_validator, TypeAdapter
 # from pydantic.type_adapter import validate_python
 
 
+# Built once; validators run per row (bulk ingestion validates tens of thousands)
+LINKEDIN_URL_ADAPTER = TypeAdapter(AnyUrl)
+
+
 # ---------- User ----------
 class UserProfile(SQLModel, table=True):
     __tablename__ = "userprofile"
@@ -38,14 +42,18 @@ class UserProfile(SQLModel, table=True):
     @field_validator("linkedin_url", mode="before")
     def _validate_linkedin_url(cls, v):
         # Validate with TypeAdapter (Pydantic v2) and return plain string for DB binding
-        ta = TypeAdapter(AnyUrl)
-        parsed = ta.validate_python(v)
+        parsed = LINKEDIN_URL_ADAPTER.validate_python(v)
         return str(parsed)
 
 
 # ---------- Post ----------
 class Post(SQLModel, table=True):
     __tablename__ = "post"
+    __table_args__ = (
+        # keyset pages of a user's scheduled posts / post listings (see migrations 0005)
+        Index("ix_post_user_id_scheduled_for_post_id", "user_id", "scheduled_for", "post_id"),
+        Index("ix_post_user_id_created_at_post_id", "user_id", "created_at", "post_id"),
+    )
 
     post_id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="userprofile.user_id", nullable=False)
@@ -66,6 +74,10 @@ class Post(SQLModel, table=True):
 # ---------- Recursive Comment ----------
 class Comment(SQLModel, table=True):
     __tablename__ = "comment"
+    __table_args__ = (
+        # thread walks: top-level comments of a post, replies under a parent
+        Index("ix_comment_post_id_parent_id", "post_id", "parent_id"),
+    )
 
     comment_id: Optional[int] = Field(default=None, primary_key=True)
     post_id: int = Field(foreign_key="post.post_id", nullable=False)
@@ -90,13 +102,52 @@ class Comment(SQLModel, table=True):
     children: List["Comment"] = Relationship(back_populates="parent")
 
 
-# ---------- Engine ----------
-sqlite_file_name = "linkedin_database.db"
-sqlite_url = f"sqlite:///{sqlite_file_name}"
+# ---------- Scheduled publishing ----------
+class ScheduledJob(SQLModel, table=True):
+    __tablename__ = "scheduled_job"
+    __table_args__ = (
+        # startup recovery: all pending jobs in due order
+        Index("ix_scheduled_job_status_due_at", "status", "due_at"),
+    )
 
-engine = create_engine(sqlite_url, echo=True)
+    job_id: Optional[int] = Field(default=None, primary_key=True)
+    content_id: str = Field(..., description="Post (or external content) being published")
+    user_id: Optional[int] = Field(default=None, description="Owner; falls back to the post's user_id")
+    content: Optional[str] = Field(default=None, description="Text to publish; falls back to the post's content")
+    due_at: datetime = Field(..., description="UTC time the post should go out")
+    status: str = Field(default="pending", description="pending|running|published|failed")
+    attempts: int = Field(default=0)
+    last_error: Optional[str] = Field(default=None)
+    result: Optional[Dict[str, Any]] = Field(
+        sa_column=Column(JSON), default=None,
+        description="Publisher response once published"
+    )
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
-SQLModel.metadata.create_all(engine)
 
+# ---------- Agent run checkpoints ----------
+class AgentCheckpoint(SQLModel, table=True):
+    __tablename__ = "agent_checkpoint"
+    __table_args__ = (
+        # resume: a run's checkpoints in order
+        Index("ix_agent_checkpoint_run_id_seq", "run_id", "seq", unique=True),
+        # garbage collection by age
+        Index("ix_agent_checkpoint_created_at", "created_at"),
+    )
 
-# SQLModel.metadata.create_all(engine)
\ No newline at end of file
+    checkpoint_id: Optional[int] = Field(default=None, primary_key=True)
+    run_id: str = Field(..., description="Agent run this checkpoint belongs to")
+    seq: int = Field(..., description="1-based checkpoint number within the run")
+    step: int = Field(..., description="Agent step (or plan round) completed at this checkpoint")
+    user_id: Optional[int] = Field(default=None)
+    mode: str = Field(default="step", description="step|plan")
+    state: Dict[str, Any] = Field(
+        sa_column=Column(JSON), default_factory=dict,
+        description="Context, stored tool outputs and loop state needed to resume (latest checkpoint of a run only)"
+    )
+    trace: List[Dict[str, Any]] = Field(
+        sa_column=Column(JSON), default_factory=list,
+        description="Trace entries produced since the previous checkpoint"
+    )
+    finished: bool = Field(default=False, description="Run completed; nothing left to resume")
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,59 @@
+from typing import AsyncIterator
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.config import settings
+from backend.db.migrations import run_migrations
+from backend.utils.metrics import instrument_engine
+
+
+# ---------- Engine ----------
+engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL,
+    echo=settings.DB_ECHO,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+)
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers proceed while a writer commits; NORMAL sync is safe under WAL
+    if engine.dialect.name != "sqlite":
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+instrument_engine(engine.sync_engine)
+
+async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+# ---------- FastAPI dependency ----------
+async def get_session() -> AsyncIterator[AsyncSession]:
+    '''
+    Request-scoped session: one per request, returned to the pool when the response is sent.
+    Use as `session: AsyncSession = Depends(get_session)`.
+    '''
+    async with async_session() as session:
+        yield session
+
+
+async def init_db() -> int:
+    '''Bring the schema up to date (see backend/db/migrations.py); returns the schema version.'''
+    async with engine.begin() as conn:
+        return await conn.run_sync(run_migrations)
+
+
+async def close_db() -> None:
+    await engine.dispose()
@@ -1,24 +1,26 @@
 # backend/main.py
-from backend.api.v1 import content_routes, orchestrator_routes, profile_routes, schedule_routes
+import time
+_import_started = time.perf_counter()
+
+from backend.api.v1 import comment_routes, content_routes, orchestrator_routes, profile_routes, publish_routes, schedule_routes
 from backend.api.routes.profile_utils_routes import profile_utility_routes
 
 from backend.services.orchestrator_services import run_agent
-from agent.llm import llm
-from agent.tools.profile_tool import ProfileScrapTool
-from agent.tools.content_tool import ContentTool
-from agent.tools.research_tool import ResearchTool
-from agent.tools.scheduler_tool import SchedulerTool
-from agent.tools.timer_tool import TimerTool
-from agent.tools.publisher_tool import PublisherTool
 
 from backend.api.linkedin_api import linkedinapi
 from backend.api.research_api import researchapi
 
+from backend.config import settings
+from backend.db.session import init_db, close_db
+from backend.utils.metrics import render as render_metrics
+from backend.utils.startup import startup_report
+
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
+# from fastapi.templating import Jinja2Templates
+from fastapi.responses import Response
+# from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 
 from dotenv import load_dotenv
@@ -26,11 +28,30 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with startup_report.phase("init_db"):
+        await init_db()
+    with startup_report.phase("scheduler"):
+        await orchestrator_routes.scheduler_engine.start()
+    with startup_report.phase("checkpoints"):
+        await orchestrator_routes.checkpoint_store.start()
+    if settings.STARTUP_PREWARM:
+        with startup_report.phase("prewarm"):
+            orchestrator_routes.get_tools()
+    startup_report.ready()
+    yield
+    await orchestrator_routes.checkpoint_store.stop()
+    await orchestrator_routes.scheduler_engine.stop()
+    await close_db()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Dynamic LinkedIn Agent API",
     description="Backend for orchestrating AI tools dynamically",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -50,8 +71,12 @@ app.include_router(orchestrator_routes.router, prefix="/api/v1/orchestrator", ta
 app.include_router(profile_routes.router, prefix="/api/v1/profile", tags=["Profile"])
 app.include_router(content_routes.router, prefix="/api/v1/content", tags=["Content"])
 app.include_router(schedule_routes.router, prefix="/api/v1/schedule", tags=["Schedule"])
+app.include_router(comment_routes.router, prefix="/api/v1/comments", tags=["Comments"])
+app.include_router(publish_routes.router, prefix="/api/v1/publish", tags=["Publish"])
 app.include_router(profile_utility_routes.router, prefix="/api/v1/profile/utils", tags=["Profile Utils"])
 
+startup_report.record("import", time.perf_counter() - _import_started)
+
 
 
 @app.get("/")
@@ -64,23 +89,18 @@ async def test_run():
     """
     Quick endpoint to test the orchestrator without API keys.
     """
+    from agent.llm import llm
+    from agent.orchestrator.tool_registry import load_tools
+
     # Create dummy tool instances with fake APIs
     fake_linkedin_api = linkedinapi(api='fake_api')  # replace with mock class if needed
     fake_research_api = researchapi(api='fake_api')  # replace with mock class if needed
 
-    tools = {
-        "profile": ProfileScrapTool(linkedin_api=fake_linkedin_api, llm=llm()),
-        "research": ResearchTool(research_api=fake_research_api, llm=llm()),
-        "content": ContentTool(llm=llm()),
-        "scheduler": SchedulerTool(),
-        "timer": TimerTool(),
-        "publisher": PublisherTool(linkedin_api=fake_linkedin_api)
-    }
+    tools = load_tools(linkedin_api=fake_linkedin_api, research_api=fake_research_api, llm=llm)
 
     payload = {
         "context": {"user_id": 1},
-        "available_tools": [{'name': name,
-                            'description': tool.description} for name, tool in tools.items()],
+        "available_tools": tools.meta(),
         "llm": llm,
         "tool_registry": tools
     }
@@ -94,5 +114,18 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/startup")
+async def startup():
+    """Startup phase timings (import, migrations, engines, prewarm) and which heavy imports are still deferred."""
+    return startup_report.report()
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint (mediator, tool, LLM and DB latency; errors; in-flight gauges)."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 if __name__ == "__main__":
     uvicorn.run("backend.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,119 @@
+from __future__ import annotations
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import delete, func, null, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.db.models import AgentCheckpoint
+
+logger = logging.getLogger("backend")
+
+
+class CheckpointStore:
+    """
+    Durable checkpoints for agent runs (the orchestrator's `checkpointer`).
+
+    The orchestrator saves one row per completed step (per finished node in plan mode).
+    Each row holds the trace entries since the previous row; only the run's newest row
+    keeps the full state needed to resume (saving a row clears it on the older ones),
+    so a run stores one state however many steps it takes. `load()` rebuilds the whole
+    trace and returns that latest state.
+    Runs whose newest checkpoint is older than `ttl` seconds are deleted by a
+    background loop every `gc_interval` seconds.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession], ttl: float = 7 * 86400,
+                 gc_interval: float = 3600):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.gc_interval = gc_interval
+        self._gc_task: Optional[asyncio.Task] = None
+        self.saved = 0
+        self.collected = 0
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+    async def start(self) -> None:
+        self._gc_task = asyncio.create_task(self._gc_loop())
+
+    async def stop(self) -> None:
+        if self._gc_task is not None:
+            self._gc_task.cancel()
+            await asyncio.gather(self._gc_task, return_exceptions=True)
+            self._gc_task = None
+
+    # -------------------------
+    # Checkpointer interface
+    # -------------------------
+    async def save(self, run_id: str, seq: int, step: int, state: Dict[str, Any],
+                   trace: List[Dict[str, Any]], finished: bool = False,
+                   user_id: Optional[int] = None, mode: str = "step") -> None:
+        checkpoint = AgentCheckpoint(run_id=run_id, seq=seq, step=step, user_id=user_id, mode=mode,
+                                     state=state, trace=trace, finished=finished)
+        async with self.session_factory() as session:
+            session.add(checkpoint)
+            await session.exec(
+                update(AgentCheckpoint)
+                .where(AgentCheckpoint.run_id == run_id, AgentCheckpoint.seq < seq)
+                .values(state=null())
+            )
+            await session.commit()
+        self.saved += 1
+
+    async def load(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Latest state of a run plus its whole trace, or None if the run has no checkpoints."""
+        async with self.session_factory() as session:
+            latest = (await session.exec(
+                select(AgentCheckpoint).where(AgentCheckpoint.run_id == run_id).order_by(AgentCheckpoint.seq.desc())
+            )).first()
+            if latest is None:
+                return None
+            traces = (await session.exec(
+                select(AgentCheckpoint.trace).where(AgentCheckpoint.run_id == run_id).order_by(AgentCheckpoint.seq)
+            )).all()
+        return {
+            "run_id": run_id,
+            "seq": latest.seq,
+            "step": latest.step,
+            "user_id": latest.user_id,
+            "mode": latest.mode,
+            "state": latest.state,
+            "trace": [entry for entries in traces for entry in entries or []],
+            "finished": latest.finished,
+            "updated_at": latest.created_at,
+        }
+
+    # -------------------------
+    # Garbage collection
+    # -------------------------
+    async def gc(self, older_than: Optional[float] = None) -> int:
+        """Delete every checkpoint of runs not checkpointed for `older_than` seconds (default ttl)."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl if older_than is None else older_than)
+        stale_runs = (
+            select(AgentCheckpoint.run_id)
+            .group_by(AgentCheckpoint.run_id)
+            .having(func.max(AgentCheckpoint.created_at) < cutoff)
+        )
+        async with self.session_factory() as session:
+            result = await session.exec(delete(AgentCheckpoint).where(AgentCheckpoint.run_id.in_(stale_runs)))
+            await session.commit()
+        self.collected += result.rowcount or 0
+        return result.rowcount or 0
+
+    async def _gc_loop(self) -> None:
+        while True:
+            try:
+                deleted = await self.gc()
+                if deleted:
+                    logger.info("Collected %d stale agent checkpoint(s)", deleted)
+            except Exception as e:
+                logger.error("Checkpoint GC failed: %s", e)
+            await asyncio.sleep(self.gc_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"saved": self.saved, "collected": self.collected, "ttl": self.ttl}
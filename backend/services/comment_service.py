@@ -0,0 +1,81 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+from sqlalchemy import literal
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.db.models import Comment
+
+
+class CommentNode(BaseModel):
+    comment_id: int
+    parent_id: Optional[int] = None
+    user_id: int
+    body: str
+    created_at: datetime
+    depth: int
+    replies: List["CommentNode"] = Field(default_factory=list)
+
+
+async def load_comment_tree(
+    session: AsyncSession,
+    post_id: int,
+    max_depth: Optional[int] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> List[CommentNode]:
+    '''
+    Load a page of a post's comment threads with a single recursive CTE.
+
+    Args:
+        post_id: Post whose comments to load.
+        max_depth: Deepest reply level to include (0 = top-level comments only, None = all).
+        limit / offset: Page over the top-level comments (oldest first); every
+            reply under a returned top-level comment is included up to max_depth.
+
+    Returns:
+        Top-level CommentNode objects, each with its nested `replies`.
+    '''
+    # Page of top-level comments; SQLite doesn't allow LIMIT on the CTE anchor itself
+    top_level = (
+        select(Comment.comment_id)
+        .where(Comment.post_id == post_id, Comment.parent_id == None)
+        .order_by(Comment.created_at, Comment.comment_id)
+        .limit(limit)
+        .offset(offset)
+    )
+
+    columns = (Comment.comment_id, Comment.parent_id, Comment.user_id, Comment.body, Comment.created_at)
+    tree = (
+        select(*columns, literal(0).label("depth"))
+        .where(Comment.comment_id.in_(top_level))
+        .cte("comment_tree", recursive=True)
+    )
+    replies = (
+        select(*columns, (tree.c.depth + 1).label("depth"))
+        .join(tree, Comment.parent_id == tree.c.comment_id)
+        .where(Comment.post_id == post_id)
+    )
+    if max_depth is not None:
+        replies = replies.where(tree.c.depth < max_depth)
+    tree = tree.union_all(replies)
+
+    statement = select(tree).order_by(tree.c.depth, tree.c.created_at, tree.c.comment_id)
+    # Plain column rows, not ORM entities: run on the session's connection
+    connection = await session.connection()
+    rows = (await connection.execute(statement)).mappings().all()
+
+    # Rows arrive parents-first (ordered by depth), so one pass links every node
+    nodes: Dict[int, CommentNode] = {}
+    roots: List[CommentNode] = []
+    for row in rows:
+        node = CommentNode(**row)
+        nodes[node.comment_id] = node
+        if node.depth == 0:
+            roots.append(node)
+        else:
+            nodes[node.parent_id].replies.append(node)
+    return roots
@@ -0,0 +1,164 @@
+'''
+Shared plumbing for bulk imports: request body readers (JSON array / streamed NDJSON)
+and a chunked ingester that validates rows one by one and inserts them in multi-row
+transactions, reporting bad rows instead of aborting the batch.
+'''
+from __future__ import annotations
+import json
+import time
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterable, Dict, List, Tuple, Type, Union
+
+from pydantic import BaseModel, Field, ValidationError
+from sqlalchemy.exc import StatementError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.utils.logger import logger
+
+
+class RowError(BaseModel):
+    index: int = Field(..., description="0-based position of the row in the input")
+    error: str
+
+
+class IngestResult(BaseModel):
+    """Counts and row errors of an ingest; subclasses add the list of new ids under their own name."""
+    received: int
+    inserted: int
+    failed: int
+    errors: List[RowError] = Field(default_factory=list)
+    errors_truncated: int = Field(default=0, description="Failed rows beyond max_errors, not listed")
+    chunks: int
+    elapsed_s: float
+    rows_per_s: float
+
+
+def validation_error(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, err['loc'])) or 'row'}: {err['msg']}" for err in e.errors())
+
+
+async def ndjson_rows(chunks: AsyncIterable[bytes]) -> AsyncIterable[bytes]:
+    '''Split a streamed NDJSON body into lines without buffering the whole body.'''
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if pending.strip():
+        yield pending
+
+
+def json_array_rows(body: bytes) -> AsyncIterable[Any]:
+    '''Parse a JSON array body up front (raises ValueError if malformed) and iterate its items.'''
+    rows = json.loads(body)
+    if not isinstance(rows, list):
+        raise ValueError("expected a JSON array")
+
+    async def iterate() -> AsyncIterable[Any]:
+        for row in rows:
+            yield row
+    return iterate()
+
+
+class ChunkedIngester(ABC):
+    """
+    Validates rows against `row_model` (NDJSON lines are parsed and validated in one
+    model_validate_json pass) and hands valid rows to `insert()` `chunk_size` at a time,
+    one transaction per chunk. If the database rejects a chunk, its rows are retried
+    one per transaction so only the offending rows fail.
+
+    Subclasses set `row_model`, `result_model` (an IngestResult with a list field named
+    `ids_field` for the new ids) and implement `insert()`.
+    """
+    row_model: Type[BaseModel]
+    result_model: Type[IngestResult]
+    ids_field: str
+    label = "row"
+
+    def __init__(self, session: AsyncSession, chunk_size: int = 1000, max_errors: int = 1000):
+        self.session = session
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+
+    @abstractmethod
+    async def insert(self, rows: List[BaseModel]) -> List[int]:
+        '''Insert `rows` inside the current transaction (no commit) and return their ids in order.'''
+
+    def parse_row(self, raw: Union[str, bytes, Dict[str, Any]]) -> BaseModel:
+        if isinstance(raw, (str, bytes)):
+            return self.row_model.model_validate_json(raw)
+        return self.row_model.model_validate(raw)
+
+    async def ingest(self, rows: AsyncIterable[Any]) -> IngestResult:
+        started = time.perf_counter()
+        received = inserted = failed = chunks = 0
+        errors: List[RowError] = []
+        ids: List[int] = []
+        pending: List[Tuple[int, BaseModel]] = []
+
+        def fail(index: int, error: str) -> None:
+            nonlocal failed
+            failed += 1
+            if len(errors) < self.max_errors:
+                errors.append(RowError(index=index, error=error))
+
+        async def flush() -> None:
+            nonlocal inserted, chunks
+            chunks += 1
+            chunk_ids, row_errors = await self._insert_chunk(pending)
+            inserted += len(chunk_ids)
+            ids.extend(chunk_ids)
+            for index, error in row_errors:
+                fail(index, error)
+            pending.clear()
+
+        async for raw in rows:
+            index = received
+            received += 1
+            try:
+                row = self.parse_row(raw)
+            except ValidationError as e:
+                fail(index, validation_error(e))
+                continue
+            pending.append((index, row))
+            if len(pending) >= self.chunk_size:
+                await flush()
+        if pending:
+            await flush()
+
+        elapsed = time.perf_counter() - started
+        logger.info("Ingested %d/%d %s(s) in %.2fs (%d failed)", inserted, received, self.label, elapsed, failed)
+        return self.result_model(
+            received=received,
+            inserted=inserted,
+            failed=failed,
+            errors=errors,
+            errors_truncated=failed - len(errors),
+            chunks=chunks,
+            elapsed_s=round(elapsed, 3),
+            rows_per_s=round(inserted / elapsed, 1) if elapsed > 0 else 0.0,
+            **{self.ids_field: ids},
+        )
+
+    async def _insert_chunk(self, rows: List[Tuple[int, BaseModel]]) -> Tuple[List[int], List[Tuple[int, str]]]:
+        # StatementError covers the driver's errors (DBAPIError) and values rejected while binding parameters
+        try:
+            ids = await self.insert([row for _, row in rows])
+            await self.session.commit()
+            return ids, []
+        except StatementError as e:
+            await self.session.rollback()
+            logger.warning("%s chunk of %d rejected (%s); retrying row by row", self.label, len(rows), e.orig)
+
+        ids: List[int] = []
+        row_errors: List[Tuple[int, str]] = []
+        for index, row in rows:
+            try:
+                ids.extend(await self.insert([row]))
+                await self.session.commit()
+            except StatementError as e:
+                await self.session.rollback()
+                row_errors.append((index, str(e.orig)))
+        return ids, row_errors
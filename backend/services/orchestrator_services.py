@@ -1,15 +1,22 @@
 from pydantic import BaseModel, ValidationError
-from typing import Any, Dict, List
-from langchain_core.tools import Tool
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar
+from fastapi import Request
+import asyncio
 import logging
+import time
 
-from agent.orchestrator.orchestrator import ActionInstruction, DynamicAgentOrchestrator
+from agent.orchestrator.orchestrator import ActionInstruction, DynamicAgentOrchestrator, ExecutionPlan
+from agent.orchestrator.context import ContextManager
+from backend.config import settings
 
 
 logger = logging.getLogger("linkedin_dynamic_agent")
 
+T = TypeVar("T")
+
+# Caps in-flight mediator LLM calls across every agent run in this process.
+_mediator_semaphore = asyncio.Semaphore(settings.MEDIATOR_MAX_CONCURRENCY)
+
 
 class OriginalLLMMediator:
     def __init__(self, context : Dict[str, Any], available_tools : List[Dict[str, Any]], llm: Any):
@@ -24,9 +31,12 @@ class OriginalLLMMediator:
         :param query: The input query to process.
         :return: An ActionInstruction object containing the action to be taken.
         """
-        # decision-making logic
-        context = self.context
-        available_tools = self.available_tools
+        # Imported here so importing this module (and booting the API) does not load LangChain
+        from langchain_core.prompts import PromptTemplate
+
+        # decision-making logic (the orchestrator passes the compacted, per-step context)
+        context = context if context is not None else self.context
+        available_tools = available_tools or self.available_tools
 
         prompt = PromptTemplate(
             input_variables=["context", "tools"],
@@ -47,22 +57,116 @@ class OriginalLLMMediator:
                 "action": "done",
                 "reason": "post scheduled"
                 }}
+
+                Tool outputs in the context are summaries with a "ref" id. To pass a full output
+                (or a field of it) to a tool, use {{"$ref": "<ref>"}} or {{"$ref": "<ref>.<field>"}} as the arg value,
+                e.g. "analysis": {{"$ref": "out-2.analysis"}}.
+
+                When several tools do not depend on each other's output, call them together in one step:
+                {{
+                "action": "call_tools",
+                "calls": [
+                    {{"tool": "profile", "args": {{"user_id": 1}}}},
+                    {{"tool": "research", "args": {{"field": "AI"}}}}
+                ]
+                }}
             '''
         )  
 
         chain = prompt | self.llm.with_structured_output(ActionInstruction)
-        result = chain.invoke({"context": context, "tools": available_tools})
+        async with _mediator_semaphore:
+            result = await asyncio.wait_for(
+                chain.ainvoke({"context": ContextManager.serialize(context),
+                               "tools": ContextManager.serialize(available_tools)}),
+                timeout=settings.MEDIATOR_TIMEOUT,
+            )
 
         # check if result is an ActionInstruction
         if isinstance(result, ActionInstruction):
             return result
-        elif not isinstance(result, dict):
-            try:
-                result = ActionInstruction.model_validate(result)
-            except ValidationError as ve:
-                logger.error("Invalid instruction returned by mediator: %s", ve)
-                raise TypeError("Expected ActionInstruction, got {}".format(type(result)))
-        
+        try:
+            return ActionInstruction.model_validate(result)
+        except ValidationError as ve:
+            logger.error("Invalid instruction returned by mediator: %s", ve)
+            raise TypeError("Expected ActionInstruction, got {}".format(type(result)))
+
+    async def plan(self, context: Dict[str, Any], available_tools: List[Dict[str, Any]]) -> ExecutionPlan:
+        """
+        Plan the whole run as a DAG of tool calls in one LLM call (plan mode).
+
+        :return: An ExecutionPlan the orchestrator runs with dependency-aware concurrency.
+        """
+        from langchain_core.prompts import PromptTemplate
+
+        context = context if context is not None else self.context
+        available_tools = available_tools or self.available_tools
+
+        prompt = PromptTemplate(
+            input_variables=["context", "tools"],
+            template='''
+                Given the context: {context} and available tools: {tools}, plan every tool call the agent
+                needs to finish the task (usually profile, research, content, then scheduler) as a graph.
+
+                Return the structured output:
+                This is the schema the LLM MUST output (as JSON). The orchestrator will parse and validate it.
+                Example:
+                {{
+                "nodes": [
+                    {{"id": "profile", "tool": "profile", "args": {{"user_id": 1}}}},
+                    {{"id": "research", "tool": "research", "args": {{"field": "AI"}}}},
+                    {{"id": "content", "tool": "content",
+                      "args": {{"profile": {{"$ref": "profile"}}, "analysis": {{"$ref": "research.analysis"}}}}}},
+                    {{"id": "schedule", "tool": "scheduler", "args": {{"content_id": {{"$ref": "content.content"}}}},
+                      "depends_on": ["content"]}}
+                ],
+                "reason": "profile and research are independent; content needs both"
+                }}
+
+                Pass another node's full output (or a field of it) as an arg value with {{"$ref": "<id>"}} or
+                {{"$ref": "<id>.<field>"}}; the node then waits for that one. Use "depends_on" for any other ordering.
+                Nodes that do not depend on each other run at the same time.
+
+                If the context has "plan_failures", an earlier plan failed: plan only the remaining work.
+                Outputs of "completed_nodes" can still be referenced by their id.
+            '''
+        )
+
+        chain = prompt | self.llm.with_structured_output(ExecutionPlan)
+        async with _mediator_semaphore:
+            result = await asyncio.wait_for(
+                chain.ainvoke({"context": ContextManager.serialize(context),
+                               "tools": ContextManager.serialize(available_tools)}),
+                timeout=settings.MEDIATOR_TIMEOUT,
+            )
+
+        if isinstance(result, ExecutionPlan):
+            return result
+        try:
+            return ExecutionPlan.model_validate(result)
+        except ValidationError as ve:
+            logger.error("Invalid plan returned by mediator: %s", ve)
+            raise TypeError("Expected ExecutionPlan, got {}".format(type(result)))
+
+
+async def run_until_disconnected(request: Request, coro: Awaitable[T], poll_interval: float = 0.5) -> T:
+    '''
+        Await `coro` while watching the HTTP client. If the client drops the
+        connection, the work is cancelled instead of running to completion.
+    '''
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.warning("Client disconnected, cancelling agent run")
+                task.cancel()
+                raise asyncio.CancelledError("client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
+
 
 async def run_agent(payload: dict):
     '''
@@ -80,24 +184,129 @@ async def run_agent(payload: dict):
                 "tools_registry": [
                     {"name": "search", "description": "Search the web"},
                     {"name": "summarize", "description": "Summarize text"}
-                ]
+                ],
+                "checkpointer": CheckpointStore(...),   # optional
+                "run_id": "..."                         # optional; resumes a checkpointed run
             }
     '''
+    context = payload.get("context", {})
+    response = await _build_orchestrator(payload).run(initial_context=context,
+                                                       user_id=context.get("user_id"),
+                                                       run_id=payload.get("run_id"))
+    return response
+
+
+async def stream_agent(payload: dict) -> AsyncIterator[Dict[str, Any]]:
+    '''
+        Same payload as run_agent, but yields the orchestrator's step events
+        (decision, tool_start, tool_end, ...) as they happen instead of
+        returning the whole trace at the end.
+    '''
+    context = payload.get("context", {})
+    async for event in _build_orchestrator(payload).run_stream(initial_context=context,
+                                                               user_id=context.get("user_id"),
+                                                               run_id=payload.get("run_id")):
+        yield event
+
+
+def _build_orchestrator(payload: dict) -> DynamicAgentOrchestrator:
     context = payload.get("context", {})
     available_tools = payload.get("available_tools", [])
     llm = payload.get("llm", None)
     tool_registry = payload.get("tool_registry", [])
 
-    orchestrator = DynamicAgentOrchestrator(
+    return DynamicAgentOrchestrator(
         mediator=OriginalLLMMediator(
             context=context,
             available_tools=available_tools,
-            llm=llm()
+            llm=llm(family="mediator")
         ),
         tool_registry=tool_registry,
-        max_steps=12
+        max_steps=12,
+        tool_timeout=settings.AGENT_TOOL_TIMEOUT,
+        context_token_budget=settings.AGENT_CONTEXT_TOKEN_BUDGET,
+        mode=payload.get("mode") or settings.AGENT_MODE,
+        max_replans=settings.AGENT_MAX_REPLANS,
+        checkpointer=payload.get("checkpointer")
     )
 
-    response = await orchestrator.run(initial_context=context,
-                                      user_id=context.get("user_id"))
-    return response
+
+def run_error(response: Dict[str, Any]) -> Optional[str]:
+    '''
+    Why a finished run did not succeed, or None. The orchestrator reports mediator
+    errors, invalid plans and max_steps_reached as trace entries rather than raising,
+    so a run only succeeded if its trace ends with the mediator's "done".
+    '''
+    trace = response.get("trace") or []
+    if not trace:
+        return "empty trace"
+    last = trace[-1]
+    if last.get("error"):
+        return str(last["error"])
+    if last.get("action") != "done":
+        return "run ended without done"
+    return None
+
+
+async def run_agent_batch(user_ids: List[Any], build_payload: Callable[[Any], dict],
+                          concurrency: int = 8) -> AsyncIterator[Dict[str, Any]]:
+    '''
+        Run the agent for many users on a bounded pool of `concurrency` workers.
+
+        Yields one {"type": "result", ...} event per user as soon as that run
+        finishes (completion order, not input order), each carrying progress
+        counters, then a final {"type": "summary", ...} with totals and throughput.
+        A run counts as failed if it raised or if its trace did not end in "done"
+        (see run_error); the event then carries the error.
+        Closing the generator early (e.g. client disconnect) cancels the workers.
+    '''
+    pending: asyncio.Queue = asyncio.Queue()
+    for user_id in user_ids:
+        pending.put_nowait(user_id)
+    finished: asyncio.Queue = asyncio.Queue()
+
+    async def worker():
+        while True:
+            try:
+                user_id = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            try:
+                response = await run_agent(build_payload(user_id))
+                error = run_error(response)
+                event = {"user_id": user_id, "ok": error is None, "response": response}
+                if error is not None:
+                    event["error"] = error
+            except Exception as e:
+                logger.exception("Batch run failed for user_id=%s", user_id)
+                event = {"user_id": user_id, "ok": False, "error": str(e)}
+            event["elapsed_s"] = round(time.perf_counter() - started, 3)
+            await finished.put(event)
+
+    total = len(user_ids)
+    started = time.perf_counter()
+    workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, total))]
+    succeeded = failed = 0
+    try:
+        for completed in range(1, total + 1):
+            event = await finished.get()
+            if event["ok"]:
+                succeeded += 1
+            else:
+                failed += 1
+            yield {"type": "result", **event, "completed": completed, "total": total, "failed": failed}
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    elapsed = time.perf_counter() - started
+    yield {
+        "type": "summary",
+        "total": total,
+        "succeeded": succeeded,
+        "failed": failed,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(total / elapsed, 2) if elapsed > 0 else 0.0,
+    }
@@ -0,0 +1,73 @@
+'''
+Keyset (cursor) pagination for listing endpoints.
+
+A page is "the next `limit` rows after the last one seen" in (sort_column, id_column)
+order, expressed as a row-value comparison the (user_id, sort_column, id_column)
+indexes can seek to. Unlike OFFSET, the cost of a page does not grow with how deep
+into the listing it is.
+
+Cursors are opaque to clients: urlsafe base64 of the last row's key. Malformed
+cursors raise InvalidCursor.
+'''
+from __future__ import annotations
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+class InvalidCursor(ValueError):
+    """Cursor was not produced by encode_cursor (or was tampered with)."""
+
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    raw = json.dumps([sort_value.isoformat(), row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+
+async def keyset_page(
+    session: AsyncSession,
+    statement: Any,
+    sort_column: Any,
+    id_column: Any,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    descending: bool = False,
+) -> Tuple[List[Any], Optional[str]]:
+    '''
+    Run `statement` (a select of ORM entities) for one page.
+
+    Args:
+        sort_column / id_column: Model columns giving the page order; id_column breaks ties.
+        cursor: `next_cursor` of the previous page, or None for the first page.
+        descending: Newest first instead of oldest first.
+
+    Returns:
+        (rows, next_cursor); next_cursor is None on the last page.
+    '''
+    key = tuple_(sort_column, id_column)
+    if cursor:
+        after = tuple_(*decode_cursor(cursor))
+        statement = statement.where(key < after if descending else key > after)
+    order = (sort_column.desc(), id_column.desc()) if descending else (sort_column, id_column)
+    # One extra row tells whether another page exists without a COUNT
+    rows = list((await session.exec(statement.order_by(*order).limit(limit + 1))).all())
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
@@ -0,0 +1,162 @@
+'''
+Streaming export/import of a user's posts (optionally with their comment threads) as NDJSON.
+
+Export reads posts from a server-side cursor `chunk_size` rows at a time and loads the
+comments of each chunk with one query, so memory is bounded by the chunk, not by the
+account's history. Import is the mirror image: lines are validated one by one and
+inserted in multi-row chunks (see ChunkedIngester). An exported stream can be imported
+as is; ids in it are ignored and new ones assigned.
+'''
+from __future__ import annotations
+from datetime import datetime, timezone
+from typing import Annotated, AsyncIterator, Dict, List, Optional
+
+from pydantic import AfterValidator, BaseModel, Field
+from sqlalchemy import insert
+from sqlmodel import select
+
+from backend.db.models import Comment, Post
+from backend.db.session import engine
+from backend.services.comment_service import CommentNode
+from backend.services.ingest import ChunkedIngester, IngestResult
+
+
+class PostExport(BaseModel):
+    post_id: int
+    user_id: int
+    content: str
+    created_at: datetime
+    scheduled_for: Optional[datetime] = None
+    updated_at: Optional[List[str]] = None
+    comments: Optional[List[CommentNode]] = None
+
+
+async def export_posts(user_id: int, include_comments: bool = False, chunk_size: int = 500) -> AsyncIterator[str]:
+    '''
+    Yield a user's posts (oldest first) as NDJSON, one text block per chunk of `chunk_size` posts.
+
+    Runs on its own connection so it can outlive the request's session while the
+    response streams.
+    '''
+    statement = (
+        select(Post.post_id, Post.user_id, Post.content, Post.created_at, Post.scheduled_for, Post.updated_at)
+        .where(Post.user_id == user_id)
+        .order_by(Post.created_at, Post.post_id)
+        .execution_options(yield_per=chunk_size)
+    )
+    async with engine.connect() as connection:
+        result = await connection.stream(statement)
+        async for rows in result.mappings().partitions():
+            posts = [PostExport(**row) for row in rows]
+            if include_comments:
+                threads = await _comment_threads(connection, [post.post_id for post in posts])
+                for post in posts:
+                    post.comments = threads.get(post.post_id, [])
+            yield "".join(post.model_dump_json(exclude_none=True) + "\n" for post in posts)
+
+
+async def _comment_threads(connection, post_ids: List[int]) -> Dict[int, List[CommentNode]]:
+    # All comments of one chunk of posts in a single query, nested under their parents
+    statement = (
+        select(Comment.comment_id, Comment.post_id, Comment.parent_id, Comment.user_id, Comment.body, Comment.created_at)
+        .where(Comment.post_id.in_(post_ids))
+        .order_by(Comment.post_id, Comment.created_at, Comment.comment_id)
+    )
+    rows = (await connection.execute(statement)).mappings().all()
+
+    nodes: Dict[int, CommentNode] = {}
+    post_of: Dict[int, int] = {}
+    for row in rows:
+        nodes[row["comment_id"]] = CommentNode(depth=0, **{k: v for k, v in row.items() if k != "post_id"})
+        post_of[row["comment_id"]] = row["post_id"]
+
+    threads: Dict[int, List[CommentNode]] = {}
+    for node in nodes.values():
+        parent = nodes.get(node.parent_id) if node.parent_id is not None else None
+        if parent is None:
+            threads.setdefault(post_of[node.comment_id], []).append(node)
+        else:
+            parent.replies.append(node)
+
+    # Depths from the roots down (a reply may be older than its parent in imported data)
+    stack = [node for roots in threads.values() for node in roots]
+    while stack:
+        node = stack.pop()
+        for reply in node.replies:
+            reply.depth = node.depth + 1
+            stack.append(reply)
+    return threads
+
+
+def _utc(dt: datetime) -> datetime:
+    # Timestamps without an offset are taken as UTC (the columns only store aware datetimes)
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+UTCDatetime = Annotated[datetime, AfterValidator(_utc)]
+
+
+class CommentImport(BaseModel):
+    user_id: int
+    body: str = Field(..., min_length=1)
+    created_at: UTCDatetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    replies: List["CommentImport"] = Field(default_factory=list)
+
+
+class PostImport(BaseModel):
+    """One NDJSON line of a post import (the export format; ids are ignored)."""
+    content: str = Field(..., min_length=1)
+    # Core INSERTs bypass the table models' default factories, so defaults are filled here
+    created_at: UTCDatetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    scheduled_for: Optional[UTCDatetime] = None
+    updated_at: List[str] = Field(default_factory=list)
+    comments: List[CommentImport] = Field(default_factory=list)
+
+
+class PostImportResult(IngestResult):
+    post_ids: List[int] = Field(default_factory=list, description="Ids of the inserted posts, in input order")
+    comments_inserted: int = 0
+
+
+class PostImporter(ChunkedIngester):
+    """
+    Imports posts for `user_id`: one multi-row INSERT per chunk for the posts, then
+    their comment threads one reply level at a time (each level needs the ids of
+    the one above it).
+    """
+    row_model = PostImport
+    result_model = PostImportResult
+    ids_field = "post_ids"
+    label = "post"
+
+    def __init__(self, session, user_id: int, chunk_size: int = 1000, max_errors: int = 1000):
+        super().__init__(session, chunk_size=chunk_size, max_errors=max_errors)
+        self.user_id = user_id
+        self.comments_inserted = 0
+
+    async def ingest(self, rows) -> PostImportResult:
+        result = await super().ingest(rows)
+        result.comments_inserted = self.comments_inserted
+        return result
+
+    async def insert(self, rows: List[PostImport]) -> List[int]:
+        values = [{**row.model_dump(exclude={"comments"}), "user_id": self.user_id} for row in rows]
+        statement = insert(Post).returning(Post.post_id, sort_by_parameter_order=True)
+        post_ids = list((await self.session.execute(statement, values)).scalars())
+
+        # (post_id, parent_id, comment) per level, top-level comments first
+        level = [(post_id, None, comment) for post_id, row in zip(post_ids, rows) for comment in row.comments]
+        comments = 0
+        while level:
+            statement = insert(Comment).returning(Comment.comment_id, sort_by_parameter_order=True)
+            values = [{"post_id": post_id, "parent_id": parent_id,
+                       **comment.model_dump(exclude={"replies"})}
+                      for post_id, parent_id, comment in level]
+            comment_ids = list((await self.session.execute(statement, values)).scalars())
+            comments += len(comment_ids)
+            level = [(post_id, comment_id, reply)
+                     for (post_id, _, comment), comment_id in zip(level, comment_ids)
+                     for reply in comment.replies]
+        # Counted only once every insert of the chunk went through (a rejected chunk is retried)
+        self.comments_inserted += comments
+        return post_ids
@@ -0,0 +1,38 @@
+from __future__ import annotations
+from typing import Any, Dict, List
+
+from pydantic import BaseModel, Field, field_validator
+from sqlalchemy import insert
+
+from backend.db.models import LINKEDIN_URL_ADAPTER, UserProfile
+from backend.services.ingest import ChunkedIngester, IngestResult
+
+
+class ProfileIngestRow(BaseModel):
+    """One profile to ingest (a JSON object in the array, or one NDJSON line)."""
+    name: str = Field(..., min_length=1)
+    linkedin_url: str
+    experience: Dict[str, str] = Field(default_factory=dict)
+    skills: List[str] = Field(default_factory=list)
+    raw: Dict[str, Any] = Field(default_factory=dict)
+
+    @field_validator("linkedin_url", mode="before")
+    def _validate_linkedin_url(cls, v):
+        return str(LINKEDIN_URL_ADAPTER.validate_python(v))
+
+
+class ProfileIngestResult(IngestResult):
+    user_ids: List[int] = Field(default_factory=list, description="Ids of the inserted profiles, in input order")
+
+
+class ProfileIngester(ChunkedIngester):
+    """Bulk profile ingestion: one multi-row INSERT ... RETURNING per chunk."""
+    row_model = ProfileIngestRow
+    result_model = ProfileIngestResult
+    ids_field = "user_ids"
+    label = "profile"
+
+    async def insert(self, rows: List[ProfileIngestRow]) -> List[int]:
+        statement = insert(UserProfile).returning(UserProfile.user_id, sort_by_parameter_order=True)
+        result = await self.session.execute(statement, [row.model_dump() for row in rows])
+        return list(result.scalars())
@@ -0,0 +1,217 @@
+from __future__ import annotations
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.db.models import Post, ScheduledJob
+
+logger = logging.getLogger("backend")
+
+
+def _utc(dt: datetime) -> datetime:
+    # SQLite hands datetimes back naive; everything stored here is UTC
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+class SchedulerEngine:
+    """
+    Durable, timer-driven post scheduler.
+
+    Jobs live in the `scheduled_job` table, so nothing is lost on restart. An in-memory
+    min-heap of (due timestamp, job_id) gives O(log n) inserts and O(1) next-due lookups.
+    A single loop sleeps until the earliest due time (or until an earlier job is added)
+    and dispatches due jobs to the publisher, with at most `max_concurrency` publishing
+    at once. Failed publishes are retried with a linear backoff up to `max_attempts`.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession], publisher: Any,
+                 max_concurrency: int = 8, max_attempts: int = 3, retry_delay: float = 60):
+        self.session_factory = session_factory
+        self.publisher = publisher
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._heap: List[Tuple[float, int]] = []
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._loop_task: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self.published = 0
+        self.failed = 0
+        self.retried = 0
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+    async def start(self) -> int:
+        """Reload unfinished jobs from the DB and start the timer loop. Returns jobs recovered."""
+        async with self.session_factory() as session:
+            # 'running' jobs were interrupted by a shutdown/crash; publish them again
+            rows = (await session.exec(
+                select(ScheduledJob.job_id, ScheduledJob.due_at).where(ScheduledJob.status.in_(["pending", "running"]))
+            )).all()
+            running = (await session.exec(select(ScheduledJob).where(ScheduledJob.status == "running"))).all()
+            for job in running:
+                job.status = "pending"
+                session.add(job)
+            await session.commit()
+
+        self._heap = [(_utc(due_at).timestamp(), job_id) for job_id, due_at in rows]
+        heapq.heapify(self._heap)
+        self._loop_task = asyncio.create_task(self._run())
+        logger.info("Scheduler started with %d pending job(s)", len(self._heap))
+        return len(self._heap)
+
+    async def stop(self) -> None:
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+        # In-flight publishes are cancelled; their jobs stay 'running' and are recovered on start
+        for task in list(self._inflight):
+            task.cancel()
+        await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    # -------------------------
+    # Queue
+    # -------------------------
+    async def schedule(self, content_id: str, due_at: datetime, user_id: Optional[int] = None,
+                       content: Optional[str] = None) -> ScheduledJob:
+        """Persist a job and arm the timer. Naive datetimes are taken as UTC."""
+        job = ScheduledJob(content_id=str(content_id), user_id=user_id, content=content, due_at=_utc(due_at))
+        async with self.session_factory() as session:
+            session.add(job)
+            await session.commit()
+            await session.refresh(job)
+        self._push(job.job_id, _utc(job.due_at))
+        return job
+
+    def _push(self, job_id: int, due_at: datetime) -> None:
+        entry = (due_at.timestamp(), job_id)
+        heapq.heappush(self._heap, entry)
+        if self._heap[0] == entry:
+            # New earliest job: wake the loop so it re-arms its timer
+            self._wakeup.set()
+
+    async def pending(self) -> List[ScheduledJob]:
+        async with self.session_factory() as session:
+            return list((await session.exec(
+                select(ScheduledJob).where(ScheduledJob.status == "pending").order_by(ScheduledJob.due_at)
+            )).all())
+
+    def stats(self) -> Dict[str, Any]:
+        next_due = datetime.fromtimestamp(self._heap[0][0], tz=timezone.utc).isoformat() if self._heap else None
+        return {
+            "queued": len(self._heap),
+            "inflight": len(self._inflight),
+            "next_due": next_due,
+            "published": self.published,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+    # -------------------------
+    # Timer loop / dispatch
+    # -------------------------
+    async def _run(self) -> None:
+        while True:
+            # Clear before reading the heap so a push in between still wakes us
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, job_id = heapq.heappop(self._heap)
+            await self._slots.acquire()
+            task = asyncio.create_task(self._dispatch(job_id))
+            self._inflight.add(task)
+            task.add_done_callback(self._on_dispatched)
+
+    def _on_dispatched(self, task: asyncio.Task) -> None:
+        self._inflight.discard(task)
+        self._slots.release()
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Scheduler dispatch crashed: %s", task.exception())
+
+    async def _dispatch(self, job_id: int) -> None:
+        async with self.session_factory() as session:
+            job = await session.get(ScheduledJob, job_id)
+            if job is None or job.status != "pending":
+                return
+            job.status = "running"
+            job.attempts += 1
+            session.add(job)
+            await session.commit()
+
+            published = False
+            try:
+                user_id, content = job.user_id, job.content
+                if user_id is None or content is None:
+                    post = await session.get(Post, int(job.content_id))
+                    if post is None:
+                        raise ValueError(f"post {job.content_id} not found")
+                    user_id = user_id if user_id is not None else post.user_id
+                    content = content if content is not None else post.content
+
+                result = await self.publisher.run(user_id=str(user_id), content=content)
+                published = True
+                job.result = result
+                job.status = "published"
+                job.last_error = None
+            except Exception as e:
+                logger.warning("Publishing job %s failed (attempt %d): %s", job_id, job.attempts, e)
+                job.last_error = str(e)
+                if job.attempts < self.max_attempts:
+                    job.status = "pending"
+                    job.due_at = datetime.now(timezone.utc) + timedelta(seconds=self.retry_delay * job.attempts)
+                else:
+                    job.status = "failed"
+
+            status, due_at = job.status, job.due_at
+            session.add(job)
+            try:
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                logger.error("Storing the outcome of job %s failed: %s", job_id, e)
+                # Never leave the job 'running' (start() would publish it again): a post that
+                # went out stays published, anything else is not retried
+                status = "published" if published else "failed"
+                if not await self._set_status(job_id, status, f"outcome not stored: {e}"):
+                    return
+
+        if status == "published":
+            self.published += 1
+        elif status == "failed":
+            self.failed += 1
+        else:
+            self.retried += 1
+            self._push(job_id, _utc(due_at))
+
+    async def _set_status(self, job_id: int, status: str, error: str) -> bool:
+        # Minimal fallback write (no result payload) on a fresh session
+        try:
+            async with self.session_factory() as session:
+                await session.execute(
+                    update(ScheduledJob).where(ScheduledJob.job_id == job_id)
+                    .values(status=status, last_error=error, result=None)
+                )
+                await session.commit()
+            return True
+        except Exception as e:
+            logger.error("Could not mark job %s %s; it stays 'running': %s", job_id, status, e)
+            return False
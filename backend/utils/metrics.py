@@ -0,0 +1,59 @@
+'''
+Prometheus metrics for the agent hot paths, exported at GET /metrics.
+
+    mediator   - agent_mediator_seconds / agent_mediator_errors_total   (decide / plan calls)
+    tools      - agent_tool_seconds / agent_tool_errors_total / agent_tool_timeouts_total,
+                 agent_tool_invalid_args_total, agent_tools_in_flight     (labelled by tool)
+    runs       - agent_runs_in_flight / agent_runs_total                  (labelled by mode)
+    LLM        - llm_call_seconds / llm_errors_total / llm_tokens_total, llm_calls_in_flight
+                 (every chat model call, through agent.llm_metrics.LLMMetricsCallback on the pooled clients)
+    DB         - db_query_seconds / db_query_errors_total                 (engine cursor events)
+
+The agent, tool, run and LLM metrics are defined in agent/metrics.py; this module
+defines the DB ones and renders them all.
+'''
+import time
+from typing import Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# The agent and LLM families live with the agent; imported so /metrics always lists them
+import agent.metrics  # noqa: F401
+
+
+# ---------- DB ----------
+DB_SECONDS = Histogram("db_query_seconds", "DB statement latency", ["operation"])
+DB_ERRORS = Counter("db_query_errors_total", "DB statements that raised", ["operation"])
+
+
+def render() -> Tuple[bytes, str]:
+    '''Current metrics in the Prometheus text format, and its content type.'''
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def instrument_engine(engine: Engine) -> None:
+    '''Time every statement on `engine` (pass `async_engine.sync_engine` for async engines).'''
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        DB_SECONDS.labels(operation=_operation(statement)).observe(time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+        DB_ERRORS.labels(operation=_operation(exception_context.statement or "")).inc()
+
+
+def _operation(statement: str) -> str:
+    # First keyword only, so label cardinality stays small
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    return keyword if keyword in {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "PRAGMA"} else "OTHER"
@@ -0,0 +1,59 @@
+'''
+Startup phase timings, reported at GET /startup and logged once the app is ready.
+
+    import    - importing backend.main (routers, models, services)
+    init_db   - schema migrations
+    scheduler / checkpoints - background engines
+    prewarm   - tool registry + LLM clients (only with STARTUP_PREWARM; otherwise built on first use)
+
+`deferred` lists the heavy packages that are still not imported, i.e. whose cost
+has not been paid yet. For a per-module import breakdown run
+`python -m scripts.import_report`.
+'''
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from backend.utils.logger import logger
+
+# Imported only by the agent tools / LLM clients; should stay unloaded until first use
+HEAVY_PACKAGES = ("langchain_core", "langchain_groq", "groq", "langsmith", "langchain_core.prompts",
+                  "langchain_core.output_parsers")
+
+
+class StartupReport:
+    def __init__(self):
+        self.phases: List[Dict[str, Any]] = []
+        self.ready_at: Optional[float] = None
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases.append({"phase": name, "ms": round(seconds * 1000, 1)})
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def ready(self) -> None:
+        self.ready_at = time.time()
+        logger.info("Startup finished in %.1f ms (%s)", self.total_ms(),
+                    ", ".join(f"{p['phase']} {p['ms']} ms" for p in self.phases))
+
+    def total_ms(self) -> float:
+        return round(sum(p["ms"] for p in self.phases), 1)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "phases": self.phases,
+            "total_ms": self.total_ms(),
+            "ready": self.ready_at is not None,
+            "modules_loaded": len(sys.modules),
+            "deferred": [name for name in HEAVY_PACKAGES if name not in sys.modules],
+        }
+
+
+startup_report = StartupReport()
@@ -0,0 +1,226 @@
+'''
+Offline benchmarks for DynamicAgentOrchestrator, using RuleBasedMediator and the
+dummy tools (no LLM, network or database).
+
+    step_overhead      - orchestrator time per step with zero-latency tools (us/step, lower is better)
+    throughput_cN      - runs/s with N concurrent runs and 10 ms simulated tool latency (higher is better)
+    memory_per_run     - peak traced memory per concurrent run (KiB, lower is better)
+    context_view_sN    - ContextManager.view + serialize cost with N recorded outputs (us, lower is better)
+
+Each metric is run --repeat times and its value is the best sample (background load
+only ever makes a sample worse); the samples and their spread ((max - min) / best)
+are kept too. Results are written as JSON. `compare`
+re-runs the suite (or reads --current) and flags metrics that got worse than the
+baseline by more than --threshold, or by more than the spread of either side when
+that is wider, so a noisy metric does not fail on one slow sample.
+
+    python -m benchmarks.orchestrator_bench run --out benchmarks/baselines/orchestrator.json
+    python -m benchmarks.orchestrator_bench compare --baseline benchmarks/baselines/orchestrator.json
+
+--quick runs use smaller sizes, so their numbers are only comparable with a quick
+baseline (benchmarks/baselines/orchestrator_quick.json); compare refuses to mix modes.
+
+    python -m benchmarks.orchestrator_bench compare --quick --baseline benchmarks/baselines/orchestrator_quick.json
+'''
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from agent.orchestrator.context import ContextManager
+from agent.orchestrator.orchestrator import DynamicAgentOrchestrator, RuleBasedMediator, dummy_tools
+
+
+CONCURRENCY_LEVELS = (1, 10, 100, 1000)
+CONTEXT_SIZES = (1, 4, 16, 64)
+TOOL_LATENCY = 0.01
+STEPS_PER_RUN = 5  # profile, research, content, scheduler, done
+
+
+def _orchestrator(latency: float) -> DynamicAgentOrchestrator:
+    return DynamicAgentOrchestrator(mediator=RuleBasedMediator(), tool_registry=dummy_tools(latency), max_steps=8)
+
+
+async def _run_once(latency: float, index: int) -> float:
+    started = time.perf_counter()
+    result = await _orchestrator(latency).run(user_id=f"user-{index}")
+    if result["trace"][-1].get("action") != "done":
+        raise RuntimeError(f"benchmark run did not finish: {result['trace'][-1]}")
+    return time.perf_counter() - started
+
+
+async def bench_step_overhead(runs: int) -> Dict[str, Any]:
+    # Zero tool latency: everything measured is mediator + orchestrator + context work
+    await _run_once(0, -1)  # warm-up
+    started = time.perf_counter()
+    for index in range(runs):
+        await _run_once(0, index)
+    elapsed = time.perf_counter() - started
+    return {"value": round(elapsed / (runs * STEPS_PER_RUN) * 1e6, 1), "unit": "us/step", "better": "lower"}
+
+
+async def bench_throughput(concurrency: int) -> Dict[str, Any]:
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(_run_once(TOOL_LATENCY, index) for index in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    ordered = sorted(latencies)
+    return {
+        "value": round(concurrency / elapsed, 1),
+        "unit": "runs/s",
+        "better": "higher",
+        "p50_ms": round(statistics.median(ordered) * 1000, 1),
+        "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))] * 1000, 1),
+    }
+
+
+async def bench_memory(concurrency: int) -> Dict[str, Any]:
+    tracemalloc.start()
+    try:
+        await asyncio.gather(*(_run_once(TOOL_LATENCY, index) for index in range(concurrency)))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"value": round(peak / concurrency / 1024, 1), "unit": "KiB/run", "better": "lower",
+            "concurrency": concurrency}
+
+
+async def bench_context_view(outputs: int, repeat: int) -> Dict[str, Any]:
+    # A context after `outputs` tool steps, each with a realistic research-sized result
+    tools = dummy_tools(0)
+    result = await tools["research"].run(industry_keywords=["ml", "nlp", "python"])
+    manager = ContextManager(token_budget=4000)
+    context: Dict[str, Any] = {"user_id": "user-1", "profile": None, "tools_called": []}
+    for _ in range(outputs):
+        context["tools_called"].append({"tool": "research", "args": {"industry_keywords": ["ml"]}, "timestamp": "t"})
+        manager.record(context, "research", result)
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        ContextManager.serialize(manager.view(context))
+    elapsed = time.perf_counter() - started
+    return {"value": round(elapsed / repeat * 1e6, 1), "unit": "us", "better": "lower",
+            "tokens": ContextManager.estimate_tokens(manager.view(context))}
+
+
+async def repeated(bench: Callable[[], Awaitable[Dict[str, Any]]], repeat: int) -> Dict[str, Any]:
+    '''Run `bench` `repeat` times: the best sample, plus every sample value and their relative spread.'''
+    samples = [await bench() for _ in range(repeat)]
+    values = sorted(sample["value"] for sample in samples)
+    # Extra fields (p50_ms, tokens, ...) come from the best sample
+    pick = min if samples[0]["better"] == "lower" else max
+    result = dict(pick(samples, key=lambda sample: sample["value"]))
+    best = result["value"]
+    result.update(samples=values, spread=round((values[-1] - values[0]) / best, 3) if best else 0.0)
+    return result
+
+
+async def run_suite(quick: bool = False, repeat: int = 5) -> Dict[str, Any]:
+    metrics: Dict[str, Any] = {}
+    runs = 50 if quick else 500
+    metrics["step_overhead"] = await repeated(lambda: bench_step_overhead(runs), repeat)
+    for concurrency in CONCURRENCY_LEVELS:
+        if quick and concurrency > 100:
+            continue
+        metrics[f"throughput_c{concurrency}"] = await repeated(lambda: bench_throughput(concurrency), repeat)
+    memory_concurrency = 10 if quick else 100
+    metrics["memory_per_run"] = await repeated(lambda: bench_memory(memory_concurrency), repeat)
+    for outputs in CONTEXT_SIZES:
+        metrics[f"context_view_s{outputs}"] = await repeated(lambda: bench_context_view(outputs, runs), repeat)
+    return {
+        "suite": "orchestrator",
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": quick,
+        "repeat": repeat,
+        "metrics": metrics,
+    }
+
+
+def _mode(results: Dict[str, Any]) -> str:
+    return "quick" if results.get("quick") else "full"
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    '''
+    One row per metric in both results; `regression` is set when it got worse by more
+    than its tolerance: `threshold`, or the larger recorded spread of the two sides.
+    Raises ValueError when one side is a --quick run and the other is not.
+    '''
+    if _mode(baseline) != _mode(current):
+        raise ValueError(f"cannot compare a {_mode(current)} run against a {_mode(baseline)} baseline; "
+                         f"use a baseline recorded with the same --quick setting")
+    rows = []
+    for name, base in baseline["metrics"].items():
+        now = current["metrics"].get(name)
+        if now is None or not base["value"]:
+            continue
+        change = (now["value"] - base["value"]) / base["value"]
+        tolerance = max(threshold, base.get("spread", 0.0), now.get("spread", 0.0))
+        worse = change > tolerance if base["better"] == "lower" else change < -tolerance
+        rows.append({"metric": name, "baseline": base["value"], "current": now["value"], "unit": base["unit"],
+                     "change_pct": round(change * 100, 1), "tolerance_pct": round(tolerance * 100, 1),
+                     "regression": worse})
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_parser = sub.add_parser("run", help="run the suite and print / save the results")
+    run_parser.add_argument("--out", help="write results JSON here (e.g. a new baseline)")
+    run_parser.add_argument("--quick", action="store_true", help="smaller sizes, for a smoke run")
+    run_parser.add_argument("--repeat", type=int, default=5, help="samples per metric (the best is reported)")
+    compare_parser = sub.add_parser("compare", help="compare against a baseline; exit 1 on regressions")
+    compare_parser.add_argument("--baseline", required=True)
+    compare_parser.add_argument("--current", help="results JSON to compare instead of running the suite")
+    compare_parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown (0.2 = 20%%)")
+    compare_parser.add_argument("--quick", action="store_true")
+    compare_parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    # Per-step INFO logs would dominate the measurements
+    logging.getLogger("linkedin_dynamic_agent").setLevel(logging.WARNING)
+
+    if args.command == "run":
+        results = asyncio.run(run_suite(quick=args.quick, repeat=args.repeat))
+        text = json.dumps(results, indent=2)
+        if args.out:
+            with open(args.out, "w") as f:
+                f.write(text + "\n")
+        print(text)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if not args.current and _mode({"quick": args.quick}) != _mode(baseline):
+        # Fail before spending minutes on a run that could not be compared anyway
+        print(f"error: {args.baseline} is a {_mode(baseline)} baseline; "
+              f"{'drop' if args.quick else 'add'} --quick or pick another baseline", file=sys.stderr)
+        return 2
+    if args.current:
+        with open(args.current) as f:
+            current = json.load(f)
+    else:
+        current = asyncio.run(run_suite(quick=args.quick, repeat=args.repeat))
+    try:
+        rows = compare(baseline, current, args.threshold)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else "ok"
+        print(f"[{flag:>10}] {row['metric']:<22} {row['baseline']:>10} -> {row['current']:>10} {row['unit']:<8} "
+              f"({row['change_pct']:+.1f}%, tolerance {row['tolerance_pct']:.0f}%)")
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+'''
+Check that the hot listing / thread queries are served by the indexes from
+backend/db/migrations.py rather than full table scans.
+
+Builds a scratch SQLite database through the migrations, runs EXPLAIN QUERY PLAN
+for each access path and exits non-zero if an expected index is not used, or if
+the rows need a separate sort (keyset pages must be read in index order).
+
+    python -m scripts.check_query_plans
+'''
+import re
+import sys
+import tempfile
+from datetime import datetime, timezone
+from typing import List
+
+from sqlalchemy import create_engine, text, tuple_
+from sqlalchemy.engine import Connection
+from sqlmodel import select
+
+from backend.db.migrations import run_migrations
+from backend.db.models import Post, Comment
+
+
+# Mirrors backend.services.pagination.keyset_page: first page, then a page after a cursor
+_CURSOR = (datetime(2024, 1, 1, tzinfo=timezone.utc), 42)
+_scheduled = select(Post).where(Post.user_id == 1, Post.scheduled_for != None)
+_listing = select(Post).where(Post.user_id == 1)
+
+ACCESS_PATHS = [
+    (
+        "scheduled posts of a user, first page",
+        _scheduled.order_by(Post.scheduled_for, Post.post_id).limit(21),
+        "ix_post_user_id_scheduled_for_post_id",
+    ),
+    (
+        "scheduled posts of a user, next page",
+        _scheduled.where(tuple_(Post.scheduled_for, Post.post_id) > tuple_(*_CURSOR))
+        .order_by(Post.scheduled_for, Post.post_id).limit(21),
+        "ix_post_user_id_scheduled_for_post_id",
+    ),
+    (
+        "post listing of a user, first page",
+        _listing.order_by(Post.created_at.desc(), Post.post_id.desc()).limit(21),
+        "ix_post_user_id_created_at_post_id",
+    ),
+    (
+        "post listing of a user, next page",
+        _listing.where(tuple_(Post.created_at, Post.post_id) < tuple_(*_CURSOR))
+        .order_by(Post.created_at.desc(), Post.post_id.desc()).limit(21),
+        "ix_post_user_id_created_at_post_id",
+    ),
+    (
+        "top-level comments of a post",
+        select(Comment).where(Comment.post_id == 1, Comment.parent_id == None),
+        "ix_comment_post_id_parent_id",
+    ),
+    (
+        "replies to a comment",
+        select(Comment).where(Comment.post_id == 1, Comment.parent_id == 7),
+        "ix_comment_post_id_parent_id",
+    ),
+]
+
+
+def explain(conn: Connection, statement) -> List[str]:
+    compiled = statement.compile(conn, compile_kwargs={"literal_binds": True})
+    rows = conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return [row[-1] for row in rows]
+
+
+def main() -> int:
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/plans.db")
+        with engine.begin() as conn:
+            run_migrations(conn)
+            for name, statement, index in ACCESS_PATHS:
+                plan = explain(conn, statement)
+                uses_index = any(re.search(rf"\bINDEX {index}\b", line) for line in plan)
+                ok = uses_index and not any("TEMP B-TREE" in line for line in plan)
+                failures += not ok
+                print(f"[{'ok' if ok else 'FAIL'}] {name}: {' | '.join(plan)}")
+        engine.dispose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+'''
+Compare ContentTool modes (two_step vs single vs speculative) on latency and tokens.
+
+Generates posts for a sample profile / research output with each mode against
+the configured LLM and prints per-mode averages plus ratios against two_step.
+
+    python -m scripts.compare_content_modes --rounds 5 --top-k 3
+'''
+import argparse
+import asyncio
+import json
+
+from agent.llm import llm
+from agent.tools.content_tool import CONTENT_MODES, ContentTool
+
+
+SAMPLE_PROFILE = {
+    "name": "Jane Doe",
+    "headline": "Machine Learning Engineer",
+    "skills": ["Python", "MLOps", "LLMs"],
+}
+
+SAMPLE_RESEARCH = {
+    "trends": [
+        {"title": "Agentic AI workflows", "summary": "LLM agents that plan and call tools"},
+        {"title": "Small language models on device", "summary": "Efficient models running locally"},
+        {"title": "AI regulation in the EU", "summary": "The AI Act and its obligations"},
+    ],
+    "analysis": {
+        "future_growth_potential": "High across enterprise automation",
+        "high_engagement_accounts": "ML practitioners and founders",
+        "potential_challenges_and_risks": "Reliability and evaluation",
+    },
+}
+
+
+async def main(rounds: int, top_k: int) -> dict:
+    tool = ContentTool(llm=llm(family="content"), top_k=top_k)
+    for mode in CONTENT_MODES:
+        for _ in range(rounds):
+            await tool.run(profile=SAMPLE_PROFILE, analysis=SAMPLE_RESEARCH, mode=mode)
+    stats = tool.stats()
+    return {"modes": stats["modes"], "vs_two_step": stats["vs_two_step"]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--top-k", type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.rounds, args.top_k)), indent=2))
@@ -0,0 +1,62 @@
+'''
+Import-time report for the API worker: imports backend.main in a fresh interpreter
+with `-X importtime` and prints the total plus the most expensive top-level packages
+and modules (self time, i.e. excluding their own imports).
+
+    python -m scripts.import_report [--module backend.main] [--top 15] [--budget-ms 1500]
+
+Exits non-zero when the total import time exceeds --budget-ms.
+'''
+import argparse
+import re
+import subprocess
+import sys
+from collections import Counter
+from typing import List, Optional, Tuple
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def measure(module: str) -> List[Tuple[str, int, int, int]]:
+    '''(module, self_us, cumulative_us, depth) for every module imported by `module`.'''
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2))
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="backend.main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    rows = measure(args.module)
+    total_ms = sum(self_us for _, self_us, _, _ in rows) / 1000
+    packages = Counter()
+    for name, self_us, _, _ in rows:
+        packages[name.split(".")[0]] += self_us
+
+    print(f"{args.module}: {total_ms:.1f} ms, {len(rows)} modules")
+    print("\nslowest packages (self time):")
+    for name, us in packages.most_common(args.top):
+        print(f"  {us / 1000:8.1f} ms  {name}")
+    print("\nslowest modules (self time):")
+    for name, self_us, _, _ in sorted(rows, key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"\nimport time {total_ms:.1f} ms exceeds budget {args.budget_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
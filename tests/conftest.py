@@ -0,0 +1,48 @@
+'''
+Shared fixtures. The whole suite runs offline: LLM_BACKEND=fake (no Groq key needed)
+and a throwaway SQLite database, both set before any backend/agent module is imported.
+'''
+import os
+import shutil
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="linkedin-agent-tests-")
+os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{_tmp}/test.db"
+os.environ["LLM_BACKEND"] = "fake"
+os.environ["LLM_CACHE_PATH"] = f"{_tmp}/llm_cache.db"
+os.environ["FAKE_LLM_LATENCY_MS"] = "0"
+os.environ["FAKE_LLM_LATENCY_JITTER_MS"] = "0"
+os.environ["FAKE_LLM_TOKENS_PER_SEC"] = "0"
+os.environ["FAKE_LLM_SEED"] = "7"
+os.environ.pop("GROQ_API_KEY", None)
+
+import pytest
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db(anyio_backend):
+    '''Migrated database, emptied after the test.'''
+    from sqlmodel import SQLModel
+    from backend.db.session import engine, init_db
+
+    await init_db()
+    yield engine
+    async with engine.begin() as conn:
+        for table in reversed(SQLModel.metadata.sorted_tables):
+            await conn.execute(table.delete())
+    # Pooled aiosqlite connections are bound to this test's event loop
+    await engine.dispose()
+
+
+@pytest.fixture
+def tmp_dir():
+    return _tmp
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_tmp, ignore_errors=True)
@@ -0,0 +1,389 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from langchain_core.outputs import Generation
+from prometheus_client import REGISTRY
+from pydantic import BaseModel
+from sqlmodel import select
+
+from agent.llm_cache import LLMCacheStore, PromptFamilyCache
+from agent.orchestrator.context import ContextManager
+from agent.orchestrator.orchestrator import (
+    ActionInstruction, DynamicAgentOrchestrator, ExecutionPlan, PlanNode, RuleBasedMediator, dummy_tools,
+)
+from agent.orchestrator.tool_registry import InvalidToolArgs, ToolRegistry
+from agent.tools.cache import SingleFlightCache
+from backend.db.models import AgentCheckpoint
+from backend.db.session import async_session
+from backend.services.checkpoint_service import CheckpointStore
+
+
+# ---------- LLM response cache ----------
+def test_llm_cache_disk_tier_evicts_expired_and_excess_rows(tmp_path):
+    store = LLMCacheStore(str(tmp_path / "cache.db"), max_disk_entries=5, sweep_every=4)
+    value = [Generation(text="hi")]
+    now = time.time()
+    for i in range(3):
+        store.put_disk(f"expired-{i}", "research", value, 1.0, now - 1)
+    for i in range(9):
+        store.put_disk(f"live-{i}", "research", value, 1.0, now + 100 + i)
+
+    # Swept after writes 4, 8 and 12: expired rows first, then down to the cap
+    assert store.disk_entries() == 5
+    assert store.get_disk("expired-0") is None
+    assert store.evicted == 7
+    # Rows closest to expiry go first when over the cap
+    assert store.get_disk("live-3") is None
+    assert store.get_disk("live-4") is not None
+
+
+def test_llm_cache_sweeps_on_open(tmp_path):
+    path = str(tmp_path / "cache.db")
+    store = LLMCacheStore(path, sweep_every=1000)
+    store.put_disk("old", "profile", [Generation(text="x")], 1.0, time.time() - 1)
+    assert store.disk_entries() == 1
+
+    assert LLMCacheStore(path).disk_entries() == 0
+
+
+def test_llm_cache_counters_are_consistent_across_threads(tmp_path):
+    cache = PromptFamilyCache(LLMCacheStore(str(tmp_path / "cache.db")), "research", ttl=60)
+
+    def miss():
+        for i in range(200):
+            cache._disk_hit(f"{threading.get_ident()}-{i}")
+
+    threads = [threading.Thread(target=miss) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.stats()["misses"] == 1600
+
+
+# ---------- Single-flight tool cache ----------
+class GatedLoader:
+    '''Counts upstream calls; each call waits for `release` and then returns or raises.'''
+    def __init__(self, error=None):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return {"call": self.calls}
+
+
+@pytest.mark.anyio
+async def test_single_flight_coalesces_concurrent_misses():
+    cache = SingleFlightCache(ttl=60)
+    loader = GatedLoader()
+    waiters = [asyncio.ensure_future(cache.get_or_load("k", loader)) for _ in range(10)]
+    await asyncio.sleep(0)
+    assert cache.stats()["inflight"] == 1
+    loader.release.set()
+
+    assert await asyncio.gather(*waiters) == [{"call": 1}] * 10
+    assert loader.calls == 1
+    assert (cache.misses, cache.coalesced, cache.stats()["inflight"]) == (1, 9, 0)
+    assert await cache.get_or_load("k", loader) == {"call": 1} and cache.hits == 1
+
+
+@pytest.mark.anyio
+async def test_single_flight_failure_reaches_every_waiter_and_releases_key():
+    cache = SingleFlightCache(ttl=60)
+    failing = GatedLoader(error=RuntimeError("upstream down"))
+    waiters = [asyncio.ensure_future(cache.get_or_load("k", failing)) for _ in range(5)]
+    await asyncio.sleep(0)
+    failing.release.set()
+
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) and str(r) == "upstream down" for r in results)
+    assert failing.calls == 1
+    # Nothing cached and nothing left in flight: the next lookup loads again
+    assert cache.stats()["inflight"] == 0 and cache.stats()["size"] == 0
+    loader = GatedLoader()
+    loader.release.set()
+    assert await cache.get_or_load("k", loader) == {"call": 1}
+    assert loader.calls == 1
+
+
+# ---------- Context view ----------
+def _context(manager, outputs, profile_chars=0):
+    context = {"user_id": 1, "profile": {"bio": "x" * profile_chars}, "tools_called": []}
+    for i in range(outputs):
+        context["tools_called"].append({"tool": "research", "args": {"query": f"q{i}"}})
+        manager.record(context, "research", {"trends": ["t" * 50] * 20, "n": i})
+    return context
+
+
+@pytest.mark.parametrize("outputs, profile_chars", [(0, 0), (3, 0), (30, 0), (30, 4000), (2, 20000)])
+def test_context_view_fits_budget(outputs, profile_chars):
+    manager = ContextManager(token_budget=1000, summary_chars=400, keep_recent_calls=6)
+    context = _context(manager, outputs, profile_chars)
+    view = manager.view(context)
+
+    assert ContextManager.estimate_tokens(view) <= 1000
+    # The newest output keeps its summary; older ones are reduced before anything else is touched
+    if outputs:
+        assert "summary" in view["tool_outputs"][-1]["research"]
+    assert context["profile"] == {"bio": "x" * profile_chars}
+
+
+def test_context_view_summarizes_oversized_profile_last():
+    manager = ContextManager(token_budget=1000, summary_chars=400)
+    view = manager.view(_context(manager, 2, profile_chars=300))
+    assert view["profile"] == {"bio": "x" * 300}
+
+    view = manager.view(_context(manager, 2, profile_chars=20000))
+    assert isinstance(view["profile"], str) and len(view["profile"]) == 403
+    assert [len(entry["research"]) for entry in view["tool_outputs"]] == [1, 2]
+    assert len(view["tools_called"]) == 1 and view["tools_called_omitted"] == 1
+
+
+# ---------- Tool registry ----------
+class EchoArgs(BaseModel):
+    text: str
+    times: int = 1
+
+
+class EchoTool:
+    name = "echo"
+    description = "Repeat text."
+    args_schema = EchoArgs
+
+    def __init__(self):
+        self.calls = 0
+
+    async def run(self, text: str, times: int = 1):
+        self.calls += 1
+        return {"text": text * times}
+
+
+def test_tool_registry_builds_prompt_metadata_once():
+    registry = ToolRegistry(dummy_tools(latency=0))
+    meta = {tool["name"]: tool for tool in registry.meta()}
+    assert meta["research"]["args"] == {"industry_keywords": "array[string]", "limit": "integer"}
+    assert meta["research"]["required"] == ["industry_keywords"]
+    assert registry.meta_tokens > 0
+    assert registry.meta() is registry.meta()
+
+
+def test_tool_registry_validates_and_rejects_args():
+    registry = ToolRegistry([EchoTool()])
+    # The tool gets the validated (coerced) values, not the raw ones
+    assert registry.validate("echo", {"text": "hi", "times": "2"}) == {"text": "hi", "times": 2}
+
+    for bad, problem in (({"times": 2}, "text: Field required"),
+                         ({"text": "hi", "times": "lots"}, "times: Input should be a valid integer")):
+        with pytest.raises(InvalidToolArgs, match=problem):
+            registry.validate("echo", bad)
+    # Signature-derived models reject unknown args
+    with pytest.raises(InvalidToolArgs, match="colour: Extra inputs are not permitted"):
+        ToolRegistry(dummy_tools(latency=0)).validate("profile", {"user_id": 1, "colour": "red"})
+    assert registry.stats() == {"tools": 1, "meta_tokens": registry.meta_tokens, "validated": 1, "rejected": 2}
+
+
+@pytest.mark.anyio
+async def test_orchestrator_rejects_bad_args_without_calling_tool():
+    echo = EchoTool()
+    planner_plan = _plan({"id": "a", "tool": "echo", "args": {"text": "hi", "times": "lots"}})
+    orchestrator = DynamicAgentOrchestrator(ScriptedPlanner(planner_plan), [echo], mode="plan", max_replans=0)
+    result = await orchestrator.run(user_id=1)
+
+    assert result["trace"][1]["error"].startswith("invalid_args: echo: times:")
+    assert echo.calls == 0
+    assert orchestrator.tool_registry.stats()["rejected"] == 1
+
+
+class ScriptedMediator:
+    '''Step mode: returns the scripted instructions in turn, then done.'''
+    def __init__(self, *instructions):
+        self.instructions = list(instructions)
+
+    async def decide(self, context, available_tools):
+        if not self.instructions:
+            return ActionInstruction(action="done", reason="script finished")
+        return ActionInstruction(**self.instructions.pop(0))
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("ref", [
+    "out-1.name.first",  # indexing into a string: TypeError
+    "out-1.skills.first",  # non-numeric list index: ValueError
+    "out-1.skills.9",  # out of range: IndexError
+    7,  # not a string: AttributeError
+    "out-9",  # unknown output: KeyError
+])
+async def test_bad_ref_fails_the_call_instead_of_hanging_the_run(ref):
+    echo = EchoTool()
+    mediator = ScriptedMediator(
+        {"action": "call_tool", "tool": "profile", "args": {"user_id": 1}},
+        {"action": "call_tool", "tool": "echo", "args": {"text": {"$ref": ref}}},
+    )
+    tools = {**dummy_tools(latency=0), "echo": echo}
+    result = await asyncio.wait_for(DynamicAgentOrchestrator(mediator, tools).run(user_id=1), timeout=3)
+
+    error = result["trace"][1]
+    assert error["tool"] == "echo" and error["error"].startswith("invalid_args: ")
+    assert result["trace"][-1]["action"] == "done"
+    assert echo.calls == 0
+
+
+@pytest.mark.anyio
+async def test_tool_receives_coerced_args():
+    echo = EchoTool()
+    mediator = ScriptedMediator({"action": "call_tool", "tool": "echo", "args": {"text": "ab", "times": "3"}})
+    result = await DynamicAgentOrchestrator(mediator, [echo]).run(user_id=1)
+    assert result["trace"][0]["result"] == {"text": "ababab"}
+
+
+# ---------- Plan validation and re-planning ----------
+TOOLS = dummy_tools(latency=0)
+
+
+def _plan(*nodes):
+    return ExecutionPlan(nodes=[PlanNode(**node) for node in nodes])
+
+
+@pytest.mark.parametrize("plan, problem", [
+    (_plan(), "empty plan"),
+    (_plan({"id": "a", "tool": "profile"}, {"id": "a", "tool": "research"}), "duplicate node ids"),
+    (_plan({"id": "a", "tool": "missing"}), "unknown_tool:missing"),
+    (_plan({"id": "a", "tool": "profile", "depends_on": ["ghost"]}), "unknown dependency:ghost"),
+    (_plan({"id": "a", "tool": "content", "args": {"profile": {"$ref": "ghost.skills"}}}), "unknown $ref:ghost"),
+    (_plan({"id": "a", "tool": "profile", "depends_on": ["b"]},
+           {"id": "b", "tool": "research", "args": {"x": {"$ref": "a"}}}), "dependency cycle between: a,b"),
+])
+def test_plan_problem_reports_invalid_dags(plan, problem):
+    assert plan.problem(TOOLS, set(), max_nodes=8) == problem
+
+
+def test_plan_refs_to_earlier_outputs_are_valid():
+    plan = _plan({"id": "content", "tool": "content", "args": {"profile": {"$ref": "profile"}}},
+                 {"id": "scheduler", "tool": "scheduler", "args": {"x": {"$ref": "out-2.post"}}})
+    assert plan.problem(TOOLS, {"profile", "out-1", "out-2"}, max_nodes=8) is None
+    assert plan.order() == ["content", "scheduler"]
+    assert plan.problem(TOOLS, set(), max_nodes=8) == "unknown $ref:out-2,profile"
+
+
+class ScriptedPlanner:
+    '''Returns the scripted plans in turn and records what each plan() call saw.'''
+    def __init__(self, *plans):
+        self.plans = list(plans)
+        self.views = []
+
+    async def plan(self, context, available_tools):
+        self.views.append(context)
+        return self.plans.pop(0)
+
+
+@pytest.mark.anyio
+async def test_orchestrator_replans_after_invalid_plan():
+    planner = ScriptedPlanner(
+        _plan({"id": "content", "tool": "content", "args": {"profile": {"$ref": "profile"}}}),
+        _plan({"id": "profile", "tool": "profile", "args": {"user_id": 1}},
+              {"id": "content", "tool": "content", "args": {"profile": {"$ref": "profile"}}}),
+    )
+    orchestrator = DynamicAgentOrchestrator(planner, TOOLS, mode="plan", max_replans=1)
+    result = await orchestrator.run(user_id=1)
+
+    kinds = [entry.get("error") or entry.get("node") or entry.get("action") for entry in result["trace"]]
+    assert kinds[1] == "invalid_plan: unknown $ref:profile"
+    assert kinds[-1] == "done"
+    assert planner.views[1]["plan_failures"] == [{"error": "invalid_plan: unknown $ref:profile"}]
+
+
+@pytest.mark.anyio
+async def test_orchestrator_replans_around_failed_node_reusing_outputs():
+    planner = ScriptedPlanner(
+        _plan({"id": "profile", "tool": "profile", "args": {"user_id": 1}},
+              {"id": "bad", "tool": "research", "args": {"limit": "many"}},
+              {"id": "content", "tool": "content", "args": {"profile": {"$ref": "profile"}}, "depends_on": ["bad"]}),
+        _plan({"id": "content", "tool": "content", "args": {"profile": {"$ref": "profile"}}}),
+    )
+    orchestrator = DynamicAgentOrchestrator(planner, TOOLS, mode="plan", max_replans=1)
+    result = await orchestrator.run(user_id=1)
+
+    errors = {entry["node"]: entry["error"] for entry in result["trace"] if "node" in entry and "error" in entry}
+    assert errors["bad"].startswith("invalid_args: research:")
+    assert errors["content"] == "skipped: dependency bad failed"
+    assert planner.views[1]["completed_nodes"] == ["profile"]
+    # The second plan only ran content, against the profile stored by the first
+    ran = [entry["node"] for entry in result["trace"] if "result" in entry]
+    assert ran == ["profile", "content"]
+    assert result["trace"][-1]["action"] == "done"
+
+
+@pytest.mark.anyio
+async def test_orchestrator_gives_up_after_max_replans():
+    bad = _plan({"id": "a", "tool": "missing"})
+    orchestrator = DynamicAgentOrchestrator(ScriptedPlanner(bad, bad), TOOLS, mode="plan", max_replans=1)
+    result = await orchestrator.run(user_id=1)
+    assert [entry["error"] for entry in result["trace"] if "error" in entry] == [
+        "invalid_plan: unknown_tool:missing", "invalid_plan: unknown_tool:missing", "plan_failed"]
+
+
+# ---------- Checkpoints ----------
+class CountingTool:
+    '''Wraps a tool and records each call by tool name.'''
+    def __init__(self, tool, calls):
+        self.name, self.description = tool.name, tool.description
+        self.tool, self.calls = tool, calls
+
+    async def run(self, **kwargs):
+        self.calls.append(self.name)
+        return await self.tool.run(**kwargs)
+
+
+def _runs_total(outcome):
+    return REGISTRY.get_sample_value("agent_runs_total", {"mode": "step", "outcome": outcome}) or 0
+
+
+@pytest.mark.anyio
+async def test_checkpointed_run_resumes_without_repeating_steps(db):
+    calls = []
+    tools = {name: CountingTool(tool, calls) for name, tool in dummy_tools(latency=0).items()}
+    store = CheckpointStore(async_session)
+
+    # Interrupted once profile and research are checkpointed (the client went away)
+    stream = DynamicAgentOrchestrator(RuleBasedMediator(), tools, checkpointer=store).run_stream(1, run_id="r1")
+    async for event in stream:
+        if event["type"] == "decision" and event["step"] == 3:
+            break
+    await stream.aclose()
+    assert calls == ["profile", "research"]
+
+    result = await DynamicAgentOrchestrator(RuleBasedMediator(), tools, checkpointer=store).run(1, run_id="r1")
+    assert calls == ["profile", "research", "content", "scheduler"]
+    assert [entry.get("tool") or entry.get("action") for entry in result["trace"]] == [
+        "profile", "research", "content", "scheduler", "done"]
+
+    # Every row keeps its trace delta, only the newest keeps the full state
+    async with async_session() as session:
+        rows = (await session.exec(select(AgentCheckpoint).where(AgentCheckpoint.run_id == "r1")
+                                   .order_by(AgentCheckpoint.seq))).all()
+    assert [row.state is not None for row in rows] == [False] * (len(rows) - 1) + [True]
+    assert sum(len(row.trace) for row in rows) == 5
+    assert (await store.load("r1"))["finished"]
+
+
+@pytest.mark.anyio
+async def test_resuming_finished_run_replays_trace_only(db):
+    calls = []
+    tools = {name: CountingTool(tool, calls) for name, tool in dummy_tools(latency=0).items()}
+    store = CheckpointStore(async_session)
+    first = await DynamicAgentOrchestrator(RuleBasedMediator(), tools, checkpointer=store).run(1, run_id="r2")
+    done_runs = _runs_total("done")
+
+    again = await DynamicAgentOrchestrator(RuleBasedMediator(), tools, checkpointer=store).run(1, run_id="r2")
+    # Replayed from the checkpoints (JSON round-tripped), not run again
+    assert [(entry["step"], entry.get("tool")) for entry in again["trace"]] == [
+        (entry["step"], entry.get("tool")) for entry in first["trace"]]
+    assert len(calls) == 4
+    assert _runs_total("done") == done_runs
@@ -0,0 +1,323 @@
+import json
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import httpx
+import pytest
+from pydantic import BaseModel
+from sqlalchemy import insert
+
+from agent.fake_llm import FakeChatModel
+from agent.orchestrator.orchestrator import dummy_tools
+from backend.api.v1.orchestrator_routes import checkpoint_store
+from backend.config import settings
+from backend.db.models import Comment, Post
+from backend.db.session import async_session
+from backend.main import app
+from backend.services.ingest import ChunkedIngester, IngestResult, json_array_rows
+from backend.services.orchestrator_services import run_agent_batch, run_error
+
+
+@pytest.fixture
+async def client(db):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+# ---------- Startup ----------
+def test_app_import_defers_langchain():
+    code = ("import sys, backend.main; from backend.utils.startup import HEAVY_PACKAGES; "
+            "print(','.join(name for name in HEAVY_PACKAGES if name in sys.modules))")
+    loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert loaded.strip() == ""
+
+
+# ---------- Orchestrator ----------
+@pytest.mark.anyio
+async def test_resume_of_finished_run_returns_stored_trace(client):
+    trace = [{"step": 1, "tool": "profile", "result": {}}, {"step": 2, "action": "done", "reason": "ok"}]
+    await checkpoint_store.save("done-run", 1, 2, {"prompt_tokens": [10, 12]}, trace, finished=True, user_id=1)
+
+    resp = await client.post("/api/v1/orchestrator/resume/done-run")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["message"] == "Agent run already finished"
+    assert body["response"]["trace"] == trace
+    assert body["response"]["mediator_calls"] == 2
+
+
+@pytest.mark.anyio
+async def test_resume_of_unknown_run_is_404(client):
+    assert (await client.post("/api/v1/orchestrator/resume/nope")).status_code == 404
+
+
+@pytest.mark.anyio
+async def test_batch_counts_runs_ending_in_errors_as_failed():
+    def payload(user_id):
+        return {
+            "context": {"user_id": user_id},
+            "tool_registry": dummy_tools(latency=0),
+            "llm": lambda family=None: FakeChatModel.from_env(model="fake", failure_rate=1.0),
+            "mode": "step",
+        }
+
+    events = [event async for event in run_agent_batch([1, 2], payload, concurrency=2)]
+    results, summary = events[:-1], events[-1]
+    assert [event["ok"] for event in results] == [False, False]
+    assert all(event["error"].startswith("mediator_exception") for event in results)
+    assert (summary["succeeded"], summary["failed"]) == (0, 2)
+
+
+def test_run_error_reads_the_end_of_the_trace():
+    assert run_error({"trace": [{"step": 1, "tool": "profile"}, {"step": 2, "action": "done"}]}) is None
+    assert run_error({"trace": [{"step": 8, "error": "max_steps_reached"}]}) == "max_steps_reached"
+    assert run_error({"trace": [{"step": 1, "tool": "profile", "error": "timeout"}]}) == "timeout"
+    assert run_error({"trace": [{"step": 1, "tool": "profile", "result": {}}]}) == "run ended without done"
+    assert run_error({"trace": []}) == "empty trace"
+
+
+# ---------- Bulk publishing ----------
+@pytest.mark.anyio
+async def test_bulk_publish_rejects_oversized_batches(client):
+    item = {"user_id": "1", "content": "hello"}
+    resp = await client.post("/api/v1/publish/bulk", json={"requests": [item] * (settings.BULK_PUBLISH_MAX + 1)})
+    assert resp.status_code == 422
+    assert resp.json()["detail"][0]["loc"] == ["body", "requests"]
+    assert (await client.post("/api/v1/publish/bulk", json={"requests": []})).status_code == 422
+
+
+# ---------- Bulk profile ingest ----------
+PROFILE = {"name": "Ada", "linkedin_url": "https://www.linkedin.com/in/ada", "skills": ["ML"]}
+
+
+@pytest.mark.anyio
+async def test_bulk_profiles_report_invalid_rows_by_index(client):
+    rows = [PROFILE, {**PROFILE, "linkedin_url": "not a url"}, {"linkedin_url": PROFILE["linkedin_url"]},
+            {**PROFILE, "name": "Grace"}]
+    resp = await client.post("/api/v1/profile/bulk", json=rows)
+    assert resp.status_code == 200
+    result = resp.json()
+    assert (result["received"], result["inserted"], result["failed"]) == (4, 2, 2)
+    assert [error["index"] for error in result["errors"]] == [1, 2]
+    assert result["errors"][1]["error"] == "name: Field required"
+
+    for user_id, name in zip(result["user_ids"], ("Ada", "Grace")):
+        profile = (await client.get(f"/api/v1/profile/get_profile/{user_id}")).json()["profile"]
+        assert profile["name"] == name
+
+
+@pytest.mark.anyio
+async def test_bulk_profiles_from_ndjson_stream(client):
+    body = _ndjson(PROFILE, "{broken", {**PROFILE, "name": ""}, {**PROFILE, "name": "Linus"})
+    resp = await client.post("/api/v1/profile/bulk", content=body, headers={"content-type": "application/x-ndjson"})
+    result = resp.json()
+    assert (result["inserted"], result["failed"], len(result["user_ids"])) == (2, 2, 2)
+    assert [error["index"] for error in result["errors"]] == [1, 2]
+
+
+@pytest.mark.anyio
+async def test_bulk_profiles_reject_malformed_body(client):
+    assert (await client.post("/api/v1/profile/bulk", content=b"[{")).status_code == 400
+    assert (await client.post("/api/v1/profile/bulk", json={"name": "Ada"})).status_code == 400
+
+
+# ---------- Post export / import ----------
+def _ndjson(*rows):
+    return "".join((row if isinstance(row, str) else json.dumps(row)) + "\n" for row in rows)
+
+
+@pytest.mark.anyio
+async def test_post_export_import_round_trip(client):
+    body = _ndjson(
+        {"content": "naive", "created_at": "2024-01-01T10:00:00", "scheduled_for": "2024-02-01T09:00:00"},
+        {"content": "offset", "created_at": "2024-01-02T12:00:00+02:00",
+         "comments": [{"user_id": 2, "body": "top", "created_at": "2024-01-02T13:00:00",
+                       "replies": [{"user_id": 3, "body": "reply"}]}]},
+        {"content": ""},
+        "{not json",
+    )
+    resp = await client.post("/api/v1/content/import/7", content=body,
+                             headers={"content-type": "application/x-ndjson"})
+    assert resp.status_code == 200
+    result = resp.json()
+    assert (result["received"], result["inserted"], result["failed"]) == (4, 2, 2)
+    assert [error["index"] for error in result["errors"]] == [2, 3]
+    assert len(result["post_ids"]) == 2 and result["comments_inserted"] == 2
+
+    resp = await client.get("/api/v1/content/export/7", params={"include_comments": "true"})
+    exported = [json.loads(line) for line in resp.text.splitlines()]
+    assert [post["content"] for post in exported] == ["naive", "offset"]
+    # Naive timestamps are taken as UTC, offsets are converted to it
+    assert datetime.fromisoformat(exported[0]["created_at"]) == datetime(2024, 1, 1, 10, tzinfo=timezone.utc)
+    assert datetime.fromisoformat(exported[0]["scheduled_for"]) == datetime(2024, 2, 1, 9, tzinfo=timezone.utc)
+    assert datetime.fromisoformat(exported[1]["created_at"]) == datetime(2024, 1, 2, 10, tzinfo=timezone.utc)
+    thread = exported[1]["comments"]
+    assert [(c["body"], [r["body"] for r in c["replies"]]) for c in thread] == [("top", ["reply"])]
+
+    # The export imports as is for another user, with new ids
+    resp = await client.post("/api/v1/content/import/8", content=resp.text,
+                             headers={"content-type": "application/x-ndjson"})
+    again = resp.json()
+    assert (again["inserted"], again["failed"], again["comments_inserted"]) == (2, 0, 2)
+    assert not set(again["post_ids"]) & set(result["post_ids"])
+
+
+class NaivePostRow(BaseModel):
+    content: str
+    created_at: datetime
+
+
+class NaivePostResult(IngestResult):
+    post_ids: List[int] = []
+
+
+class NaivePostIngester(ChunkedIngester):
+    '''No UTC normalization, so naive timestamps are rejected when the INSERT binds them.'''
+    row_model = NaivePostRow
+    result_model = NaivePostResult
+    ids_field = "post_ids"
+
+    async def insert(self, rows):
+        statement = insert(Post).returning(Post.post_id, sort_by_parameter_order=True)
+        values = [{**row.model_dump(), "user_id": 1, "updated_at": []} for row in rows]
+        return list((await self.session.execute(statement, values)).scalars())
+
+
+@pytest.mark.anyio
+async def test_ingester_reports_rows_rejected_at_bind_time(db):
+    aware, naive = "2024-01-01T10:00:00+00:00", "2024-01-01T10:00:00"
+    rows = [{"content": str(i), "created_at": naive if i in (1, 3) else aware} for i in range(5)]
+    async with async_session() as session:
+        result = await NaivePostIngester(session, chunk_size=10, max_errors=1).ingest(json_array_rows(json.dumps(rows)))
+    assert (result.inserted, result.failed, result.chunks) == (3, 2, 1)
+    assert [error.index for error in result.errors] == [1]
+    assert result.errors_truncated == 1
+    assert len(result.post_ids) == 3
+
+
+def test_chunked_ingester_is_abstract():
+    with pytest.raises(TypeError, match="insert"):
+        ChunkedIngester(None)
+
+
+# ---------- Keyset pagination ----------
+async def _seed_posts(user_id, count):
+    # Three posts per timestamp, so pages must break ties on post_id
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    async with async_session() as session:
+        posts = [Post(user_id=user_id, content=f"post {i}", created_at=base + timedelta(hours=i // 3),
+                      scheduled_for=base + timedelta(days=1, hours=i // 3) if i % 2 else None)
+                 for i in range(count)]
+        session.add_all(posts)
+        await session.commit()
+        return [(post.post_id, post.created_at, post.scheduled_for) for post in posts]
+
+
+async def _all_pages(client, url, key, limit):
+    pages, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        resp = await client.get(url, params=params)
+        assert resp.status_code == 200
+        body = resp.json()
+        pages.append(list(body[key]))
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.anyio
+async def test_post_listing_pages_through_tied_timestamps(client):
+    posts = await _seed_posts(user_id=5, count=25)
+    pages = await _all_pages(client, "/api/v1/content/fetch_content/5", "content", limit=4)
+
+    assert [len(page) for page in pages] == [4] * 6 + [1]
+    expected = [post_id for post_id, created_at, _ in sorted(posts, key=lambda p: (p[1], p[0]), reverse=True)]
+    assert [int(post_id) for page in pages for post_id in page] == expected
+
+
+@pytest.mark.anyio
+async def test_scheduled_listing_pages_through_tied_timestamps(client):
+    posts = await _seed_posts(user_id=6, count=25)
+    pages = await _all_pages(client, "/api/v1/schedule/scheduled_posts/6", "posts", limit=5)
+
+    expected = [post_id for post_id, _, due in sorted((p for p in posts if p[2]), key=lambda p: (p[2], p[0]))]
+    assert [int(post["content_id"]) for page in pages for post in page] == expected
+    assert [len(page) for page in pages] == [5, 5, 2]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("url", ["/api/v1/content/fetch_content/5", "/api/v1/schedule/scheduled_posts/5"])
+async def test_listings_reject_bad_cursors_and_limits(client, url):
+    for cursor in ("not-a-cursor", "W10", "WyJ5ZXN0ZXJkYXkiLDFd"):  # garbage, [], ["yesterday",1]
+        resp = await client.get(url, params={"cursor": cursor})
+        assert resp.status_code == 400, cursor
+        assert "Invalid cursor" in resp.json()["detail"]
+    assert (await client.get(url, params={"limit": 0})).status_code == 422
+    assert (await client.get(url, params={"limit": 10_000})).status_code == 422
+
+
+# ---------- Comment threads ----------
+async def _seed_thread():
+    '''Five top-level comments on one post; the first has a 3-deep reply chain, the second one reply.'''
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    async with async_session() as session:
+        post, other = Post(user_id=7, content="thread"), Post(user_id=7, content="other")
+        session.add_all([post, other])
+        await session.flush()
+        roots = [Comment(post_id=post.post_id, user_id=7, body=f"root {i}", created_at=base + timedelta(minutes=i))
+                 for i in range(5)]
+        session.add_all(roots + [Comment(post_id=other.post_id, user_id=7, body="elsewhere", created_at=base)])
+        await session.flush()
+        parent = roots[0]
+        for depth in range(1, 4):
+            reply = Comment(post_id=post.post_id, user_id=7, parent_id=parent.comment_id, body=f"reply {depth}",
+                            created_at=base + timedelta(hours=depth))
+            session.add(reply)
+            await session.flush()
+            parent = reply
+        session.add(Comment(post_id=post.post_id, user_id=7, parent_id=roots[1].comment_id, body="reply to 1",
+                            created_at=base + timedelta(hours=1)))
+        await session.commit()
+        return post.post_id
+
+
+def _depth(node):
+    return 1 + max(map(_depth, node["replies"])) if node["replies"] else 0
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("max_depth, expected", [(None, 3), (0, 0), (1, 1), (2, 2), (10, 3)])
+async def test_comment_thread_respects_max_depth(client, max_depth, expected):
+    post_id = await _seed_thread()
+    params = {"limit": 1} if max_depth is None else {"limit": 1, "max_depth": max_depth}
+    resp = await client.get(f"/api/v1/comments/thread/{post_id}", params=params)
+    assert resp.status_code == 200
+
+    first, = resp.json()["comments"]
+    assert first["body"] == "root 0"
+    assert _depth(first) == expected
+    node = first
+    for depth in range(1, expected + 1):
+        node, = node["replies"]
+        assert (node["depth"], node["body"]) == (depth, f"reply {depth}")
+
+
+@pytest.mark.anyio
+async def test_comment_thread_pages_over_top_level_comments(client):
+    post_id = await _seed_thread()
+    pages, offset = [], 0
+    while offset is not None:
+        resp = await client.get(f"/api/v1/comments/thread/{post_id}", params={"limit": 2, "offset": offset})
+        assert resp.status_code == 200
+        body = resp.json()
+        pages.append(body["comments"])
+        offset = body["next_offset"]
+
+    assert [[root["body"] for root in page] for page in pages] == [["root 0", "root 1"], ["root 2", "root 3"], ["root 4"]]
+    # Replies come with their top-level comment and are never paged on their own
+    assert [reply["body"] for reply in pages[0][1]["replies"]] == ["reply to 1"]
+    assert all(not root["replies"] for page in pages[1:] for root in page)
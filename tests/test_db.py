@@ -0,0 +1,65 @@
+import shutil
+from pathlib import Path
+
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.dialects import sqlite
+from sqlmodel import SQLModel
+
+import backend.db.models  # noqa: F401  (registers the tables on SQLModel.metadata)
+from backend.db.migrations import MIGRATIONS, run_migrations
+from scripts import check_query_plans
+
+BASELINE_DB = Path(__file__).resolve().parent.parent / "linkedin_database.db"
+
+
+def _schema(url: str):
+    engine = create_engine(url)
+    try:
+        with engine.begin() as conn:
+            version = run_migrations(conn)
+        inspector = inspect(engine)
+        tables = {}
+        for table in inspector.get_table_names():
+            if table == "schema_version":
+                continue
+            tables[table] = {
+                "columns": {c["name"]: (str(c["type"]), c["nullable"]) for c in inspector.get_columns(table)},
+                "indexes": {i["name"]: tuple(i["column_names"]) for i in inspector.get_indexes(table)},
+            }
+        return version, tables
+    finally:
+        engine.dispose()
+
+
+def _model_schema():
+    tables = {}
+    for table in SQLModel.metadata.sorted_tables:
+        tables[table.name] = {
+            "columns": {c.name: (str(c.type.compile(dialect=sqlite.dialect())), c.nullable) for c in table.columns},
+            "indexes": {i.name: tuple(c.name for c in i.columns) for i in table.indexes},
+        }
+    return tables
+
+
+def test_fresh_database_matches_models(tmp_path):
+    version, tables = _schema(f"sqlite:///{tmp_path / 'fresh.db'}")
+    assert version == MIGRATIONS[-1][0]
+    assert tables == _model_schema()
+
+
+def test_upgraded_baseline_database_matches_fresh(tmp_path):
+    # The committed pre-migrations database, upgraded through every migration
+    upgraded = tmp_path / "baseline.db"
+    shutil.copy(BASELINE_DB, upgraded)
+    _, upgraded_tables = _schema(f"sqlite:///{upgraded}")
+    _, fresh_tables = _schema(f"sqlite:///{tmp_path / 'fresh.db'}")
+    assert upgraded_tables == fresh_tables
+
+
+def test_migrations_are_idempotent(tmp_path):
+    url = f"sqlite:///{tmp_path / 'twice.db'}"
+    assert _schema(url) == _schema(url)
+
+
+def test_listing_queries_use_keyset_indexes():
+    assert check_query_plans.main() == 0
@@ -0,0 +1,207 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from sqlmodel import select
+
+import agent.tools.publisher_tool as publisher_module
+from agent.tools.publisher_tool import PublishRequest, PublisherTool
+from agent.tools.rate_limit import backoff_delay
+from agent.tools.scheduler_tool import SchedulerTool
+from backend.db.models import ScheduledJob
+from backend.db.session import async_session
+from backend.services.scheduler_service import SchedulerEngine
+
+
+class FakeLinkedInAPI:
+    def __init__(self):
+        self.published = []
+
+    async def publish_post(self, user_id, content, **kwargs):
+        self.published.append((user_id, content))
+        return {"post_id": f"urn:li:share:{len(self.published)}", "url": "https://www.linkedin.com/feed/update/1"}
+
+
+class UnserializablePublisher:
+    '''Returns a result the JSON column cannot store.'''
+    def __init__(self):
+        self.calls = 0
+
+    async def run(self, **kwargs):
+        self.calls += 1
+        return {"when": object()}
+
+
+async def _run_until_settled(engine, job_id, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        async with async_session() as session:
+            job = await session.get(ScheduledJob, job_id)
+            if job.status not in ("pending", "running"):
+                return job
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not settle")
+
+
+# ---------- Scheduler dispatch ----------
+@pytest.mark.anyio
+async def test_scheduler_publishes_due_job_with_json_safe_result(db):
+    api = FakeLinkedInAPI()
+    engine = SchedulerEngine(async_session, PublisherTool(linkedin_api=api))
+    await engine.start()
+    try:
+        job = await engine.schedule("ext-1", datetime.now(timezone.utc), user_id=1, content="hello")
+        job = await _run_until_settled(engine, job.job_id)
+    finally:
+        await engine.stop()
+
+    assert job.status == "published"
+    assert job.attempts == 1
+    assert job.result["url"] == "https://www.linkedin.com/feed/update/1"
+    json.dumps(job.result)
+    assert api.published == [("1", "hello")]
+    assert engine.stats()["published"] == 1
+
+
+@pytest.mark.anyio
+async def test_scheduler_never_leaves_published_job_running(db):
+    publisher = UnserializablePublisher()
+    engine = SchedulerEngine(async_session, publisher)
+    await engine.start()
+    try:
+        job = await engine.schedule("ext-2", datetime.now(timezone.utc), user_id=1, content="hello")
+        job = await _run_until_settled(engine, job.job_id)
+    finally:
+        await engine.stop()
+
+    # The post went out, so the job is published (without a stored result) and not retried
+    assert job.status == "published"
+    assert job.result is None
+    assert "outcome not stored" in job.last_error
+    assert engine.stats()["published"] == 1
+
+    restarted = SchedulerEngine(async_session, publisher)
+    assert await restarted.start() == 0
+    await restarted.stop()
+    assert publisher.calls == 1
+
+
+@pytest.mark.anyio
+async def test_scheduler_retries_then_fails(db):
+    class Down:
+        async def run(self, **kwargs):
+            raise ConnectionError("upstream down")
+
+    engine = SchedulerEngine(async_session, Down(), max_attempts=2, retry_delay=0)
+    await engine.start()
+    try:
+        job = await engine.schedule("ext-3", datetime.now(timezone.utc) - timedelta(seconds=1),
+                                    user_id=1, content="hello")
+        job = await _run_until_settled(engine, job.job_id)
+    finally:
+        await engine.stop()
+
+    assert (job.status, job.attempts, job.last_error) == ("failed", 2, "upstream down")
+    assert engine.stats()["retried"] == 1 and engine.stats()["failed"] == 1
+    async with async_session() as session:
+        assert not (await session.exec(select(ScheduledJob).where(ScheduledJob.status == "running"))).all()
+
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("zone", [None, "America/New_York", "Asia/Kolkata"])
+async def test_optimized_slot_is_next_local_peak_in_utc(zone):
+    before = datetime.now(timezone.utc)
+    res = await SchedulerTool().run(content_id="c1", optimize=True, timezone=zone)
+
+    slot = res["scheduled_time"]
+    assert slot.utcoffset() == timedelta(0)
+    assert before <= slot <= before + timedelta(days=1)
+    local = slot.astimezone(ZoneInfo(zone or "UTC"))
+    assert (local.hour, local.minute) in {(10, 0), (18, 0)}
+
+
+@pytest.mark.anyio
+async def test_naive_preferred_time_is_read_in_user_zone():
+    tool = SchedulerTool()
+    res = await tool.run(content_id="c2", preferred_time=datetime(2030, 1, 15, 9, 30), timezone="America/New_York")
+    assert res["scheduled_time"] == datetime(2030, 1, 15, 14, 30, tzinfo=timezone.utc)
+
+    res = await tool.run(content_id="c3", preferred_time=datetime(2030, 1, 15, 9, 30))
+    assert res["scheduled_time"] == datetime(2030, 1, 15, 9, 30, tzinfo=timezone.utc)
+
+    with pytest.raises(ValueError):
+        await tool.run(content_id="c4", optimize=True, timezone="Mars/Olympus")
+
+# ---------- Bulk publishing ----------
+class UpstreamError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"upstream {status_code}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class FlakyLinkedInAPI:
+    '''Fails each content with the scripted errors before succeeding.'''
+    def __init__(self, script):
+        self.script = {content: list(errors) for content, errors in script.items()}
+        self.calls = {}
+
+    async def publish_post(self, user_id, content, **kwargs):
+        self.calls[content] = self.calls.get(content, 0) + 1
+        errors = self.script.get(content)
+        if errors:
+            raise errors.pop(0)
+        return {"post_id": f"id-{content}", "url": "https://www.linkedin.com/feed/update/2"}
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    delays = []
+
+    def record(attempt):
+        delays.append(attempt)
+        return 0
+    monkeypatch.setattr(publisher_module, "backoff_delay", record)
+    return delays
+
+
+@pytest.mark.anyio
+async def test_bulk_publish_retries_transient_errors_only(no_backoff):
+    api = FlakyLinkedInAPI({
+        "a": [UpstreamError(503), ConnectionError("reset")],
+        "b": [UpstreamError(400)],
+        "c": [UpstreamError(429, retry_after=0.01)],
+    })
+    tool = PublisherTool(linkedin_api=api, rate_per_sec=1000, burst=1000, max_retries=4)
+    result = await tool.run_bulk([PublishRequest(user_id="1", content=c) for c in ("a", "b", "c", "d")])
+
+    outcomes = {r["index"]: r for r in result["results"]}
+    assert [outcomes[i]["status"] for i in range(4)] == ["published", "failed", "published", "published"]
+    assert [outcomes[i]["attempts"] for i in range(4)] == [3, 1, 2, 1]
+    assert outcomes[1]["error"] == "upstream 400"
+    assert (result["published"], result["failed"], result["retries"], result["rate_limited"]) == (3, 1, 3, 1)
+    # Backoff grows with the retry number of each item
+    assert sorted(no_backoff) == [1, 1, 2]
+    json.dumps(result)
+
+
+@pytest.mark.anyio
+async def test_bulk_publish_gives_up_after_max_retries(no_backoff):
+    api = FlakyLinkedInAPI({"x": [UpstreamError(502)] * 10})
+    tool = PublisherTool(linkedin_api=api, rate_per_sec=1000, burst=1000, max_retries=2)
+    result = await tool.run_bulk([PublishRequest(user_id="1", content="x")])
+
+    assert result["results"][0]["status"] == "failed"
+    assert result["results"][0]["attempts"] == 3
+    assert api.calls["x"] == 3
+    assert tool.stats()["failed"] == 1
+
+
+def test_backoff_delay_is_jittered_exponential_and_capped():
+    for attempt, ceiling in ((1, 0.5), (2, 1.0), (4, 4.0), (20, 30.0)):
+        delays = [backoff_delay(attempt) for _ in range(200)]
+        assert all(0 <= d <= ceiling for d in delays)
+        assert max(delays) > ceiling / 2